@@ -0,0 +1,115 @@
+"""
+Benchmark: custo de CPU vs bytes por codec e nível em respostas típicas do /simulate
+
+Comprime o JSON de resultados de tamanhos típicos (linhas small/medium/large da
+suíte, também na codificação compacta) com cada codec disponível em vários
+níveis e reporta razão de compressão, tempo e vazão de compressão e
+descompressão. Os níveis por faixa de tamanho em engine/compression.py (LEVELS)
+saem destes números.
+
+Uso:
+    python -m benchmarks.compression
+    python -m benchmarks.compression --payloads medium large --levels 1 4 6 9 --json
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.suite import LINES
+from engine.compression import available_codecs, brotli, compress, level_for, zstandard
+from engine.encoding import encode_result
+from engine.schemas import SimulationParamsDto
+from engine.service import SimulationService
+
+DEFAULT_LEVELS = {"gzip": [1, 4, 6, 9], "br": [1, 4, 5, 9], "zstd": [1, 3, 6, 12]}
+DEFAULT_ROUNDS = 5
+
+
+def _decompressor(codec: str) -> Callable[[bytes], bytes]:
+    if codec == "gzip":
+        return gzip.decompress
+    if codec == "br":
+        return brotli.decompress
+    return zstandard.ZstdDecompressor().decompressobj().decompress
+
+
+def payloads(names: List[str]) -> Dict[str, bytes]:
+    """Corpo JSON da resposta padrão e da compacta para cada linha"""
+    service = SimulationService()
+    bodies = {}
+    for name in names:
+        result = service.run_simulation(SimulationParamsDto(**LINES[name]))
+        bodies[f"{name}.json"] = json.dumps(result, default=float).encode()
+        bodies[f"{name}.compact"] = json.dumps(encode_result(result), separators=(",", ":")).encode()
+    return bodies
+
+
+def _median_seconds(fn: Callable[[], Any], rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def run(names: List[str], levels: Optional[List[int]] = None, rounds: int = DEFAULT_ROUNDS) -> List[Dict[str, Any]]:
+    """Uma linha por (payload, codec, nível); "chosen" marca o nível que LEVELS escolhe"""
+    rows = []
+    for payload, body in payloads(names).items():
+        for codec in available_codecs():
+            decompress = _decompressor(codec)
+            chosen = level_for(codec, len(body))
+            for level in sorted(set(levels or DEFAULT_LEVELS[codec]) | {chosen}):
+                compressed = compress(codec, body, level)
+                compress_s = _median_seconds(lambda: compress(codec, body, level), rounds)
+                decompress_s = _median_seconds(lambda: decompress(compressed), rounds)
+                rows.append({
+                    "payload": payload,
+                    "codec": codec,
+                    "level": level,
+                    "chosen": level == chosen,
+                    "raw_bytes": len(body),
+                    "compressed_bytes": len(compressed),
+                    "ratio": len(body) / len(compressed),
+                    "compress_ms": compress_s * 1000,
+                    "compress_mb_s": len(body) / compress_s / 1e6,
+                    "decompress_ms": decompress_s * 1000,
+                })
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compression CPU vs bytes for /simulate payloads")
+    parser.add_argument("--payloads", nargs="+", default=list(LINES), choices=list(LINES))
+    parser.add_argument("--levels", type=int, nargs="+", help="Níveis a medir (padrão: por codec)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    try:
+        rows = run(args.payloads, args.levels, args.rounds)
+    finally:
+        logging.disable(logging.NOTSET)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'payload':<16} {'codec':<5} {'lvl':>3} {'raw KB':>9} {'out KB':>8} {'ratio':>6} "
+          f"{'comp ms':>8} {'MB/s':>7} {'decomp ms':>9}")
+    for row in rows:
+        marker = " *" if row["chosen"] else ""
+        print(f"{row['payload']:<16} {row['codec']:<5} {row['level']:>3} {row['raw_bytes'] / 1024:>9.1f} "
+              f"{row['compressed_bytes'] / 1024:>8.1f} {row['ratio']:>6.1f} {row['compress_ms']:>8.2f} "
+              f"{row['compress_mb_s']:>7.1f} {row['decompress_ms']:>9.2f}{marker}")
+    print("\n* nível escolhido por engine.compression.LEVELS para o tamanho do payload")
+
+
+if __name__ == "__main__":
+    main()
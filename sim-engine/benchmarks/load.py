@@ -0,0 +1,280 @@
+"""
+Benchmark: teste de carga local do /simulate (vazão e latência de cauda)
+
+Dispara uma mistura de cenários realistas com concorrência controlada (laço
+fechado: cada cliente envia a próxima requisição ao receber a resposta) e
+reporta RPS, p50/p95/p99 e taxa de erro em JSON. Três alvos:
+    --in-process    app ASGI no próprio processo (httpx + ASGITransport)
+    --url URL       servidor já em execução
+    (padrão)        sobe uvicorn em localhost para cada configuração de --configs
+
+Cenários:
+    urban     linhas curtas com muitas estações próximas
+    regional  linhas longas com poucas estações
+    curve     linhas médias com curva de aceleração
+
+Uso:
+    python -m benchmarks.load --concurrency 1 4 16 --requests 200
+    python -m benchmarks.load --configs SIM_WORKERS=2 SIM_WORKERS=4,SIM_PROCESS_WORKERS=4 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+SCENARIOS = ("urban", "regional", "curve")
+DEFAULT_MIX = {"urban": 6, "regional": 2, "curve": 2}
+STARTUP_TIMEOUT = 30.0
+
+
+def scenario_payload(scenario: str, rng: random.Random) -> Dict[str, Any]:
+    """Parâmetros de um cenário com variação aleatória (física e espaçamento)"""
+    if scenario == "urban":
+        spacing = [rng.uniform(0.6, 1.5) for _ in range(rng.randint(6, 12))]
+        max_speed, dwell, dt = rng.uniform(15, 22), 25.0, 0.1
+    elif scenario == "regional":
+        spacing = [rng.uniform(5, 12) for _ in range(rng.randint(2, 4))]
+        max_speed, dwell, dt = rng.uniform(22, 28), 60.0, 0.2
+    elif scenario == "curve":
+        spacing = [rng.uniform(2, 5) for _ in range(rng.randint(3, 6))]
+        max_speed, dwell, dt = rng.uniform(20, 30), 40.0, 0.1
+    else:
+        raise ValueError(f"Cenário desconhecido: {scenario}")
+
+    positions = np.concatenate(([0.0], np.cumsum(spacing))).round(2)
+    payload = {
+        "initial_accel": round(rng.uniform(0.9, 1.2), 2),
+        "threshold_speed": 8.0,
+        "max_speed": round(max_speed, 1),
+        "stations": [{"name": f"S{i}", "km": float(km)} for i, km in enumerate(positions)],
+        "dwell_time": dwell,
+        "terminal_layover": 180.0,
+        "dt": dt,
+    }
+    if scenario == "curve":
+        payload["acceleration_curve_config"] = {
+            "initial_acceleration": payload["initial_accel"],
+            "max_velocity": round(max_speed * 3.6, 1),
+            "loss_factor": round(rng.uniform(30, 60), 1),
+        }
+    return payload
+
+
+def build_workload(mix: Dict[str, int], distinct: int, seed: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Conjunto de requisições a repetir: `distinct` variações por unidade de peso
+
+    Com poucas variações os caches do serviço acertam quase sempre; com muitas,
+    a carga se aproxima de parâmetros sempre novos.
+    """
+    rng = random.Random(seed)
+    workload = []
+    for scenario, weight in mix.items():
+        variants = [scenario_payload(scenario, rng) for _ in range(distinct)]
+        workload += [(scenario, variants[i % distinct]) for i in range(weight * distinct)]
+    rng.shuffle(workload)
+    return workload
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "max": float(values.max()), "mean": float(values.mean())}
+
+
+async def run_load(client: httpx.AsyncClient, workload: List[Tuple[str, Dict[str, Any]]],
+                   concurrency: int, requests: int) -> Dict[str, Any]:
+    """Laço fechado com `concurrency` clientes até completar `requests` requisições"""
+    latencies: Dict[str, List[float]] = {scenario: [] for scenario, _ in workload}
+    errors: Dict[str, int] = {scenario: 0 for scenario in latencies}
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while issued < requests:
+            scenario, payload = workload[issued % len(workload)]
+            issued += 1
+            started = time.perf_counter()
+            try:
+                response = await client.post("/simulate", json=payload)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies[scenario].append(time.perf_counter() - started)
+            else:
+                errors[scenario] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    completed = sum(len(values) for values in latencies.values())
+    failed = sum(errors.values())
+    return {
+        "concurrency": concurrency,
+        "requests": completed + failed,
+        "errors": failed,
+        "error_rate": failed / max(completed + failed, 1),
+        "duration_s": duration,
+        "rps": completed / duration if duration > 0 else 0.0,
+        "latency_ms": percentiles([v for values in latencies.values() for v in values]),
+        "scenarios": {
+            scenario: {"requests": len(values) + errors[scenario], "errors": errors[scenario],
+                       "latency_ms": percentiles(values)}
+            for scenario, values in latencies.items()
+        },
+    }
+
+
+async def _sweep(client: httpx.AsyncClient, workload, levels: List[int], requests: int,
+                 warmup: int) -> List[Dict[str, Any]]:
+    # Aquecimento: caches de física/curvas e JIT do interpretador fora da medida
+    for _, payload in workload[:warmup]:
+        await client.post("/simulate", json=payload)
+    return [await run_load(client, workload, level, requests) for level in levels]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def parse_config(text: str) -> Dict[str, str]:
+    """'SIM_WORKERS=4,SIM_PROCESS_WORKERS=2' -> variáveis de ambiente do servidor"""
+    config = {}
+    for item in filter(None, text.split(",")):
+        name, _, value = item.partition("=")
+        if not name or not _:
+            raise ValueError(f"Configuração inválida: {item!r} (use NOME=valor)")
+        config[name.strip()] = value.strip()
+    return config
+
+
+class LocalServer:
+    """uvicorn main:app em localhost com as variáveis de ambiente da configuração"""
+
+    def __init__(self, config: Dict[str, str], app: str = "main:app"):
+        self.config = config
+        self.app = app
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "LocalServer":
+        env = {**os.environ, **self.config}
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", self.app, "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning", "--no-access-log"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Servidor terminou na inicialização (código {self.process.returncode})")
+            try:
+                if httpx.get(self.url + "/health", timeout=1.0).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError(f"Servidor não respondeu em {STARTUP_TIMEOUT}s")
+
+    def __exit__(self, *exc) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def run(levels: List[int], requests: int, mix: Dict[str, int], distinct: int = 4, seed: int = 0,
+        url: Optional[str] = None, in_process: bool = False, configs: Optional[List[str]] = None,
+        warmup: int = 5, timeout: float = 120.0) -> List[Dict[str, Any]]:
+    """
+    Executa a varredura de concorrência em cada alvo
+
+    Returns:
+        Uma linha por (configuração, nível de concorrência)
+    """
+    workload = build_workload(mix, distinct, seed)
+
+    async def against(base_url: Optional[str], transport=None) -> List[Dict[str, Any]]:
+        async with httpx.AsyncClient(base_url=base_url or "http://sim-engine", transport=transport,
+                                     timeout=timeout) as client:
+            return await _sweep(client, workload, levels, requests, warmup)
+
+    rows = []
+    if in_process:
+        from main import app
+        for row in asyncio.run(against(None, httpx.ASGITransport(app=app))):
+            rows.append({"target": "in-process", "config": {}, **row})
+    elif url:
+        for row in asyncio.run(against(url)):
+            rows.append({"target": url, "config": {}, **row})
+    else:
+        for text in configs or [""]:
+            config = parse_config(text)
+            with LocalServer(config) as server:
+                for row in asyncio.run(against(server.url)):
+                    rows.append({"target": "uvicorn", "config": config, **row})
+    return rows
+
+
+def _parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Cenário desconhecido: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Local load test for /simulate")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--in-process", action="store_true", help="App ASGI neste processo")
+    target.add_argument("--url", help="Servidor já em execução")
+    parser.add_argument("--configs", nargs="+", help="Configurações NOME=valor,... (uma instância uvicorn cada)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por nível de concorrência")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX, help="ex.: urban=6,regional=2,curve=2")
+    parser.add_argument("--distinct", type=int, default=4, help="Variações de parâmetros por unidade de peso")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args(argv)
+    if args.configs and (args.url or args.in_process):
+        parser.error("--configs só se aplica ao servidor uvicorn local")
+
+    rows = run(args.concurrency, args.requests, args.mix, args.distinct, args.seed,
+               url=args.url, in_process=args.in_process, configs=args.configs)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'config':<36} {'conc':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for row in rows:
+        config = ",".join(f"{k}={v}" for k, v in row["config"].items()) or row["target"]
+        latency = row["latency_ms"]
+        print(f"{config:<36} {row['concurrency']:>5} {row['rps']:>8.1f} {latency['p50']:>8.1f} "
+              f"{latency['p95']:>8.1f} {latency['p99']:>8.1f} {row['error_rate']:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Benchmark: replay de requisições /simulate capturadas (SIM_CAPTURE_SAMPLE_RATE)
+
+Reexecuta o corpus capturado contra o código atual e reporta, por requisição,
+o speedup e as divergências de resultado acima da tolerância (chegadas,
+partidas e duração total, em segundos). Dois modos:
+    serial (padrão)     SimulationService neste processo, uma por vez; com
+                        --profile, cProfile de todo o replay
+    --concurrency N     N clientes HTTP simultâneos (app ASGI em processo ou --url)
+
+O speedup é relativo à duração capturada (requisição HTTP inteira, na máquina
+de produção) ou, com --baseline, à de um replay anterior gravado com --output,
+que é a comparação justa entre versões do código na mesma máquina.
+
+Uso:
+    python -m benchmarks.replay captures/sim-engine.capture.jsonl --output before.json
+    python -m benchmarks.replay captures/sim-engine.capture.jsonl --baseline before.json
+    python -m benchmarks.replay captures/sim-engine.capture.jsonl --concurrency 8 --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import math
+import pstats
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from engine.capture import compare_outcomes, read_capture, summarize_result
+from engine.memory import admit_simulation
+from engine.schemas import SimulationParamsDto
+
+DEFAULT_TOLERANCE = 0.1
+PROFILE_TOP = 25
+
+
+def replayable(records: List[Dict[str, Any]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Registros com parâmetros e resposta 200 (os demais não têm o que comparar)"""
+    selected = [record for record in records if record.get("params") and record.get("status") == 200]
+    return selected[:limit] if limit else selected
+
+
+def _row(index: int, record: Dict[str, Any], elapsed: float, outcome: Optional[Dict[str, Any]],
+         error: Optional[str], tolerance: float) -> Dict[str, Any]:
+    replay_ms = elapsed * 1000
+    divergences = []
+    if outcome is not None and record.get("outcome"):
+        divergences = compare_outcomes(record["outcome"], outcome, tolerance)
+    return {
+        "index": index,
+        "request_id": record.get("request_id"),
+        "captured_ms": record.get("duration_ms"),
+        "replay_ms": replay_ms,
+        "error": error,
+        "divergences": divergences,
+    }
+
+
+def replay_serial(records: List[Dict[str, Any]], tolerance: float = DEFAULT_TOLERANCE,
+                  service=None) -> List[Dict[str, Any]]:
+    """Uma simulação por vez no serviço deste processo, com o limite de memória da API"""
+    from engine import api
+
+    service = service or api.simulation_service
+    rows = []
+    for index, record in enumerate(records):
+        started = time.perf_counter()
+        outcome, error = None, None
+        try:
+            params, _ = admit_simulation(service, SimulationParamsDto(**record["params"]),
+                                         api.MAX_REQUEST_BYTES, api.MEMORY_POLICY)
+            outcome = summarize_result(service.run_simulation(params))
+        except Exception as e:
+            error = str(e)
+        rows.append(_row(index, record, time.perf_counter() - started, outcome, error, tolerance))
+    return rows
+
+
+async def _replay_http(client: httpx.AsyncClient, records: List[Dict[str, Any]], concurrency: int,
+                       tolerance: float) -> List[Dict[str, Any]]:
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < len(records):
+            index = next_index
+            next_index += 1
+            record = records[index]
+            headers = {"X-Priority": record["priority"]} if record.get("priority") else {}
+            started = time.perf_counter()
+            outcome, error = None, None
+            try:
+                response = await client.post("/simulate", json=record["params"], headers=headers)
+                if response.status_code == 200:
+                    outcome = summarize_result(response.json())
+                else:
+                    error = f"HTTP {response.status_code}"
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+            rows[index] = _row(index, record, time.perf_counter() - started, outcome, error, tolerance)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return rows
+
+
+def replay_concurrent(records: List[Dict[str, Any]], concurrency: int, url: Optional[str] = None,
+                      tolerance: float = DEFAULT_TOLERANCE, timeout: float = 120.0) -> List[Dict[str, Any]]:
+    """`concurrency` clientes HTTP contra --url ou o app ASGI deste processo"""
+    transport = None
+    if url is None:
+        from main import app
+        transport = httpx.ASGITransport(app=app)
+
+    async def go():
+        async with httpx.AsyncClient(base_url=url or "http://sim-engine", transport=transport,
+                                     timeout=timeout) as client:
+            return await _replay_http(client, records, concurrency, tolerance)
+    return asyncio.run(go())
+
+
+def summarize(rows: List[Dict[str, Any]], wall_time: float,
+              baseline: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Agregado do replay; cada linha ganha `reference_ms` e `speedup`
+
+    A referência é o replay_ms da mesma posição na baseline ou, sem baseline,
+    a duração capturada.
+    """
+    speedups = []
+    for row in rows:
+        reference = row["captured_ms"]
+        if baseline is not None:
+            reference = baseline[row["index"]]["replay_ms"] if row["index"] < len(baseline) else None
+        row["reference_ms"] = reference
+        row["speedup"] = None
+        if reference and not row["error"] and row["replay_ms"] > 0:
+            row["speedup"] = reference / row["replay_ms"]
+            speedups.append(row["speedup"])
+
+    stats = None
+    if speedups:
+        values = np.array(speedups)
+        p10, p50, p90 = np.percentile(values, [10, 50, 90])
+        stats = {"geomean": float(math.exp(np.log(values).mean())), "p10": float(p10),
+                 "median": float(p50), "p90": float(p90)}
+    latencies = [row["replay_ms"] for row in rows if not row["error"]]
+    return {
+        "requests": len(rows),
+        "errors": sum(1 for row in rows if row["error"]),
+        "divergent": sum(1 for row in rows if row["divergences"]),
+        "wall_time_s": wall_time,
+        "rps": len(latencies) / wall_time if wall_time > 0 else 0.0,
+        "latency_ms": {"p50": float(np.percentile(latencies, 50)), "p99": float(np.percentile(latencies, 99))}
+        if latencies else None,
+        "speedup": stats,
+        "reference": "baseline" if baseline is not None else "captured",
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    summary = report["summary"]
+    print(f"{summary['requests']} requests, {summary['errors']} errors, "
+          f"{summary['divergent']} divergent, {summary['rps']:.1f} req/s")
+    if summary["speedup"]:
+        speedup = summary["speedup"]
+        print(f"speedup vs {summary['reference']}: geomean {speedup['geomean']:.2f}x, "
+              f"p10 {speedup['p10']:.2f}x, median {speedup['median']:.2f}x, p90 {speedup['p90']:.2f}x")
+    for row in report["rows"]:
+        if row["error"] or row["divergences"]:
+            problem = row["error"] or "; ".join(row["divergences"])
+            print(f"  #{row['index']} ({row['request_id'] or '-'}): {problem}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay captured /simulate requests")
+    parser.add_argument("capture", help="Arquivo de captura (os rotacionados .N também são lidos)")
+    parser.add_argument("--concurrency", type=int, help="Replay HTTP com N clientes (padrão: serial)")
+    parser.add_argument("--url", help="Servidor já em execução (só com --concurrency)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Divergência máxima (s)")
+    parser.add_argument("--limit", type=int, help="Só as N primeiras requisições")
+    parser.add_argument("--profile", action="store_true", help="cProfile do replay serial")
+    parser.add_argument("--baseline", help="Replay anterior (--output) como referência do speedup")
+    parser.add_argument("--output", help="Grava o relatório (JSON) neste arquivo")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args(argv)
+    if args.concurrency is None and args.url:
+        parser.error("--url requer --concurrency")
+    if args.concurrency is not None and args.profile:
+        parser.error("--profile só se aplica ao replay serial")
+
+    records = replayable(read_capture(args.capture), args.limit)
+    if not records:
+        parser.error(f"Nenhuma requisição reexecutável em {args.capture}")
+
+    profiler = cProfile.Profile() if args.profile else None
+    # Logs por segmento do serviço poluem a saída
+    logging.disable(logging.WARNING)
+    started = time.perf_counter()
+    try:
+        if args.concurrency is None:
+            if profiler is not None:
+                profiler.enable()
+            rows = replay_serial(records, args.tolerance)
+            if profiler is not None:
+                profiler.disable()
+        else:
+            rows = replay_concurrent(records, args.concurrency, args.url, args.tolerance)
+    finally:
+        logging.disable(logging.NOTSET)
+    wall_time = time.perf_counter() - started
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["rows"]
+    report = {"mode": "serial" if args.concurrency is None else f"concurrent:{args.concurrency}",
+              "summary": summarize(rows, wall_time, baseline), "rows": rows}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    if profiler is not None:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(stream.getvalue())
+    return 1 if report["summary"]["errors"] or report["summary"]["divergent"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Benchmark: pickle vs memória compartilhada na volta de resultados do process pool
+
+Para cada tamanho (pontos por coluna), o worker gera as colunas
+time/position/velocity e as devolve de várias formas; o processo pai vai até o
+corpo JSON da resposta, como o /simulate:
+    baseline     nada volta (custo de gerar + agendar)
+    pickle-list  dict de listas -> json.dumps
+    pickle-numpy dict de arrays NumPy -> result_json
+    shm-lists    SharedResult.to_result() (cópia para listas) -> json.dumps
+    shm          SharedResult.render(result_json): direto das views (caminho do /simulate)
+
+transfer_ms vai até o payload chegar ao pai; total_ms inclui o corpo JSON.
+result_json usa orjson se instalado (linha "JSON" no fim da tabela).
+
+Uso:
+    python -m benchmarks.shm_transfer --sizes 10000 100000 1000000 --repeat 5
+"""
+
+import argparse
+import json
+import pickle
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from engine import encoding
+from engine.encoding import result_json
+from engine.shm import SharedResult
+
+MODES = ("baseline", "pickle-list", "pickle-numpy", "shm-lists", "shm")
+
+
+def _columns(n: int) -> Dict[str, np.ndarray]:
+    t = np.linspace(0.0, n * 0.1, n)
+    return {"time": t, "position": np.cumsum(np.full(n, 0.5)), "velocity": np.sin(t) + 10.0}
+
+
+def _produce(mode: str, n: int) -> Any:
+    columns = _columns(n)
+    if mode == "baseline":
+        return None
+    if mode == "pickle-list":
+        return {name: array.tolist() for name, array in columns.items()}
+    if mode == "pickle-numpy":
+        return columns
+    return SharedResult.export(columns)
+
+
+def _consume(mode: str, payload: Any) -> Tuple[int, int]:
+    """Corpo JSON da resposta no processo pai; retorna (bytes de payload pickle, bytes do corpo)"""
+    if mode == "baseline":
+        return 0, 0
+    pickled = len(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+    if mode == "shm":
+        return pickled, len(payload.render(result_json))
+    if mode == "shm-lists":
+        return pickled, len(json.dumps(payload.to_result()))
+    if mode == "pickle-list":
+        return pickled, len(json.dumps(payload))
+    return pickled, len(result_json(payload))
+
+
+def run(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        pool.submit(_produce, "baseline", 10).result()  # aquece o worker
+        for n in sizes:
+            for mode in MODES:
+                transfers, totals = [], []
+                peak = 0
+                payload_bytes = body_bytes = 0
+                for _ in range(repeat):
+                    tracemalloc.start()
+                    started = time.perf_counter()
+                    payload = pool.submit(_produce, mode, n).result()
+                    received = time.perf_counter()
+                    payload_bytes, body_bytes = _consume(mode, payload)
+                    finished = time.perf_counter()
+                    transfers.append(received - started)
+                    totals.append(finished - started)
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                    del payload
+                rows.append({
+                    "points": n,
+                    "mode": mode,
+                    "json": "orjson" if encoding.orjson is not None else "json",
+                    "transfer_ms": statistics.median(transfers) * 1000,
+                    "total_ms": statistics.median(totals) * 1000,
+                    "min_total_ms": min(totals) * 1000,
+                    "parent_peak_mb": peak / 1e6,
+                    "pickled_bytes": payload_bytes,
+                    "body_bytes": body_bytes,
+                })
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="pickle vs shared memory result transfer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args(argv)
+
+    rows = run(args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'points':>9} {'mode':<13} {'transfer ms':>12} {'total ms':>10} {'min ms':>9} "
+          f"{'parent MB':>10} {'pickled B':>12} {'body MB':>8}")
+    for row in rows:
+        print(f"{row['points']:>9} {row['mode']:<13} {row['transfer_ms']:>12.2f} {row['total_ms']:>10.2f} "
+              f"{row['min_total_ms']:>9.2f} {row['parent_peak_mb']:>10.1f} {row['pickled_bytes']:>12} "
+              f"{row['body_bytes'] / 1e6:>8.1f}")
+    print(f"\nJSON: {rows[0]['json'] if rows else '-'}")
+
+
+if __name__ == "__main__":
+    main()
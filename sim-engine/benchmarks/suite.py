@@ -0,0 +1,267 @@
+"""
+Benchmark: suíte de desempenho do solver, da curva, do serviço e da camada HTTP
+
+Cada benchmark é uma função de preparo que devolve a chamada medida. A suíte
+grava a mediana (e min/média/desvio) por benchmark em um JSON de baseline; o
+comando compare aponta regressões acima de um limiar entre dois arquivos.
+
+Uso:
+    python -m benchmarks.suite run --output benchmarks/baselines/local.json
+    python -m benchmarks.suite run --filter service --baseline benchmarks/baselines/reference.json
+    python -m benchmarks.suite compare base.json new.json --threshold 0.20
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from engine.acceleration_curve import AccelerationCurve
+from engine.cache import LRUCache
+from engine.rk4 import RK4Solver, TrainPhysics
+from engine.schemas import AccelerationCurveConfig, SimulationParamsDto
+from engine.service import SimulationService
+
+DEFAULT_ROUNDS = 7
+DEFAULT_THRESHOLD = 0.20  # medianas de poucas rodadas variam ~10% entre execuções
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    """Registra uma função de preparo `setup() -> chamada medida`"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# ------------------------------------------------------------------ linhas
+
+def _line(stations_km: List[float], dt: float, **overrides) -> Dict[str, Any]:
+    return {
+        "initial_accel": 1.0,
+        "threshold_speed": 8.0,
+        "max_speed": 20.0,
+        "stations": [{"name": f"S{i}", "km": km} for i, km in enumerate(stations_km)],
+        "dwell_time": 30.0,
+        "terminal_layover": 300.0,
+        "dt": dt,
+        **overrides,
+    }
+
+
+LINES = {
+    "small": _line([0, 2], dt=0.1),
+    "medium": _line([0, 2.5, 5, 8, 12, 15], dt=0.1),
+    "large": _line(list(np.linspace(0, 60, 21).round(3)), dt=0.05),
+}
+
+
+def _clear_caches(service: SimulationService) -> None:
+    """Execução a frio: esvazia os caches em memória do serviço"""
+    for value in vars(service).values():
+        if isinstance(value, LRUCache):
+            value.clear()
+
+
+# ------------------------------------------------------------------ benchmarks
+
+def _solve(physics: TrainPhysics) -> Callable[[], Any]:
+    solver = RK4Solver(dt=0.05)
+    return lambda: solver.solve(0.0, 0.0, (0.0, 400.0), physics.acceleration_function,
+                                target_position=5000.0, use_braking=True)
+
+
+@benchmark("rk4.solve")
+def bench_solve():
+    return _solve(TrainPhysics(1.0, 8.0, 20.0))
+
+
+@benchmark("rk4.solve_curve")
+def bench_solve_curve():
+    curve = AccelerationCurve(AccelerationCurveConfig().model_dump())
+    return _solve(TrainPhysics(1.0, 8.0, 20.0, acceleration_curve=curve))
+
+
+@benchmark("curve.get_acceleration")
+def bench_curve_lookup():
+    curve = AccelerationCurve(AccelerationCurveConfig().model_dump())
+    velocities = np.linspace(0.0, 45.0, 10_000).tolist()
+    return lambda: [curve.get_acceleration(v) for v in velocities]
+
+
+def _run_simulation(line: str) -> Callable[[], Any]:
+    service = SimulationService()
+    params = SimulationParamsDto(**LINES[line])
+
+    def call():
+        _clear_caches(service)
+        return service.run_simulation(params)
+    return call
+
+
+for _name in LINES:
+    benchmark(f"service.run_simulation.{_name}")(lambda _name=_name: _run_simulation(_name))
+
+
+@benchmark("http.simulate.medium")
+def bench_http_simulate():
+    """/simulate ponta a ponta no cliente ASGI em processo (validação, fila, serialização)"""
+    from fastapi.testclient import TestClient
+
+    from engine.api import simulation_service
+    from main import app
+
+    client = TestClient(app)
+    payload = LINES["medium"]
+
+    def call():
+        _clear_caches(simulation_service)
+        response = client.post("/simulate", json=payload)
+        response.raise_for_status()
+        return response.content
+    return call
+
+
+# ------------------------------------------------------------------ execução
+
+def run(names: Optional[List[str]] = None, rounds: int = DEFAULT_ROUNDS) -> Dict[str, Any]:
+    """Executa os benchmarks (uma rodada de aquecimento + `rounds` medidas)"""
+    results = {}
+    for name in names or list(BENCHMARKS):
+        call = BENCHMARKS[name]()
+        call()
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            "median_ms": statistics.median(timings),
+            "min_ms": min(timings),
+            "mean_ms": statistics.fmean(timings),
+            "stdev_ms": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            "rounds": rounds,
+        }
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compara medianas por benchmark
+
+    Returns:
+        Uma linha por benchmark com status "regression" (mais lento que
+        1 + threshold), "improvement" (mais rápido que 1 - threshold), "ok",
+        "new" (sem baseline) ou "missing" (só na baseline)
+    """
+    rows = []
+    base_results = baseline["results"]
+    current_results = current["results"]
+    for name in sorted(set(base_results) | set(current_results)):
+        base = base_results.get(name)
+        now = current_results.get(name)
+        row = {"name": name,
+               "baseline_ms": base["median_ms"] if base else None,
+               "current_ms": now["median_ms"] if now else None,
+               "change": None}
+        if base is None:
+            row["status"] = "new"
+        elif now is None:
+            row["status"] = "missing"
+        else:
+            row["change"] = now["median_ms"] / base["median_ms"] - 1.0
+            if row["change"] > threshold:
+                row["status"] = "regression"
+            elif row["change"] < -threshold:
+                row["status"] = "improvement"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def _print_results(report: Dict[str, Any]) -> None:
+    print(f"{'benchmark':<34} {'median ms':>10} {'min ms':>9} {'stdev ms':>9}")
+    for name, row in report["results"].items():
+        print(f"{name:<34} {row['median_ms']:>10.2f} {row['min_ms']:>9.2f} {row['stdev_ms']:>9.2f}")
+
+
+def _print_comparison(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<34} {'base ms':>10} {'now ms':>10} {'change':>8}  status")
+    for row in rows:
+        base = f"{row['baseline_ms']:.2f}" if row["baseline_ms"] is not None else "-"
+        now = f"{row['current_ms']:.2f}" if row["current_ms"] is not None else "-"
+        change = f"{row['change']:+.1%}" if row["change"] is not None else "-"
+        print(f"{row['name']:<34} {base:>10} {now:>10} {change:>8}  {row['status']}")
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="sim-engine benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Executa os benchmarks")
+    run_parser.add_argument("--filter", help="Só benchmarks cujo nome contém este texto")
+    run_parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    run_parser.add_argument("--output", help="Grava o resultado (JSON) neste arquivo")
+    run_parser.add_argument("--baseline", help="Compara com esta baseline ao final")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser("compare", help="Compara dois resultados JSON")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        rows = compare(_load(args.baseline), _load(args.current), args.threshold)
+        _print_comparison(rows)
+        return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+    names = [name for name in BENCHMARKS if not args.filter or args.filter in name]
+    if not names:
+        parser.error(f"Nenhum benchmark corresponde a {args.filter!r}")
+    # Logs por segmento do serviço poluem a saída (o custo de formatação continua medido)
+    logging.disable(logging.WARNING)
+    try:
+        report = run(names, args.rounds)
+    finally:
+        logging.disable(logging.NOTSET)
+    _print_results(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        print()
+        rows = compare(_load(args.baseline), report, args.threshold)
+        _print_comparison(rows)
+        return 1 if any(row["status"] == "regression" for row in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
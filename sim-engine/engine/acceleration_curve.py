@@ -28,6 +28,10 @@ class AccelerationCurve:
         self.loss_factor = config.get('loss_factor', 46)  # dimensionless
         self.max_velocity = config.get('max_velocity', 160)  # km/h
 
+        # Identifies the curve in simulation caches
+        self.cache_key = (self.linear_velocity_threshold, self.initial_acceleration,
+                          self.velocity_increment, self.loss_factor, self.max_velocity)
+
         # Pre-calculate the curve points for interpolation
         self.curve_points = self._calculate_curve_points()
 
@@ -0,0 +1,709 @@
+"""
+API Module
+Rotas compartilhadas entre main.py e main.production.py
+"""
+
+import asyncio
+import json
+import os
+import tracemalloc
+import uuid
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import ValidationError
+
+from .acceleration_curve import AccelerationCurve
+from .scheduler import SimulationScheduler, PRIORITY_BULK, PRIORITY_CLASSES, PRIORITY_INTERACTIVE
+from .cache import LRUCache
+from .capture import CaptureMiddleware, CaptureWriter
+from .compression import DEFAULT_CODECS, DEFAULT_MINIMUM_SIZE, CompressionMiddleware
+from .conflicts import detect_conflicts
+from .encoding import COMPACT_BINARY, encode_result, encode_result_binary, parse_accept, result_json
+from .fleet import departure_offsets, simulate_fleet
+from .memory import MemoryLimitError, PeakMemoryMiddleware, admit_fleet, admit_simulation
+from .metrics import CONTENT_TYPE, MetricsMiddleware, registry, timed_endpoint
+from .tracing import DEFAULT_BACKUPS, TraceWriter, TracingMiddleware
+from .optimize import find_minimum_parameter
+from .profiling import DEFAULT_TOP, PROFILING_MODES, RequestProfiler
+from .profiles import ProfileRegistry, profile_schedule
+from .schemas import (
+    AccelerationCurveConfig, AccelerationCurvePoint, AccelerationCurveResponse, ConflictRequestDto, ConflictResultDto, DeparturePlanDto, DerivedSimulationResultDto,
+    FleetRequestDto, FleetResultDto, OptimizeRequestDto, OptimizeResultDto,
+    ProfileReportDto, ProfileScheduleRequestDto, ProfileScheduleResultDto,
+    ScheduleResultDto, SimulationBatchDto, SimulationBatchResultDto, SimulationDeriveDto,
+    SimulationParamsDto, SimulationResultDto, StochasticRequestDto, StochasticResultDto,
+    SweepRequestDto, SweepResultDto, TimetableRequestDto, TimetableResultDto
+)
+from .service import SimulationService
+from .sweep import SweepLockedError, count_points, evaluate_point, run_sweep
+from .timetable import build_timetable, departure_trajectory, timetable_runs
+
+
+
+class TimedRoute(APIRoute):
+    """Rota cujo endpoint é medido (etapa handler em sim_stage_duration_seconds)"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+
+router = APIRouter(route_class=TimedRoute)
+
+
+# Traces por requisição (SIM_TRACE_SAMPLE_RATE de 0 a 1) no arquivo rotativo SIM_TRACE_FILE
+TRACE_SAMPLE_RATE = float(os.getenv("SIM_TRACE_SAMPLE_RATE", "0"))
+trace_writer = None
+if TRACE_SAMPLE_RATE > 0:
+    trace_writer = TraceWriter(
+        os.getenv("SIM_TRACE_FILE", "traces/sim-engine.trace.json"),
+        max_bytes=int(float(os.getenv("SIM_TRACE_MAX_MB", "64")) * 1024 * 1024),
+        backups=int(os.getenv("SIM_TRACE_BACKUPS", str(DEFAULT_BACKUPS)))
+    )
+
+
+# Captura de requisições /simulate para replay (SIM_CAPTURE_SAMPLE_RATE de 0 a 1) em JSONL rotativo
+CAPTURE_SAMPLE_RATE = float(os.getenv("SIM_CAPTURE_SAMPLE_RATE", "0"))
+capture_writer = None
+if CAPTURE_SAMPLE_RATE > 0:
+    capture_writer = CaptureWriter(
+        os.getenv("SIM_CAPTURE_FILE", "captures/sim-engine.capture.jsonl"),
+        max_bytes=int(float(os.getenv("SIM_CAPTURE_MAX_MB", "64")) * 1024 * 1024),
+        backups=int(os.getenv("SIM_CAPTURE_BACKUPS", str(DEFAULT_BACKUPS)))
+    )
+
+
+# Compressão negociada das respostas (SIM_COMPRESSION: codecs em ordem de preferência ou "off")
+COMPRESSION_CODECS = [codec.strip() for codec in os.getenv("SIM_COMPRESSION", ",".join(DEFAULT_CODECS)).split(",")
+                      if codec.strip() and codec.strip() != "off"]
+COMPRESSION_MIN_BYTES = int(os.getenv("SIM_COMPRESSION_MIN_BYTES", str(DEFAULT_MINIMUM_SIZE)))
+
+# Limite de memória por simulação completa: "decimate" impõe max_points, "reject" responde 413
+MAX_REQUEST_BYTES = int(float(os.getenv("SIM_MAX_REQUEST_MB", "512")) * 1024 * 1024)
+MEMORY_POLICY = os.getenv("SIM_MEMORY_POLICY", "decimate")
+
+# Pico de memória por requisição (header X-Peak-Memory-Bytes); tracemalloc custa em toda alocação
+if os.getenv("SIM_TRACEMALLOC", "0") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def admit(params) -> Tuple[SimulationParamsDto, Dict[str, Any]]:
+    """Aplica o limite de memória (413 se a requisição não cabe nem decimada)"""
+    try:
+        return admit_simulation(simulation_service, params, MAX_REQUEST_BYTES, MEMORY_POLICY)
+    except MemoryLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+def _submit_admitted(params, priority: str) -> Future:
+    """Submete run_simulation já com o limite de memória; recusa vira a exceção do Future"""
+    try:
+        params, _ = admit_simulation(simulation_service, params, MAX_REQUEST_BYTES, MEMORY_POLICY)
+    except MemoryLimitError as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+    return simulation_scheduler.submit(
+        simulation_service.run_simulation, params,
+        checkpoint=simulation_scheduler.checkpoint, priority=priority
+    )
+
+
+def response_encoding(accept: Optional[str]) -> Optional[Tuple[str, Dict[str, float]]]:
+    """Codificação compacta pedida no header Accept (400 se as precisões forem inválidas)"""
+    try:
+        return parse_accept(accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def encode_body(result: Dict[str, Any], encoding: Optional[Tuple[str, Dict[str, float]]]) -> bytes:
+    """Corpo da resposta de /simulate: JSON padrão (forma de SimulationResultDto) ou compacto"""
+    if encoding is None:
+        return result_json(result, SimulationResultDto)
+    media_type, precision = encoding
+    if media_type == COMPACT_BINARY:
+        return encode_result_binary(result, precision)
+    return json.dumps(encode_result(result, precision), separators=(",", ":")).encode()
+
+
+def body_response(body: bytes, encoding: Optional[Tuple[str, Dict[str, float]]]) -> Response:
+    if encoding is None:
+        return Response(body, media_type="application/json")
+    return Response(body, media_type=encoding[0], headers={"Vary": "Accept"})
+
+
+async def encoded_response(result: Dict[str, Any], encoding: Tuple[str, Dict[str, float]]) -> Response:
+    """Resultado na codificação compacta (JSON ou binária), codificado fora do event loop"""
+    return body_response(await asyncio.to_thread(encode_body, result, encoding), encoding)
+
+
+def instrument_app(app) -> None:
+    """Métricas, traces, captura, compressão e pico de memória por requisição; chamar logo após criar o app"""
+    app.router.route_class = TimedRoute
+    app.add_middleware(CaptureMiddleware, writer=capture_writer, sample_rate=CAPTURE_SAMPLE_RATE)
+    # Dentro das métricas/traces (a compressão conta na serialização), fora da captura (corpo original)
+    if COMPRESSION_CODECS:
+        app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES, codecs=COMPRESSION_CODECS)
+    app.add_middleware(PeakMemoryMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(TracingMiddleware, writer=trace_writer, sample_rate=TRACE_SAMPLE_RATE)
+
+# Segundo nível de cache em disco, compartilhado pelos workers (SIM_SEGMENT_STORE: diretório)
+SEGMENT_STORE_MAX_BYTES = int(float(os.getenv("SIM_SEGMENT_STORE_MAX_MB", "512")) * 1024 * 1024)
+segment_store = None
+if os.getenv("SIM_SEGMENT_STORE"):
+    from .segment_store import SegmentStore
+    segment_store = SegmentStore(os.getenv("SIM_SEGMENT_STORE"), max_bytes=SEGMENT_STORE_MAX_BYTES)
+
+simulation_service = SimulationService(segment_store=segment_store)
+simulation_scheduler = SimulationScheduler(workers=int(os.getenv("SIM_WORKERS", "2")))
+
+# Simulações completas em processos filhos, resultado por memória compartilhada (ver configure)
+process_pool = None
+
+
+def configure(workers: Optional[int] = None, process_workers: Optional[int] = None) -> None:
+    """
+    Workers do scheduler e do pool de processos (chamado por create_app)
+
+    None mantém o valor atual; process_workers=0 desliga o pool. O pool (e o
+    multiprocessing) só é importado quando configurado.
+    """
+    global simulation_scheduler, process_pool
+    if workers is not None and workers != simulation_scheduler.workers:
+        previous = simulation_scheduler
+        simulation_scheduler = SimulationScheduler(workers=workers)
+        previous.shutdown(wait=False)
+
+    current = process_pool.workers if process_pool is not None else 0
+    if process_workers is None or process_workers == current:
+        return
+    if process_pool is not None:
+        process_pool.shutdown(wait=False)
+        process_pool = None
+    if process_workers > 0:
+        from .process_pool import SimulationProcessPool
+        process_pool = SimulationProcessPool(
+            process_workers,
+            segment_store_dir=os.getenv("SIM_SEGMENT_STORE"),
+            segment_store_max_bytes=SEGMENT_STORE_MAX_BYTES
+        )
+
+
+def render_pooled_simulation(params, encoding: Optional[Tuple[str, Dict[str, float]]],
+                             fields: Dict[str, Any]) -> bytes:
+    """
+    /simulate no pool de processos até o corpo da resposta, numa tarefa do scheduler
+
+    O corpo é serializado direto das views do bloco compartilhado (SharedResult.render),
+    sem as listas de to_result nem a validação do response_model.
+    """
+    with process_pool.submit(params).result() as shared:
+        shared.metadata.update(fields, result_id=simulation_service.store_result(params, keep_segments=False))
+        return shared.render(lambda result: encode_body(result, encoding))
+
+# Perfil sob demanda (header X-Profile): desligado por padrão, opcionalmente com token
+PROFILING_ENABLED = os.getenv("SIM_PROFILING", "0") == "1"
+PROFILING_TOKEN = os.getenv("SIM_PROFILING_TOKEN")
+PROFILING_TOP = int(os.getenv("SIM_PROFILING_TOP", str(DEFAULT_TOP)))
+
+
+def request_profiler(x_profile: Optional[str], x_profile_token: Optional[str]) -> Optional[RequestProfiler]:
+    """Profiler pedido pelo header X-Profile (true/cprofile ou sampling), se permitido"""
+    if not x_profile:
+        return None
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (set SIM_PROFILING=1)")
+    if PROFILING_TOKEN and x_profile_token != PROFILING_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+    mode = "cprofile" if x_profile.lower() in ("1", "true") else x_profile.lower()
+    if mode not in PROFILING_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid profiling mode: {x_profile}")
+    return RequestProfiler(mode, top=PROFILING_TOP)
+
+SWEEP_MAX_POINTS = int(os.getenv("SIM_SWEEP_MAX_POINTS", "100000"))
+# Físicas distintas por requisição Monte Carlo (abaixo do cache de física, 128)
+STOCHASTIC_MAX_PHYSICS = int(os.getenv("SIM_STOCHASTIC_MAX_PHYSICS", "64"))
+SWEEP_CHECKPOINT_DIR = os.getenv("SIM_SWEEP_DIR", "sweeps")
+
+# Quadros de horário recentes (parâmetros + partidas) para trajetórias sob demanda
+timetable_store = LRUCache(int(os.getenv("SIM_TIMETABLE_STORE_SIZE", "256")))
+
+
+def _cache_counter(field: str) -> Dict[tuple, float]:
+    return {(name,): stats[field] for name, stats in simulation_service.cache_stats().items()}
+
+
+registry.counter("sim_cache_hits", "Acertos por cache do serviço", ("cache",),
+                 function=lambda: _cache_counter("hits"))
+registry.counter("sim_cache_misses", "Faltas por cache do serviço", ("cache",),
+                 function=lambda: _cache_counter("misses"))
+registry.gauge("sim_queue_depth", "Jobs aguardando no scheduler por classe", ("priority",),
+               function=lambda: {(cls,): depth for cls, depth in simulation_scheduler.queue_depth().items()})
+
+# Perfis de material rodante (SIM_PROFILES: arquivo JSON/YAML), construídos no warm-up do startup
+PROFILES_PATH = os.getenv("SIM_PROFILES")
+profile_registry = ProfileRegistry()
+
+
+def dedupe_params(items: List[Any]) -> Tuple[List[Any], List[int]]:
+    """
+    Remove conjuntos de parâmetros idênticos
+
+    Returns:
+        (itens únicos, índice do item único para cada item original)
+    """
+    unique = []
+    index_map = []
+    seen: Dict[str, int] = {}
+    for item in items:
+        key = item.model_dump_json(exclude={"priority"})
+        if key not in seen:
+            seen[key] = len(unique)
+            unique.append(item)
+        index_map.append(seen[key])
+    return unique, index_map
+
+
+def resolve_departures(plan: DeparturePlanDto) -> List[float]:
+    """Partidas explícitas ou geradas por headway (count ou last_departure)"""
+    if plan.departures is not None:
+        return sorted(plan.departures)
+    if plan.headway is None:
+        raise ValueError("Provide departures or headway with count/last_departure")
+    departures = departure_offsets(plan.first_departure, plan.headway,
+                                   count=plan.count, last_departure=plan.last_departure)
+    if len(departures) > 5000:
+        raise ValueError("At most 5000 departures per request")
+    return departures.tolist()
+
+
+def _batch_item(index: int, outcome: Any) -> Dict[str, Any]:
+    if isinstance(outcome, BaseException):
+        return {"index": index, "status": "error", "error": f"Simulation failed: {outcome}"}
+    return {"index": index, "status": "ok", "result": outcome}
+
+
+async def _stream_batch(futures, index_map: List[int]):
+    """Emite uma linha NDJSON por item original assim que sua simulação termina"""
+    originals: Dict[int, List[int]] = {}
+    for index, unique_index in enumerate(index_map):
+        originals.setdefault(unique_index, []).append(index)
+
+    waiters = {asyncio.wrap_future(future): i for i, future in enumerate(futures)}
+    pending = set(waiters)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in done:
+                outcome = waiter.exception() or waiter.result()
+                for index in originals[waiters[waiter]]:
+                    yield json.dumps(_batch_item(index, outcome), default=str) + "\n"
+    finally:
+        # Cliente desconectou: não executar o que ainda está na fila
+        for future in futures:
+            future.cancel()
+
+
+@router.get("/metrics")
+async def metrics():
+    """Request, stage and segment latency histograms, counters and gauges (Prometheus text format)"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/scheduler/stats")
+async def scheduler_stats():
+    """Queue depth and per-class queue wait percentiles"""
+    return simulation_scheduler.stats()
+
+
+@router.post("/simulate", response_model=SimulationResultDto)
+async def simulate_physics(params: SimulationParamsDto, x_priority: Optional[str] = Header(None),
+                           x_profile: Optional[str] = Header(None),
+                           x_profile_token: Optional[str] = Header(None),
+                           accept: Optional[str] = Header(None)):
+    """
+    Full round-trip simulation.
+    With Accept: application/vnd.sim-engine.compact+json (or the binary
+    application/vnd.sim-engine.compact) the trajectory is returned as uniform
+    time runs and quantized position/velocity deltas; precisions are media type
+    parameters, e.g. "; position_precision=0.01; velocity_precision=0.01".
+    """
+    priority = params.priority or x_priority or PRIORITY_INTERACTIVE
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority class: {priority}")
+    profiler = request_profiler(x_profile, x_profile_token)
+    encoding = response_encoding(accept)
+    params, memory_estimate = admit(params)
+
+    try:
+        if profiler is None and process_pool is not None:
+            body = await simulation_scheduler.run(
+                render_pooled_simulation, params, encoding, {"memory_estimate": memory_estimate},
+                priority=priority
+            )
+            return body_response(body, encoding)
+        if profiler is None:
+            result = await simulation_scheduler.run(
+                simulation_service.run_and_store, params,
+                checkpoint=simulation_scheduler.checkpoint, priority=priority
+            )
+        else:
+            # Perfilado neste processo (fora do pool de processos)
+            result = await simulation_scheduler.run(
+                profiler.run, simulation_service.run_and_store, params,
+                checkpoint=simulation_scheduler.checkpoint, priority=priority
+            )
+            result["profiling"] = profiler.report
+        result["memory_estimate"] = memory_estimate
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
+    if encoding is not None:
+        return await encoded_response(result, encoding)
+    return result
+
+
+@router.post("/acceleration-curve/calculate", response_model=AccelerationCurveResponse)
+async def calculate_acceleration_curve(config: AccelerationCurveConfig):
+    """
+    Calculate acceleration curve based on configuration.
+    This endpoint is independent of the simulation and just returns the curve points.
+    """
+    try:
+        curve = AccelerationCurve(config.model_dump())
+        curve_data = curve.get_curve_data()
+        points = [AccelerationCurvePoint(velocity=v, acceleration=a)
+                  for v, a in zip(curve_data['velocity'], curve_data['acceleration'])]
+        return AccelerationCurveResponse(points=points, config=config)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Curve calculation failed: {str(e)}")
+
+
+@router.post("/schedule", response_model=ScheduleResultDto)
+async def simulate_schedule(params: SimulationParamsDto, x_priority: Optional[str] = Header(None),
+                            x_profile: Optional[str] = Header(None),
+                            x_profile_token: Optional[str] = Header(None)):
+    """
+    Schedule-only simulation: arrival/departure times without trajectories.
+    Segments are integrated without storing per-step samples.
+    """
+    priority = params.priority or x_priority or PRIORITY_INTERACTIVE
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority class: {priority}")
+    profiler = request_profiler(x_profile, x_profile_token)
+
+    try:
+        if profiler is None:
+            return await simulation_scheduler.run(
+                simulation_service.run_schedule, params,
+                checkpoint=simulation_scheduler.checkpoint, priority=priority
+            )
+        result = await simulation_scheduler.run(
+            profiler.run, simulation_service.run_schedule, params,
+            checkpoint=simulation_scheduler.checkpoint, priority=priority
+        )
+        return {**result, "profiling": profiler.report}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
+
+
+@router.post("/simulate/derive", response_model=DerivedSimulationResultDto)
+async def derive_simulation(request: SimulationDeriveDto, x_priority: Optional[str] = Header(None),
+                            accept: Optional[str] = Header(None)):
+    """
+    Re-run a previous simulation with a parameter patch.
+    Only segments whose length or physics changed are integrated again; the
+    rest are reused from the base run and shifted in time. Accepts the compact
+    encoding like /simulate.
+    """
+    priority = request.priority or x_priority or PRIORITY_INTERACTIVE
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority class: {priority}")
+    encoding = response_encoding(accept)
+
+    try:
+        base = simulation_service.get_stored_params(request.base_result_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown result id: {request.base_result_id}")
+
+    payload = base.model_dump(exclude={"priority"})
+    payload.update(request.patch.model_dump(exclude_unset=True))
+    try:
+        params = SimulationParamsDto(**payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    params, memory_estimate = admit(params)
+
+    try:
+        result = await simulation_scheduler.run(
+            simulation_service.derive_simulation, request.base_result_id, params,
+            checkpoint=simulation_scheduler.checkpoint, priority=priority
+        )
+        result["memory_estimate"] = memory_estimate
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown result id: {request.base_result_id}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
+    if encoding is not None:
+        return await encoded_response(result, encoding)
+    return result
+
+
+@router.post("/simulate/batch", response_model=SimulationBatchResultDto)
+async def simulate_batch(batch: SimulationBatchDto):
+    """
+    Run many parameter sets in one call.
+    Identical entries are simulated once; physics, curve and segment caches are
+    shared across the batch. Per-item failures are reported without failing the batch.
+    """
+    unique, index_map = dedupe_params(batch.items)
+    futures = [_submit_admitted(params, batch.priority) for params in unique]
+
+    if batch.stream:
+        return StreamingResponse(_stream_batch(futures, index_map), media_type="application/x-ndjson")
+
+    outcomes = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures), return_exceptions=True)
+    return {
+        "total": len(batch.items),
+        "unique": len(unique),
+        "results": [_batch_item(i, outcomes[u]) for i, u in enumerate(index_map)],
+    }
+
+
+@router.post("/sweep", response_model=SweepResultDto)
+async def parameter_sweep(request: SweepRequestDto):
+    """
+    Grid / Latin hypercube / random study over simulation parameters.
+    Returns summary metrics per point; with a sweep_id, completed points are
+    checkpointed to disk and a repeated request resumes the study (lhs/random
+    without a seed get one generated and stored with the checkpoint). A second
+    request for a sweep_id that is still running gets 409.
+    """
+    base = request.base.model_dump(exclude_none=True, exclude={"priority"})
+    parameters = {name: spec.model_dump() for name, spec in request.parameters.items()}
+
+    try:
+        total = count_points(parameters, request.strategy, request.samples)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if total > SWEEP_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Sweep too large: {total} points (max {SWEEP_MAX_POINTS})")
+
+    checkpoint_path = None
+    if request.sweep_id:
+        os.makedirs(SWEEP_CHECKPOINT_DIR, exist_ok=True)
+        checkpoint_path = os.path.join(SWEEP_CHECKPOINT_DIR, f"{request.sweep_id}.jsonl")
+
+    def submit(values):
+        return simulation_scheduler.submit(
+            evaluate_point, simulation_service, base, values, request.include_trajectories,
+            checkpoint=simulation_scheduler.checkpoint, priority=PRIORITY_BULK
+        )
+
+    try:
+        result = await asyncio.to_thread(
+            run_sweep, base, parameters,
+            strategy=request.strategy, samples=request.samples, seed=request.seed,
+            checkpoint_path=checkpoint_path, submit=submit, service=simulation_service,
+            max_in_flight=simulation_scheduler.workers * 4,
+            include_trajectories=request.include_trajectories
+        )
+    except SweepLockedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result["sweep_id"] = request.sweep_id
+    return result
+
+
+@router.post("/optimize", response_model=OptimizeResultDto)
+async def optimize_parameter(request: OptimizeRequestDto, x_priority: Optional[str] = Header(None)):
+    """
+    Inverse design: smallest max_speed / initial_accel / loss_factor whose round
+    trip meets target_total_time, found by bisection over schedule-only runs.
+    """
+    priority = request.base.priority or x_priority or PRIORITY_INTERACTIVE
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority class: {priority}")
+
+    base = request.base.model_dump(exclude_none=True, exclude={"priority"})
+    try:
+        return await simulation_scheduler.run(
+            find_minimum_parameter, simulation_service, base, request.parameter,
+            request.target_total_time, lower=request.lower, upper=request.upper,
+            tolerance=request.tolerance, max_iterations=request.max_iterations,
+            checkpoint=simulation_scheduler.checkpoint, priority=priority
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/fleet", response_model=FleetResultDto, response_model_by_alias=True)
+async def simulate_fleet_headway(request: FleetRequestDto, x_priority: Optional[str] = Header(None)):
+    """
+    Many trains dispatched at a headway on the same line.
+    Identical trains reuse one simulated round trip shifted in time; the fleet
+    state is evaluated on a common time grid to report occupancy and separation.
+    Runs in the bulk class unless a priority is given; the time grid and the
+    distinct runs go through the per-request memory limit (413).
+    """
+    priority = request.base.priority or x_priority or PRIORITY_BULK
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority class: {priority}")
+
+    try:
+        departures = resolve_departures(request)
+        base_payload = request.base.model_dump(exclude={"priority"})
+        variants = [
+            SimulationParamsDto(**{**base_payload, **variant.model_dump(exclude_unset=True)})
+            for variant in request.variants
+        ]
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        base, variants, _ = admit_fleet(simulation_service, request.base, variants, request.train_variants,
+                                        departures, request.sample_interval, MAX_REQUEST_BYTES, MEMORY_POLICY)
+    except MemoryLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        return await simulation_scheduler.run(
+            simulate_fleet, simulation_service, base, departures,
+            variants=variants, train_variants=request.train_variants,
+            sample_interval=request.sample_interval, priority=priority
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/timetable", response_model=TimetableResultDto)
+async def generate_timetable(request: TimetableRequestDto, x_priority: Optional[str] = Header(None)):
+    """
+    Full-day timetable for a round trip repeated at every departure.
+    The round trip is computed once (schedule-only) and the table is the outer
+    sum of departure times and stop offsets. Dense trajectories are available
+    per departure from /timetable/{timetable_id}/trajectory/{index}.
+    """
+    priority = request.base.priority or x_priority or PRIORITY_INTERACTIVE
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority class: {priority}")
+
+    try:
+        departures = resolve_departures(request)
+        timetable = await simulation_scheduler.run(
+            build_timetable, simulation_service, request.base, departures, priority=priority
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    timetable_id = uuid.uuid4().hex
+    timetable_store.put(timetable_id, {"params": request.base, "departures": departures})
+    return {"timetable_id": timetable_id, **timetable}
+
+
+@router.get("/timetable/{timetable_id}/trajectory/{index}", response_model=SimulationResultDto)
+async def timetable_trajectory(timetable_id: str, index: int, x_priority: Optional[str] = Header(None)):
+    """Dense trajectory of one departure, generated on demand from the cached round trip."""
+    record = timetable_store.get(timetable_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown timetable id: {timetable_id}")
+    if not 0 <= index < len(record["departures"]):
+        raise HTTPException(status_code=404, detail=f"Departure index out of range: {index}")
+
+    priority = x_priority or PRIORITY_INTERACTIVE
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority class: {priority}")
+
+    return await simulation_scheduler.run(
+        departure_trajectory, simulation_service, record["params"],
+        record["departures"][index], priority=priority
+    )
+
+
+@router.post("/conflicts", response_model=ConflictResultDto, response_model_by_alias=True)
+async def find_conflicts(request: ConflictRequestDto, x_priority: Optional[str] = Header(None)):
+    """
+    Headway violations and overlapping station/block occupancy across many runs.
+    Runs come from explicit schedules or from a stored /timetable; intervals are
+    sorted per location and swept once (O(n log n)).
+    """
+    priority = x_priority or PRIORITY_INTERACTIVE
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority class: {priority}")
+
+    if (request.runs is None) == (request.timetable_id is None):
+        raise HTTPException(status_code=400, detail="Provide either runs or timetable_id")
+
+    if request.timetable_id is not None:
+        record = timetable_store.get(request.timetable_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Unknown timetable id: {request.timetable_id}")
+        runs = await simulation_scheduler.run(
+            timetable_runs, simulation_service, record["params"], record["departures"], priority=priority
+        )
+    else:
+        runs = [run.model_dump(exclude_none=True) for run in request.runs]
+
+    return await simulation_scheduler.run(
+        detect_conflicts, runs, min_headway=request.min_headway,
+        max_conflicts=request.max_conflicts, priority=priority
+    )
+
+
+@router.post("/simulate/stochastic", response_model=StochasticResultDto)
+async def simulate_stochastic(request: StochasticRequestDto, x_priority: Optional[str] = Header(None)):
+    """
+    Monte Carlo round-trip time distribution under dwell and performance variability.
+    Each distinct (quantized) physics sample is integrated once; dwell samples
+    only shift the timeline, so results aggregate to percentiles cheaply.
+    Runs in the bulk class unless a priority is given; requests sampling more
+    than SIM_STOCHASTIC_MAX_PHYSICS distinct physics are rejected (400).
+    """
+    priority = request.base.priority or x_priority or PRIORITY_BULK
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority class: {priority}")
+    if any(not 0 <= p <= 100 for p in request.percentiles):
+        raise HTTPException(status_code=400, detail="Percentiles must be within [0, 100]")
+
+    try:
+        return await simulation_scheduler.run(
+            simulation_service.run_stochastic, request.base,
+            samples=request.samples, seed=request.seed,
+            dwell_time=request.dwell_time, station_dwell=request.station_dwell,
+            initial_accel=request.initial_accel, max_speed=request.max_speed,
+            percentiles=request.percentiles, max_physics=STOCHASTIC_MAX_PHYSICS,
+            checkpoint=simulation_scheduler.checkpoint, priority=priority
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/profiles", response_model=List[ProfileReportDto])
+async def list_profiles():
+    """Rolling-stock profiles loaded at startup with their warm-up report (build time, memory, accuracy)."""
+    return profile_registry.warmup_report()
+
+
+@router.post("/profiles/{name}/schedule", response_model=ProfileScheduleResultDto)
+async def schedule_profile(name: str, request: ProfileScheduleRequestDto):
+    """
+    Schedule-only round trip for a registered profile.
+    Segment times are interpolated from the profile's precomputed table; no integration runs.
+    """
+    try:
+        profile = profile_registry.get(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown profile: {name}")
+
+    try:
+        return profile_schedule(simulation_service, profile, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,127 @@
+"""
+App Module
+Fábrica do app FastAPI (main.py e main.production.py) com warm-up e tempo de startup
+
+O startup é medido em três fases: importações (deste módulo em diante, o que
+inclui FastAPI, numpy e o engine), montagem do app e warm-up. O relatório fica
+em GET /startup, no gauge sim_startup_seconds e no log.
+"""
+
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from . import api
+from .metrics import registry
+from .warmup import warm_up
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+VERSION = "1.0.0"
+PRODUCTION_ORIGINS = [
+    "https://*.vercel.app",
+    "https://*.railway.app",
+    "https://*.render.com",
+    "http://localhost:4200",  # Local development
+    "http://localhost:3000",  # Local development
+]
+
+STARTUP_SECONDS = registry.gauge("sim_startup_seconds", "Duração das fases do startup", ("phase",))
+
+logger = logging.getLogger(__name__)
+
+
+def create_app(production: bool = False, workers: Optional[int] = None,
+               process_workers: Optional[int] = None, warmup: Optional[bool] = None) -> FastAPI:
+    """
+    Monta o app com as rotas de engine.api
+
+    Args:
+        production: CORS restrito (PRODUCTION_ORIGINS + ALLOWED_ORIGINS) em vez de "*"
+        workers: Threads do scheduler (padrão SIM_WORKERS)
+        process_workers: Processos do pool de simulação, 0 desliga (padrão SIM_PROCESS_WORKERS)
+        warmup: Simulações de aquecimento no startup (padrão SIM_WARMUP=1); os
+            perfis de SIM_PROFILES são construídos de qualquer forma
+    """
+    started = time.perf_counter()
+    # Configuração de logging é do app, não dos módulos do engine
+    logging.basicConfig(level=os.getenv("SIM_LOG_LEVEL", "INFO").upper())
+
+    if workers is None:
+        workers = int(os.getenv("SIM_WORKERS", "2"))
+    if process_workers is None:
+        process_workers = int(os.getenv("SIM_PROCESS_WORKERS", "0"))
+    if warmup is None:
+        warmup = os.getenv("SIM_WARMUP", "1") == "1"
+    api.configure(workers=workers, process_workers=process_workers)
+
+    startup = {"ready": False, "imports_s": IMPORT_SECONDS, "app_s": None, "warmup_s": None,
+               "total_s": None, "warmup": None}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Antes de aceitar conexões: a primeira requisição já encontra tudo quente
+        warmup_started = time.perf_counter()
+        startup["warmup"] = await asyncio.to_thread(
+            warm_up, api.simulation_service, api.profile_registry, api.PROFILES_PATH,
+            process_pool=api.process_pool, simulations=warmup
+        )
+        startup["warmup_s"] = time.perf_counter() - warmup_started
+        startup["total_s"] = startup["imports_s"] + startup["app_s"] + startup["warmup_s"]
+        startup["ready"] = True
+        for phase in ("imports", "app", "warmup", "total"):
+            STARTUP_SECONDS.set(startup[f"{phase}_s"], phase=phase)
+        logger.info("Startup em %.3fs (importações %.3fs, app %.3fs, warm-up %.3fs)",
+                    startup["total_s"], startup["imports_s"], startup["app_s"], startup["warmup_s"])
+        yield
+
+    app = FastAPI(
+        title="Physics Simulation Engine",
+        description="Microserviço para simulação física usando Runge-Kutta",
+        version=VERSION,
+        lifespan=lifespan,
+    )
+    app.state.startup = startup
+    api.instrument_app(app)
+
+    if production:
+        allowed_origins = list(PRODUCTION_ORIGINS)
+        if custom_origins := os.getenv("ALLOWED_ORIGINS"):
+            allowed_origins.extend(custom_origins.split(","))
+        app.add_middleware(CORSMiddleware, allow_origins=allowed_origins, allow_credentials=True,
+                           allow_methods=["GET", "POST", "OPTIONS"], allow_headers=["*"])
+    else:
+        app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
+                           allow_methods=["*"], allow_headers=["*"])
+
+    app.include_router(api.router)
+
+    @app.get("/health")
+    async def health_check():
+        """Health check with system info for production monitoring"""
+        return {
+            "status": "healthy",
+            "service": "sim-engine",
+            "version": VERSION,
+            "ready": startup["ready"],
+            "timestamp": time.time(),
+            "environment": os.getenv("NODE_ENV", "development"),
+            "port": os.getenv("PORT", "8000"),
+        }
+
+    @app.get("/startup")
+    async def startup_report():
+        """Startup phase durations (imports, app construction, warm-up) and the warm-up steps"""
+        return startup
+
+    startup["app_s"] = time.perf_counter() - started
+    return app
@@ -0,0 +1,182 @@
+"""
+Capture Module
+Captura opcional de requisições /simulate reais para replay e benchmark
+
+Cada requisição amostrada vira uma linha JSONL com os parâmetros sanitizados
+(nomes de estação anonimizados, campos desconhecidos descartados), o status, a
+duração e um resumo do resultado (chegadas, duração total, pontos) usado pelo
+replay para detectar divergências sem guardar a trajetória inteira.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import ValidationError
+
+from .encoding import COMPACT_BINARY, COMPACT_JSON, decode_result
+from .schemas import SimulationParamsDto
+from .tracing import REQUEST_ID_HEADER, TraceWriter
+
+CAPTURE_PATHS = ("/simulate",)
+# Corpos maiores não são capturados (nem bufferizados além disso)
+MAX_CAPTURE_BODY_BYTES = 1024 * 1024
+
+
+def sanitize_params(body: bytes) -> Optional[Dict[str, Any]]:
+    """Parâmetros válidos da requisição, sem nomes de estação; None se inválidos"""
+    try:
+        params = SimulationParamsDto.model_validate_json(body)
+    except ValidationError:
+        return None
+    payload = params.model_dump(mode="json", exclude_none=True)
+    payload["stations"] = [{"name": f"S{i}", "km": station["km"]}
+                           for i, station in enumerate(payload["stations"])]
+    return payload
+
+
+def summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Resumo comparável de um resultado de simulação (dict do serviço, JSON da resposta ou decodificado)"""
+    time_values = result.get("time", [])
+    velocity = result.get("velocity", [])
+    schedule = result.get("schedule") or []
+    return {
+        "points": len(time_values),
+        "end_time": float(time_values[-1]) if len(time_values) else 0.0,
+        "max_velocity": float(max(velocity)) if len(velocity) else 0.0,
+        "arrivals": [float(entry["arrival_time"]) for entry in schedule],
+        "departures": [float(entry["departure_time"]) for entry in schedule],
+    }
+
+
+def compare_outcomes(captured: Dict[str, Any], current: Dict[str, Any],
+                     tolerance: float) -> List[str]:
+    """
+    Divergências entre dois resumos
+
+    Tempos (chegadas, partidas, duração total) divergem acima de `tolerance`
+    segundos; a quantidade de paradas deve ser igual. A contagem de pontos não
+    entra: depende de output_interval/max_points e da decimação por memória.
+    """
+    divergences = []
+    if len(captured["arrivals"]) != len(current["arrivals"]):
+        divergences.append(f"stops: {len(captured['arrivals'])} -> {len(current['arrivals'])}")
+        return divergences
+    for key in ("arrivals", "departures"):
+        for index, (before, after) in enumerate(zip(captured[key], current[key])):
+            if abs(after - before) > tolerance:
+                divergences.append(f"{key}[{index}]: {before:.3f} -> {after:.3f}")
+    if abs(current["end_time"] - captured["end_time"]) > tolerance:
+        divergences.append(f"end_time: {captured['end_time']:.3f} -> {current['end_time']:.3f}")
+    return divergences
+
+
+class CaptureWriter(TraceWriter):
+    """Arquivo JSONL rotativo (uma requisição por linha), com a rotação do TraceWriter"""
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        payload = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        with self._lock:
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(payload) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "a") as f:
+                f.write(payload)
+
+
+def read_capture(path: str, include_rotated: bool = True) -> List[Dict[str, Any]]:
+    """Registros de um arquivo de captura (e dos rotacionados path.N, do mais antigo ao mais novo)"""
+    paths = [path]
+    if include_rotated:
+        index = 1
+        while os.path.exists(f"{path}.{index}"):
+            paths.insert(0, f"{path}.{index}")
+            index += 1
+    records = []
+    for name in paths:
+        with open(name) as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+class CaptureMiddleware:
+    """
+    Middleware ASGI: grava requisições POST em CAPTURE_PATHS com o resumo da resposta
+
+    A sanitização, o resumo e a escrita acontecem depois que a resposta foi
+    enviada, em uma thread, fora da latência vista pelo cliente.
+    """
+
+    def __init__(self, app, writer: Optional[CaptureWriter] = None, sample_rate: float = 0.0,
+                 paths: Iterable[str] = CAPTURE_PATHS):
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        sampled = (scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in self.paths
+                   and self.writer is not None and self.sample_rate > 0
+                   and random.random() < self.sample_rate)
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        request_body = bytearray()
+        response_body = bytearray()
+        state = {"status": None, "content_type": "", "finished": None, "truncated": False}
+
+        async def receive_and_copy():
+            message = await receive()
+            if message["type"] == "http.request" and not state["truncated"]:
+                request_body.extend(message.get("body", b""))
+                if len(request_body) > MAX_CAPTURE_BODY_BYTES:
+                    state["truncated"] = True
+                    request_body.clear()
+            return message
+
+        async def send_and_copy(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["content_type"] = dict(message.get("headers", ())).get(b"content-type", b"").decode()
+            elif message["type"] == "http.response.body":
+                if state["status"] == 200:
+                    response_body.extend(message.get("body", b""))
+                if not message.get("more_body", False):
+                    state["finished"] = time.perf_counter()
+            await send(message)
+
+        started = time.perf_counter()
+        await self.app(scope, receive_and_copy, send_and_copy)
+        if state["truncated"] or state["status"] is None:
+            return
+
+        headers = dict(scope.get("headers", ()))
+        record = {
+            "ts": time.time(),
+            "request_id": headers.get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1") or None,
+            "path": scope["path"],
+            "priority": headers.get(b"x-priority", b"").decode("latin-1") or None,
+            "status": state["status"],
+            "duration_ms": ((state["finished"] or time.perf_counter()) - started) * 1000,
+        }
+        await asyncio.to_thread(self._write, record, bytes(request_body), bytes(response_body),
+                                state["content_type"])
+
+    def _write(self, record: Dict[str, Any], request_body: bytes, response_body: bytes,
+               content_type: str) -> None:
+        params = sanitize_params(request_body)
+        if params is None:
+            return
+        record["params"] = params
+        record["outcome"] = None
+        if response_body:
+            # Respostas na codificação compacta (header Accept) são decodificadas antes do resumo
+            compact = content_type.split(";")[0].strip() in (COMPACT_JSON, COMPACT_BINARY)
+            result = decode_result(response_body) if compact else json.loads(response_body)
+            record["outcome"] = summarize_result(result)
+        self.writer.write([record])
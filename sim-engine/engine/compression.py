@@ -0,0 +1,248 @@
+"""
+Compression Module
+Compressão negociada das respostas (zstd, brotli, gzip) com nível por tamanho do payload
+
+O codec sai do Accept-Encoding do cliente na ordem de preferência do servidor;
+brotli e zstd são opcionais (pacotes brotli e zstandard) e só são oferecidos se
+instalados. Respostas completas abaixo de minimum_size vão sem compressão; acima,
+o nível cai com o tamanho para limitar a CPU em resultados de vários MB (ver
+benchmarks/compression.py). Respostas em streaming (NDJSON do batch) são
+comprimidas por chunk, com flush a cada mensagem para não atrasar as linhas.
+"""
+
+import asyncio
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .metrics import registry
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional
+    zstandard = None
+
+DEFAULT_MINIMUM_SIZE = 1024
+# Preferência do servidor quando o cliente aceita vários
+DEFAULT_CODECS = ("zstd", "br", "gzip")
+
+# (tamanho máximo em bytes, nível): a primeira faixa que comporta o payload. No JSON
+# de floats, gzip 6 custa ~4x o nível 1 para ganhar <10% de razão; no compacto os
+# níveis altos ainda compensam, e ele é ~6x menor (python -m benchmarks.compression)
+LEVELS: Dict[str, Tuple[Tuple[float, int], ...]] = {
+    "gzip": ((64 * 1024, 6), (1024 * 1024, 4), (float("inf"), 1)),
+    "br": ((64 * 1024, 5), (1024 * 1024, 4), (float("inf"), 1)),
+    "zstd": ((64 * 1024, 6), (1024 * 1024, 3), (float("inf"), 1)),
+}
+# Tamanho desconhecido (streaming): nível das respostas grandes
+STREAMING_LEVEL = {"gzip": 4, "br": 4, "zstd": 3}
+# Acima disso a compressão do corpo único sai do event loop
+THREAD_THRESHOLD = 256 * 1024
+
+COMPRESSION_BYTES = registry.counter(
+    "sim_compression_bytes", "Bytes antes (input) e depois (output) da compressão", ("codec", "kind"))
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+_COMPRESSORS = {"gzip": _GzipCompressor, "br": _BrotliCompressor, "zstd": _ZstdCompressor}
+
+
+def available_codecs() -> List[str]:
+    """Codecs utilizáveis neste ambiente (gzip sempre)"""
+    return [codec for codec in DEFAULT_CODECS
+            if codec == "gzip" or (codec == "br" and brotli) or (codec == "zstd" and zstandard)]
+
+
+def compressor(codec: str, level: int):
+    """Compressor incremental: compress(chunk), flush() (sync) e finish()"""
+    if codec not in available_codecs():
+        raise ValueError(f"Codec indisponível: {codec}")
+    return _COMPRESSORS[codec](level)
+
+
+def compress(codec: str, data: bytes, level: Optional[int] = None) -> bytes:
+    """Comprime um payload completo (nível por tamanho se não informado)"""
+    engine = compressor(codec, level if level is not None else level_for(codec, len(data)))
+    return engine.compress(data) + engine.finish()
+
+
+def level_for(codec: str, size: Optional[int]) -> int:
+    """Nível do codec para um payload de `size` bytes (None: streaming)"""
+    if size is None:
+        return STREAMING_LEVEL[codec]
+    return next(level for limit, level in LEVELS[codec] if size <= limit)
+
+
+def negotiate(accept_encoding: Optional[str], codecs: Sequence[str]) -> Optional[str]:
+    """
+    Primeiro codec de `codecs` aceito pelo cliente
+
+    Respeita q=0 (recusa explícita) e "*"; a ordem é a do servidor, não os
+    pesos q do cliente, que só distinguem aceito de recusado.
+    """
+    accepted: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        name, *parameters = [part.strip() for part in item.split(";")]
+        if not name:
+            continue
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.lower()] = quality
+
+    for codec in codecs:
+        quality = accepted[codec] if codec in accepted else accepted.get("*", 0.0)
+        if quality > 0:
+            return codec
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI: Content-Encoding negociado pelo Accept-Encoding
+
+    Respostas que já têm Content-Encoding passam intactas; as demais levam
+    Vary: Accept-Encoding mesmo sem compressão. Com corpo único,
+    o tamanho é conhecido e decide mínimo e nível; com more_body (streaming),
+    cada chunk é comprimido e descarregado assim que chega.
+    """
+
+    def __init__(self, app, minimum_size: int = DEFAULT_MINIMUM_SIZE,
+                 codecs: Optional[Sequence[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.codecs = [codec for codec in (codecs or DEFAULT_CODECS) if codec in available_codecs()]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.codecs:
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = None
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        codec = negotiate(accept_encoding, self.codecs)
+        if codec is None:
+            async def send_identity(message):
+                if message["type"] == "http.response.start":
+                    message = self._vary(message)
+                await send(message)
+
+            await self.app(scope, receive, send_identity)
+            return
+
+        state = {"start": None, "engine": None, "passthrough": False}
+
+        async def send_compressed(message):
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", ()))
+                state["passthrough"] = b"content-encoding" in headers
+                state["start"] = message
+                if state["passthrough"]:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            engine = state["engine"]
+
+            if engine is None and not more_body:
+                # Corpo único: tamanho conhecido
+                if len(body) < self.minimum_size:
+                    await send(self._vary(state["start"]))
+                    await send(message)
+                    return
+                if len(body) > THREAD_THRESHOLD:
+                    compressed = await asyncio.to_thread(compress, codec, body)
+                else:
+                    compressed = compress(codec, body)
+                self._count(codec, len(body), len(compressed))
+                await send(self._start(state["start"], codec, len(compressed)))
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            if engine is None:
+                engine = state["engine"] = compressor(codec, level_for(codec, None))
+                await send(self._start(state["start"], codec, None))
+            chunk = engine.compress(body) + (engine.flush() if more_body else engine.finish())
+            self._count(codec, len(body), len(chunk))
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    @classmethod
+    def _start(cls, message, codec: str, length: Optional[int]):
+        headers = [(name, value) for name, value in message.get("headers", ()) if name != b"content-length"]
+        headers.append((b"content-encoding", codec.encode()))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return cls._vary({**message, "headers": headers})
+
+    @staticmethod
+    def _vary(message):
+        """Acrescenta Accept-Encoding ao Vary: a resposta depende da negociação, comprimida ou não"""
+        headers = [(name, value) for name, value in message.get("headers", ()) if name != b"vary"]
+        vary = [value for name, value in message.get("headers", ()) if name == b"vary"]
+        if not any(b"accept-encoding" in value.lower() for value in vary):
+            vary.append(b"Accept-Encoding")
+        headers.append((b"vary", b", ".join(vary)))
+        return {**message, "headers": headers}
+
+    @staticmethod
+    def _count(codec: str, raw: int, encoded: int) -> None:
+        COMPRESSION_BYTES.inc(raw, codec=codec, kind="input")
+        COMPRESSION_BYTES.inc(encoded, codec=codec, kind="output")
@@ -0,0 +1,170 @@
+"""
+Conflicts Module
+Detecção de conflitos de headway e de ocupação entre muitas viagens
+
+Cada entrada de `schedule` (como produzida por _simulate_direction) gera um
+intervalo de ocupação de plataforma [chegada, partida] e, a partir da parada
+anterior, um intervalo de ocupação de bloco [partida anterior, chegada].
+Os intervalos são ordenados por local e início; sobreposições e headways
+abaixo do mínimo saem de uma varredura vetorizada em O(n log n).
+"""
+
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+CONFLICT_OVERLAP = "overlap"
+CONFLICT_HEADWAY = "headway"
+
+
+def build_intervals(runs: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Achata os cronogramas das viagens em arrays de intervalos
+
+    Args:
+        runs: Viagens com `schedule` e, opcionalmente, `offset` (s somados aos
+            horários), `origin` (estação de partida no tempo `offset`) e `id`
+
+    Returns:
+        locations (descrição de cada local) e arrays location, start, end, run
+    """
+    location_ids: Dict[tuple, int] = {}
+    location, start, end, run_index = [], [], [], []
+
+    def add(key: tuple, interval_start: float, interval_end: float, r: int) -> None:
+        location.append(location_ids.setdefault(key, len(location_ids)))
+        start.append(interval_start)
+        end.append(interval_end)
+        run_index.append(r)
+
+    for r, run in enumerate(runs):
+        offset = float(run.get("offset") or 0.0)
+        previous_station = run.get("origin")
+        previous_departure = offset
+
+        for entry in run["schedule"]:
+            arrival = entry["arrival_time"] + offset
+            departure = entry["departure_time"] + offset
+            if previous_station is not None:
+                add(("block", previous_station, entry["station"]), previous_departure, arrival, r)
+            # Plataforma identificada pela estação e pelo sentido de chegada
+            add(("station", entry["station"], previous_station), arrival, departure, r)
+            previous_station = entry["station"]
+            previous_departure = departure
+
+    locations = [None] * len(location_ids)
+    for (kind, a, b), i in location_ids.items():
+        if kind == "block":
+            locations[i] = {"kind": kind, "from": a, "to": b}
+        else:
+            locations[i] = {"kind": kind, "station": a, "from": b}
+
+    return {
+        "locations": locations,
+        "location": np.array(location, dtype=np.int64),
+        "start": np.array(start, dtype=float),
+        "end": np.array(end, dtype=float),
+        "run": np.array(run_index, dtype=np.int64),
+    }
+
+
+def detect_conflicts(runs: Sequence[Dict[str, Any]], min_headway: float = 0.0,
+                     max_conflicts: Optional[int] = 1000) -> Dict[str, Any]:
+    """
+    Sobreposições de ocupação e violações de headway entre viagens
+
+    Args:
+        runs: Ver build_intervals
+        min_headway: Intervalo mínimo (s) entre chegadas consecutivas à mesma plataforma
+        max_conflicts: Máximo de conflitos listados (as contagens são sempre totais)
+
+    Returns:
+        Contagens, lista de conflitos, estatísticas por local e tempo de cálculo.
+        Uma sobreposição é contada por intervalo que começa antes do fim de uma
+        ocupação anterior no mesmo local (par com a ocupação de maior fim).
+    """
+    started = time.perf_counter()
+    intervals = build_intervals(runs)
+    locations = intervals["locations"]
+    n = len(intervals["start"])
+
+    result = {
+        "runs": len(runs),
+        "intervals": n,
+        "conflict_counts": {CONFLICT_OVERLAP: 0, CONFLICT_HEADWAY: 0},
+        "conflicts": [],
+        "locations": [],
+        "truncated": False,
+    }
+    if n == 0:
+        result["compute_time_s"] = time.perf_counter() - started
+        return result
+
+    order = np.lexsort((intervals["start"], intervals["location"]))
+    location = intervals["location"][order]
+    start = intervals["start"][order]
+    end = intervals["end"][order]
+    run = intervals["run"][order]
+
+    # Cada local em uma faixa disjunta do eixo: uma única varredura cobre todos
+    origin = start.min()
+    span = max(end.max(), start.max()) - origin + 1.0
+    shifted_start = start - origin + location * span
+    shifted_end = end - origin + location * span
+
+    # Sobreposição: início antes do maior fim já visto no mesmo local
+    running_end = np.maximum.accumulate(shifted_end)
+    holder = np.maximum.accumulate(np.where(shifted_end == running_end, np.arange(n), 0))
+    overlap = np.flatnonzero(shifted_start[1:] < running_end[:-1]) + 1
+    overlap_partner = holder[overlap - 1]
+
+    # Headway: chegadas consecutivas à mesma plataforma
+    same_location = location[1:] == location[:-1]
+    is_station = np.array([loc["kind"] == "station" for loc in locations])[location[1:]]
+    gaps = np.where(same_location & is_station, start[1:] - start[:-1], np.inf)
+    headway = np.flatnonzero(gaps < min_headway) + 1 if min_headway > 0 else np.array([], dtype=np.int64)
+
+    result["conflict_counts"] = {CONFLICT_OVERLAP: len(overlap), CONFLICT_HEADWAY: len(headway)}
+
+    def run_id(r: int) -> Any:
+        return runs[r].get("id", int(r))
+
+    conflicts = []
+    limit = len(overlap) + len(headway) if max_conflicts is None else max_conflicts
+    for i, j in zip(overlap[:limit], overlap_partner[:limit]):
+        conflicts.append({
+            "type": CONFLICT_OVERLAP,
+            "location": locations[location[i]],
+            "runs": [run_id(run[j]), run_id(run[i])],
+            "start": float(start[i]),
+            "end": float(min(end[i], end[j])),
+        })
+    for i in headway[:max(limit - len(conflicts), 0)]:
+        conflicts.append({
+            "type": CONFLICT_HEADWAY,
+            "location": locations[location[i]],
+            "runs": [run_id(run[i - 1]), run_id(run[i])],
+            "start": float(start[i - 1]),
+            "end": float(start[i]),
+        })
+    result["conflicts"] = conflicts
+    result["truncated"] = len(conflicts) < len(overlap) + len(headway)
+
+    # Estatísticas por local (grupos contíguos após a ordenação)
+    group_starts = np.flatnonzero(np.r_[True, location[1:] != location[:-1]])
+    counts = np.diff(np.r_[group_starts, n])
+    location_overlaps = np.bincount(location[overlap], minlength=len(locations))
+    padded_gaps = np.r_[np.inf, gaps]
+    for first, count in zip(group_starts, counts):
+        loc = location[first]
+        min_gap = padded_gaps[first + 1:first + count].min() if count > 1 else np.inf
+        result["locations"].append({
+            **locations[loc],
+            "occupancies": int(count),
+            "overlaps": int(location_overlaps[loc]),
+            "min_headway": float(min_gap) if np.isfinite(min_gap) else None,
+        })
+
+    result["compute_time_s"] = time.perf_counter() - started
+    return result
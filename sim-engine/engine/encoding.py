@@ -0,0 +1,261 @@
+"""
+Encoding Module
+Codificação compacta do resultado: eixo de tempo em trechos uniformes e colunas em deltas quantizados
+
+Entre eventos, o tempo é t0 + k*dt; cada trecho uniforme vira (start, step, count)
+e pontos isolados (âncoras de chegada, partidas após o dwell) viram trechos de
+um ponto. Posição e velocidade são quantizadas em ponto fixo (inteiros de
+`precision`) e enviadas como primeiro valor + diferenças, que são inteiros
+pequenos em trajetórias suaves. O erro de decodificação é no máximo precision/2
+nas colunas e TIME_TOLERANCE no tempo.
+
+Dois formatos com a mesma estrutura:
+    JSON     colunas como arrays de inteiros (COMPACT_JSON)
+    binário  "SIMC" + versão + cabeçalho JSON + deltas como inteiros little-endian
+             do menor tipo que cabe (COMPACT_BINARY)
+decode_result é o decodificador de referência dos dois. result_json escreve a
+resposta padrão (JSON de floats) direto das colunas, listas ou arrays NumPy.
+"""
+
+import json
+import struct
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+COMPACT_JSON = "application/vnd.sim-engine.compact+json"
+COMPACT_BINARY = "application/vnd.sim-engine.compact"
+ENCODING_NAME = "compact-v1"
+
+DEFAULT_PRECISION = {"position": 1e-3, "velocity": 1e-3}  # mm e mm/s
+TIME_TOLERANCE = 1e-6
+QUANTIZED_COLUMNS = ("position", "velocity")
+
+BINARY_MAGIC = b"SIMC"
+BINARY_VERSION = 1
+_BINARY_PREFIX = struct.Struct("<4sBI")
+_DELTA_DTYPES = ("<i1", "<i2", "<i4", "<i8")
+
+
+def encode_time(time_values: np.ndarray, tolerance: float = TIME_TOLERANCE) -> Dict[str, list]:
+    """
+    Trechos uniformes do eixo de tempo
+
+    Um trecho vai até o próximo ponto onde o passo muda mais que `tolerance`;
+    usa o passo médio e só é aceito se reconstrói todos os seus pontos dentro
+    da tolerância (senão fica só o prefixo que o primeiro passo reconstrói).
+
+    Returns:
+        {"start": [...], "step": [...], "count": [...]} com sum(count) == len(time)
+    """
+    runs = {"start": [], "step": [], "count": []}
+    n = len(time_values)
+    steps = np.diff(time_values)
+    # Índices de `steps` onde o passo difere do anterior
+    breaks = np.flatnonzero(np.abs(np.diff(steps)) > tolerance) + 1
+
+    start = 0
+    while start < n:
+        stop = n
+        next_break = np.searchsorted(breaks, start + 1)
+        if next_break < len(breaks):
+            stop = int(breaks[next_break]) + 1
+        stop, step = _uniform_run(time_values, start, stop, tolerance)
+        runs["start"].append(float(time_values[start]))
+        runs["step"].append(step)
+        runs["count"].append(stop - start)
+        start = stop
+    return runs
+
+
+def _uniform_run(values: np.ndarray, start: int, stop: int, tolerance: float) -> Tuple[int, float]:
+    """(fim, passo) do trecho uniforme que começa em `start`, limitado a `stop`"""
+    count = stop - start
+    if count == 1:
+        return stop, 0.0
+    chunk = values[start:stop]
+    step = (chunk[-1] - chunk[0]) / (count - 1)
+    if np.abs(chunk[0] + np.arange(count) * step - chunk).max() <= tolerance:
+        return stop, float(step)
+    step = chunk[1] - chunk[0]
+    outside = np.abs(chunk[0] + np.arange(count) * step - chunk) > tolerance
+    return start + int(np.argmax(outside)), float(step)
+
+
+def decode_time(runs: Dict[str, list]) -> np.ndarray:
+    if not runs["count"]:
+        return np.empty(0)
+    return np.concatenate([start + np.arange(count) * step
+                           for start, step, count in zip(runs["start"], runs["step"], runs["count"])])
+
+
+def quantize_deltas(values: np.ndarray, precision: float) -> Tuple[int, np.ndarray]:
+    """(primeiro valor quantizado, diferenças) em inteiros de `precision`"""
+    quantized = np.rint(np.asarray(values, dtype=np.float64) / precision).astype(np.int64)
+    if len(quantized) == 0:
+        return 0, quantized
+    return int(quantized[0]), np.diff(quantized)
+
+
+def dequantize_deltas(first: int, deltas: np.ndarray, precision: float, count: int) -> np.ndarray:
+    if count == 0:
+        return np.empty(0)
+    quantized = np.concatenate(([first], np.asarray(deltas, dtype=np.int64))).cumsum()
+    return quantized * precision
+
+
+def _precision(precision: Optional[Dict[str, float]]) -> Dict[str, float]:
+    merged = {**DEFAULT_PRECISION, **(precision or {})}
+    for name, value in merged.items():
+        if name not in QUANTIZED_COLUMNS:
+            raise ValueError(f"Coluna sem quantização: {name}")
+        if not value > 0:
+            raise ValueError(f"Precisão de {name} deve ser > 0")
+    return merged
+
+
+def _fields(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Demais chaves do resultado (cronograma, ids, relatórios), já serializáveis em JSON"""
+    fields = {key: value for key, value in result.items() if key not in ("time", *QUANTIZED_COLUMNS)}
+    return json.loads(json.dumps(fields, default=_json_default))
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def result_json(result: Dict[str, Any], model=None) -> bytes:
+    """
+    Resposta JSON padrão escrita direto das colunas (listas ou arrays NumPy)
+
+    Com orjson instalado os arrays são serializados sem lista intermediária;
+    sem ele, uma coluna por vez vira lista. `model` (p.ex. SimulationResultDto)
+    valida e dá a forma das demais chaves, como o response_model faria.
+    """
+    columns = {name: result[name] for name in ("time", *QUANTIZED_COLUMNS)}
+    fields = {key: value for key, value in result.items() if key not in columns}
+    if model is not None:
+        shaped = model.model_validate({**fields, **{name: [] for name in columns}}).model_dump(mode="json")
+        payload = {key: columns.get(key, value) for key, value in shaped.items()}
+    else:
+        payload = {**columns, **fields}
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+
+
+def encode_result(result: Dict[str, Any], precision: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Resultado de simulação -> estrutura compacta (arrays de inteiros, pronta para JSON)"""
+    precision = _precision(precision)
+    time_values = np.asarray(result["time"], dtype=np.float64)
+    encoded = {"encoding": ENCODING_NAME, "count": len(time_values), "time": encode_time(time_values)}
+    for name in QUANTIZED_COLUMNS:
+        first, deltas = quantize_deltas(result[name], precision[name])
+        encoded[name] = {"precision": precision[name], "first": first, "deltas": deltas.tolist()}
+    encoded.update(_fields(result))
+    return encoded
+
+
+def encode_result_binary(result: Dict[str, Any], precision: Optional[Dict[str, float]] = None) -> bytes:
+    """Mesma estrutura de encode_result; deltas como blocos binários após o cabeçalho JSON"""
+    precision = _precision(precision)
+    time_values = np.asarray(result["time"], dtype=np.float64)
+    header = {"encoding": ENCODING_NAME, "count": len(time_values), "time": encode_time(time_values)}
+    blobs = []
+    offset = 0
+    for name in QUANTIZED_COLUMNS:
+        first, deltas = quantize_deltas(result[name], precision[name])
+        dtype = _smallest_dtype(deltas)
+        blob = deltas.astype(dtype).tobytes()
+        header[name] = {"precision": precision[name], "first": first, "dtype": dtype,
+                        "offset": offset, "length": len(deltas)}
+        blobs.append(blob)
+        offset += len(blob)
+    header.update(_fields(result))
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    return _BINARY_PREFIX.pack(BINARY_MAGIC, BINARY_VERSION, len(header_bytes)) + header_bytes + b"".join(blobs)
+
+
+def _smallest_dtype(deltas: np.ndarray) -> str:
+    if len(deltas) == 0:
+        return _DELTA_DTYPES[0]
+    low, high = int(deltas.min()), int(deltas.max())
+    for dtype in _DELTA_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return _DELTA_DTYPES[-1]
+
+
+def decode_result(payload: Union[bytes, str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Decodificador de referência (JSON compacto já carregado, texto JSON ou binário)
+
+    Returns:
+        O resultado com time/position/velocity como arrays NumPy float64
+    """
+    if isinstance(payload, (bytes, bytearray, memoryview)) and bytes(payload[:4]) == BINARY_MAGIC:
+        return _decode_binary(bytes(payload))
+    if isinstance(payload, (bytes, bytearray, str)):
+        payload = json.loads(payload)
+    if payload.get("encoding") != ENCODING_NAME:
+        raise ValueError(f"Codificação desconhecida: {payload.get('encoding')}")
+
+    count = payload["count"]
+    result = {key: value for key, value in payload.items()
+              if key not in ("encoding", "count", "time", *QUANTIZED_COLUMNS)}
+    result["time"] = decode_time(payload["time"])
+    for name in QUANTIZED_COLUMNS:
+        column = payload[name]
+        result[name] = dequantize_deltas(column["first"], column["deltas"], column["precision"], count)
+    return result
+
+
+def _decode_binary(data: bytes) -> Dict[str, Any]:
+    magic, version, header_length = _BINARY_PREFIX.unpack_from(data)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Versão binária não suportada: {version}")
+    body = _BINARY_PREFIX.size + header_length
+    header = json.loads(data[_BINARY_PREFIX.size:body])
+    for name in QUANTIZED_COLUMNS:
+        column = header[name]
+        column["deltas"] = np.frombuffer(data, dtype=column["dtype"], count=column["length"],
+                                         offset=body + column["offset"])
+    return decode_result(header)
+
+
+def parse_accept(accept: Optional[str]) -> Optional[Tuple[str, Dict[str, float]]]:
+    """
+    Formato compacto pedido no header Accept, com precisões como parâmetros do media type
+
+    Ex.: "application/vnd.sim-engine.compact+json; position_precision=0.01"
+
+    Returns:
+        (media type, precisões) ou None para a resposta JSON padrão
+    """
+    for media_range in (accept or "").split(","):
+        media_type, *parameters = [part.strip() for part in media_range.split(";")]
+        if media_type.lower() not in (COMPACT_JSON, COMPACT_BINARY):
+            continue
+        precision = {}
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            name = name.strip().lower()
+            if name.endswith("_precision"):
+                try:
+                    precision[name[:-len("_precision")]] = float(value)
+                except ValueError:
+                    raise ValueError(f"Precisão inválida: {parameter}") from None
+        return media_type.lower(), _precision(precision)
+    return None
@@ -0,0 +1,196 @@
+"""
+Fleet Module
+Simulação de vários trens despachados em headway sobre a mesma linha
+
+Trens com a mesma física compartilham uma única simulação de ida e volta,
+deslocada no tempo para cada partida. Não há matriz trens x amostras: a
+ocupação (em serviço e por bloco) sai de eventos de entrada e saída contados
+na grade de tempo comum (nos blocos, partida e chegada do cronograma), e a separação entre trens consecutivos só é avaliada
+na janela em que os dois estão em serviço.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .service import SimulationService
+
+
+def departure_offsets(first_departure: float, headway: float,
+                      count: Optional[int] = None,
+                      last_departure: Optional[float] = None) -> np.ndarray:
+    """Horários de partida a cada `headway` segundos (por quantidade ou até last_departure)"""
+    if headway <= 0:
+        raise ValueError("headway deve ser > 0")
+    if count is not None:
+        return first_departure + headway * np.arange(count, dtype=float)
+    if last_departure is None:
+        raise ValueError("Informe count ou last_departure")
+    # Tolerância para incluir last_departure apesar de arredondamentos
+    count = int(np.floor((last_departure - first_departure) / headway + 1e-9)) + 1
+    return first_departure + headway * np.arange(max(count, 0), dtype=float)
+
+
+def path_coordinate(position: Sequence[float]) -> np.ndarray:
+    """Distância acumulada percorrida (monotônica: 0 → L na ida, L → 2L na volta)"""
+    position = np.asarray(position, dtype=float)
+    return np.concatenate(([0.0], np.cumsum(np.abs(np.diff(position)))))
+
+
+def _block_boundaries(service: SimulationService, params) -> Tuple[np.ndarray, List[Dict[str, str]]]:
+    """Posições das estações na coordenada de percurso e descrição de cada bloco"""
+    stations, return_stations, total_distance = service._prepare_stations(params)
+    origin = stations[0][1]
+
+    boundaries = [pos - origin for _, pos in stations]
+    boundaries += [total_distance + pos for _, pos in return_stations[1:]]
+
+    blocks = []
+    for direction, sequence in (("outbound", stations), ("return", return_stations)):
+        for start, end in zip(sequence, sequence[1:]):
+            blocks.append({"from": start[0], "to": end[0], "direction": direction})
+    return np.array(boundaries), blocks
+
+
+def stop_times(schedule: List[Dict[str, float]], terminal_layover: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Chegada e partida locais em cada parada da ida e volta, a partir da origem
+
+    Como em round_trip_stops, a partida do terminal inclui o layover: o trem
+    só entra no bloco seguinte quando deixa a plataforma.
+    """
+    arrivals = np.array([0.0] + [entry["arrival_time"] for entry in schedule])
+    departures = np.array([0.0] + [entry["departure_time"] for entry in schedule])
+    # Ida e volta têm o mesmo número de paradas: o terminal é a última da ida
+    departures[len(schedule) // 2] += terminal_layover
+    return arrivals, departures
+
+
+def count_active(grid: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Intervalos [start, end) ativos em cada instante da grade (contagem por eventos ordenados)"""
+    return (np.searchsorted(np.sort(starts), grid, side="right")
+            - np.searchsorted(np.sort(ends), grid, side="right"))
+
+
+def simulate_fleet(service: SimulationService, base_params, departures: Sequence[float],
+                   variants: Optional[List[Any]] = None,
+                   train_variants: Optional[Sequence[int]] = None,
+                   sample_interval: float = 10.0) -> Dict[str, Any]:
+    """
+    Simula uma frota em headway sobre a linha de base_params
+
+    Args:
+        base_params: Parâmetros da linha e da física padrão
+        departures: Horário de partida de cada trem (s)
+        variants: Parâmetros alternativos (mesma linha, outra física)
+        train_variants: Índice em variants por trem (-1 ou ausente = base_params)
+        sample_interval: Passo da grade de tempo comum (s)
+
+    Returns:
+        Resumo (trens em serviço, separação mínima), ocupação por bloco,
+        série temporal de trens em serviço e dados por trem
+    """
+    departures = np.asarray(departures, dtype=float)
+    n_trains = len(departures)
+    if n_trains == 0:
+        raise ValueError("Nenhuma partida informada")
+    if sample_interval <= 0:
+        raise ValueError("sample_interval deve ser > 0")
+
+    variants = list(variants or [])
+    if train_variants is None:
+        train_variants = np.full(n_trains, -1, dtype=int)
+    train_variants = np.asarray(train_variants, dtype=int)
+    if len(train_variants) != n_trains:
+        raise ValueError("train_variants deve ter um índice por trem")
+    if np.any(train_variants >= len(variants)):
+        raise ValueError("Índice de variante inexistente em train_variants")
+
+    # Uma simulação por física distinta, reutilizada por deslocamento no tempo
+    runs = {}
+    for variant in np.unique(train_variants):
+        params = base_params if variant < 0 else variants[variant]
+        result = service.run_simulation(params)
+        runs[int(variant)] = {
+            "time": np.asarray(result["time"], dtype=float),
+            "path": path_coordinate(result["position"]),
+            "stops": stop_times(result["schedule"], params.terminal_layover),
+        }
+
+    boundaries, blocks = _block_boundaries(service, base_params)
+    line_length = boundaries[len(base_params.stations) - 1]
+
+    durations = np.array([runs[int(v)]["time"][-1] for v in train_variants])
+    service_start = float(departures.min())
+    service_end = float((departures + durations).max())
+    grid = np.arange(service_start, service_end + sample_interval, sample_interval)
+
+    # Fim inclusivo (local_time <= duração) como intervalo semiaberto
+    ends = np.nextafter(departures + durations, np.inf)
+    in_service = count_active(grid, departures, ends)
+
+    # Separação entre trens consecutivos (ordem de partida) no mesmo sentido,
+    # só nas amostras em que ambos estão em serviço
+    order = np.argsort(departures, kind="stable")
+    min_separation = None
+    for pair in range(n_trains - 1):
+        leader, follower = int(order[pair]), int(order[pair + 1])
+        first = np.searchsorted(grid, max(departures[leader], departures[follower]), side="left")
+        last = np.searchsorted(grid, min(ends[leader], ends[follower]), side="left")
+        if first >= last:
+            continue
+        window = grid[first:last]
+        positions = []
+        for train in (leader, follower):
+            run = runs[int(train_variants[train])]
+            positions.append(np.interp(window - departures[train], run["time"], run["path"]))
+        same_direction = (positions[0] < line_length) == (positions[1] < line_length)
+        separation = np.where(same_direction, positions[0] - positions[1], np.nan)
+        if np.all(np.isnan(separation)):
+            continue
+        sample = int(np.nanargmin(separation))
+        if min_separation is None or separation[sample] < min_separation["distance_m"]:
+            min_separation = {
+                "distance_m": float(separation[sample]),
+                "leader": leader,
+                "follower": follower,
+                "time": float(window[sample]),
+            }
+
+    # Ocupação por bloco: da partida da estação de início à chegada na seguinte
+    # (dwells e layover ocupam a plataforma, não o bloco)
+    stop_arrivals = np.array([runs[int(v)]["stops"][0] for v in train_variants])
+    stop_departures = np.array([runs[int(v)]["stops"][1] for v in train_variants])
+    block_stats = []
+    for b, block in enumerate(blocks):
+        occupancy = count_active(grid, departures + stop_departures[:, b], departures + stop_arrivals[:, b + 1])
+        block_stats.append({
+            **block,
+            "max_trains": int(occupancy.max()),
+            "occupied_fraction": float((occupancy > 0).mean()),
+        })
+
+    return {
+        "summary": {
+            "trains": n_trains,
+            "distinct_runs": len(runs),
+            "service_start": service_start,
+            "service_end": service_end,
+            "max_trains_in_service": int(in_service.max()),
+            "min_separation": min_separation,
+        },
+        "blocks": block_stats,
+        "occupancy": {
+            "time": grid.tolist(),
+            "trains_in_service": in_service.tolist(),
+        },
+        "trains": [
+            {
+                "index": i,
+                "departure_time": float(departures[i]),
+                "variant": int(train_variants[i]),
+                "end_time": float(departures[i] + durations[i]),
+            }
+            for i in range(n_trains)
+        ],
+    }
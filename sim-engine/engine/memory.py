@@ -0,0 +1,206 @@
+"""
+Memory Module
+Estimativa de memória por requisição, limite de admissão e pico medido com tracemalloc
+
+O custo de uma simulação completa é dominado pelos pontos de saída: listas de
+floats do resultado, arrays do cache de segmentos e a serialização da resposta.
+Na frota (/fleet) somam-se as simulações distintas e a grade de tempo comum.
+"""
+
+import copy
+import threading
+import tracemalloc
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .metrics import registry
+from .service import DT_LADDER, TRAVEL_TIME_MARGIN
+
+# Bytes por ponto de saída medidos com tracemalloc (dt=0.01, 40 km ida e volta):
+# ~96 no resultado (3 listas de float + arrays em cache) e ~144 na serialização
+BYTES_PER_POINT = 240
+
+# Bytes por amostra da grade da frota (estimado): arrays da grade e de ocupação
+# (float64/int64 e temporários por bloco) e as duas listas da resposta serializadas
+FLEET_BYTES_PER_SAMPLE = 160
+
+MEMORY_POLICIES = ("reject", "decimate")
+
+PEAK_MEMORY = registry.histogram(
+    "sim_request_peak_memory_bytes", "Pico de memória alocada por requisição (tracemalloc)",
+    buckets=tuple(2.0 ** k for k in range(16, 34)))
+ESTIMATED_MEMORY = registry.histogram(
+    "sim_request_estimated_memory_bytes", "Memória estimada na admissão de simulações",
+    buckets=tuple(2.0 ** k for k in range(16, 34)))
+ADMISSIONS = registry.counter(
+    "sim_memory_admissions", "Decisões do limite de memória", ("decision",))
+
+
+class MemoryLimitError(ValueError):
+    """Requisição acima do limite de memória e sem decimação possível"""
+
+
+def estimate_simulation(service, params) -> Dict[str, Any]:
+    """
+    Pontos e bytes previstos para run_simulation, sem integrar
+
+    Usa o tempo de viagem estimado por segmento (com TRAVEL_TIME_MARGIN), o
+    layover e um ponto de partida por dwell; output_interval e max_points
+    reduzem a contagem como em SimulationService.output_stride.
+
+    Com arrival_tolerance o dt é escolhido só na execução (resolve_dt), então a
+    estimativa usa o menor passo de DT_LADDER, o pior caso do modo precisão.
+    """
+    travel_time, segments = service.estimate_travel_time(params)
+
+    dt = DT_LADDER[-1] if getattr(params, "arrival_tolerance", None) else params.dt
+    output_dt = dt
+    output_interval = getattr(params, "output_interval", None)
+    if output_interval:
+        output_dt = dt * max(1, int(round(output_interval / dt)))
+
+    points = (travel_time * TRAVEL_TIME_MARGIN + params.terminal_layover) / output_dt
+    # Ponto inicial, âncora e ponto final por segmento, mais o ponto de partida do dwell
+    points += segments * (3 + (1 if params.dwell_time > 0 else 0))
+    max_points = getattr(params, "max_points", None)
+    if max_points:
+        points = min(points, max_points)
+
+    points = int(points)
+    return {"points": points, "bytes": points * BYTES_PER_POINT, "segments": segments}
+
+
+def estimate_round_trip_time(service, params) -> float:
+    """Duração prevista da ida e volta (s), com TRAVEL_TIME_MARGIN, dwells e layover"""
+    travel_time, segments = service.estimate_travel_time(params)
+    return travel_time * TRAVEL_TIME_MARGIN + segments * params.dwell_time + params.terminal_layover
+
+
+def admit_simulation(service, params, limit_bytes: Optional[int],
+                     policy: str = "decimate") -> Tuple[Any, Dict[str, Any]]:
+    """
+    Aplica o limite de memória a uma simulação completa
+
+    Args:
+        limit_bytes: Limite por requisição (None desativa)
+        policy: "reject" (MemoryLimitError) ou "decimate" (impõe max_points)
+
+    Returns:
+        (parâmetros admitidos, estimativa com limit_bytes, decimated e max_points)
+    """
+    if policy not in MEMORY_POLICIES:
+        raise ValueError(f"Política de memória desconhecida: {policy}")
+
+    estimate = estimate_simulation(service, params)
+    estimate.update(limit_bytes=limit_bytes, decimated=False, max_points=getattr(params, "max_points", None))
+    ESTIMATED_MEMORY.observe(estimate["bytes"])
+
+    if limit_bytes is None or estimate["bytes"] <= limit_bytes:
+        ADMISSIONS.inc(decision="accepted")
+        return params, estimate
+
+    max_points = limit_bytes // BYTES_PER_POINT
+    # Pontos fixos por segmento (ver output_stride): abaixo disso não há decimação possível
+    if policy == "reject" or max_points <= 4 * estimate["segments"]:
+        ADMISSIONS.inc(decision="rejected")
+        raise MemoryLimitError(
+            f"Estimated {estimate['points']} output points (~{estimate['bytes'] / 2**20:.0f} MB) "
+            f"exceed the per-request limit of {limit_bytes / 2**20:.0f} MB; "
+            "increase dt or set output_interval/max_points"
+        )
+
+    admitted = copy.copy(params)
+    admitted.max_points = max_points
+    ADMISSIONS.inc(decision="decimated")
+    estimate.update(points=max_points, bytes=max_points * BYTES_PER_POINT,
+                    decimated=True, max_points=max_points)
+    return admitted, estimate
+
+
+def admit_fleet(service, base_params, variants: List[Any], train_variants: Optional[Sequence[int]],
+                departures: Sequence[float], sample_interval: float, limit_bytes: Optional[int],
+                policy: str = "decimate") -> Tuple[Any, List[Any], Dict[str, Any]]:
+    """
+    Aplica o limite de memória a uma simulação de frota
+
+    A grade de tempo comum (da primeira partida ao fim do último trem) precisa
+    caber no limite; o restante é dividido entre as simulações distintas, que
+    passam por admit_simulation (decimadas ou recusadas conforme `policy`).
+
+    Returns:
+        (base admitida, variantes admitidas, estimativa com samples e bytes)
+    """
+    # Índices negativos são a física base (como em simulate_fleet)
+    used = {max(int(index), -1) for index in train_variants} if train_variants is not None else {-1}
+    distinct = {index: base_params if index < 0 else variants[index]
+                for index in used if index < len(variants)}
+    if not distinct:
+        distinct = {-1: base_params}
+
+    durations = [estimate_round_trip_time(service, params) for params in distinct.values()]
+    span = float(np.max(departures) - np.min(departures)) + max(durations) if len(departures) else 0.0
+    samples = int(span / sample_interval) + 2
+    grid_bytes = samples * FLEET_BYTES_PER_SAMPLE
+    estimate = {"samples": samples, "bytes": grid_bytes, "runs": len(distinct), "limit_bytes": limit_bytes}
+
+    if limit_bytes is not None and grid_bytes >= limit_bytes:
+        ADMISSIONS.inc(decision="rejected")
+        raise MemoryLimitError(
+            f"Estimated {samples} fleet time samples (~{grid_bytes / 2**20:.0f} MB) exceed the "
+            f"per-request limit of {limit_bytes / 2**20:.0f} MB; increase sample_interval"
+        )
+
+    share = None if limit_bytes is None else (limit_bytes - grid_bytes) // len(distinct)
+    admitted = {}
+    for index, params in distinct.items():
+        admitted[index], run_estimate = admit_simulation(service, params, share, policy)
+        estimate["bytes"] += run_estimate["bytes"]
+
+    variants = [admitted.get(index, variant) for index, variant in enumerate(variants)]
+    return admitted.get(-1, base_params), variants, estimate
+
+
+class PeakMemoryMiddleware:
+    """
+    Middleware ASGI: pico de memória alocada durante a requisição (header X-Peak-Memory-Bytes)
+
+    Ativo apenas com tracemalloc ligado (SIM_TRACEMALLOC=1), que tem custo em
+    toda alocação. O pico é global ao processo: só é zerado quando nenhuma outra
+    requisição está em andamento, então sob concorrência o valor é um limite superior.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._active = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+
+        with self._lock:
+            if self._active == 0:
+                tracemalloc.reset_peak()
+            self._active += 1
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        reported = {"done": False}
+
+        async def send_with_peak(message):
+            # O corpo já foi serializado quando o início da resposta é enviado
+            if message["type"] == "http.response.start" and not reported["done"]:
+                reported["done"] = True
+                peak = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+                PEAK_MEMORY.observe(peak)
+                headers = list(message.get("headers", []))
+                headers.append((b"x-peak-memory-bytes", str(peak).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_peak)
+        finally:
+            with self._lock:
+                self._active -= 1
@@ -0,0 +1,336 @@
+"""
+Metrics Module
+Contadores, gauges e histogramas em memória expostos em /metrics (formato texto do Prometheus)
+
+As métricas são registradas no processo que atende a API; simulações feitas no
+pool de processos (SIM_PROCESS_WORKERS) contam apenas no nível de requisição.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .tracing import start_span
+
+# Limites (s) para latências de requisição, etapas e segmentos
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], Dict[tuple, float]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Valores lidos no momento da exposição: {tupla de labels: valor}
+        self.function = function
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: labels esperados {self.labelnames}, recebidos {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def _items(self) -> List[Tuple[tuple, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        if self.function is not None:
+            items += list(self.function().items())
+        return items
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._items():
+            yield self.name + "_total", self._labels(key), value
+
+
+class Gauge(_Metric):
+    """Valor instantâneo"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._items():
+            yield self.name, self._labels(key), value
+
+
+class Histogram(_Metric):
+    """Histograma com limites fixos (contagens por faixa, acumuladas na exposição)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [contagens por faixa (+Inf no fim), soma, total]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa a duração do bloco `with`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, count
+
+
+class MetricsRegistry:
+    """Conjunto de métricas de um processo e sua exposição em texto"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Métrica {metric.name} já registrada com outro tipo ou labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                function: Optional[Callable[[], Dict[tuple, float]]] = None) -> Counter:
+        counter = self._register(Counter(name, documentation, labelnames))
+        if function is not None:
+            counter.function = function
+        return counter
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], Dict[tuple, float]]] = None) -> Gauge:
+        gauge = self._register(Gauge(name, documentation, labelnames))
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def clear(self) -> None:
+        """Zera os valores (as métricas continuam registradas)"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Latências
+REQUEST_DURATION = registry.histogram(
+    "sim_request_duration_seconds", "Duração das requisições HTTP", ("method", "route", "status"))
+STAGE_DURATION = registry.histogram(
+    "sim_stage_duration_seconds",
+    "Duração por etapa (queue, handler, serialization, simulation, direction, integration, assembly, validation)",
+    ("stage",))
+SEGMENT_DURATION = registry.histogram(
+    "sim_segment_duration_seconds", "Duração da obtenção de um segmento por origem", ("source",))
+
+# Contadores
+STEPS_INTEGRATED = registry.counter(
+    "sim_steps_integrated", "Passos RK4 integrados", ("mode",))
+SEGMENT_EXTENSIONS = registry.counter(
+    "sim_segment_extensions", "Extensões do horizonte de integração de um segmento")
+POINTS_RETURNED = registry.counter(
+    "sim_points_returned", "Pontos de trajetória devolvidos por run_simulation")
+
+# Gauges
+IN_FLIGHT = registry.gauge(
+    "sim_requests_in_flight", "Requisições HTTP em andamento")
+
+
+# ------------------------------------------------------------------ HTTP
+
+# Tempo do endpoint da requisição corrente, preenchido por timed_endpoint
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("sim_request_timings", default=None)
+
+
+def _record_handler(started: float) -> None:
+    elapsed = time.perf_counter() - started
+    STAGE_DURATION.observe(elapsed, stage="handler")
+    timings = _request_timings.get()
+    if timings is not None:
+        timings["handler"] = elapsed
+
+
+def timed_endpoint(endpoint: Callable) -> Callable:
+    """Envolve um endpoint para medir seu corpo (etapa e span handler), preservando a assinatura"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            span = start_span("handler")
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                span.end()
+                _record_handler(started)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            span = start_span("handler")
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                span.end()
+                _record_handler(started)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: duração por rota, requisições em andamento e etapa de serialização
+
+    A etapa "serialization" é o tempo da requisição fora do endpoint: validação
+    do corpo pelo Pydantic e serialização da resposta (mais o roteamento).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            _request_timings.reset(token)
+            REQUEST_DURATION.observe(elapsed, method=scope["method"], route=route_label(scope),
+                                     status=status["code"])
+            if "handler" in timings:
+                STAGE_DURATION.observe(max(elapsed - timings["handler"], 0.0), stage="serialization")
+
+
+def route_label(scope) -> str:
+    """Template da rota (ex.: /timetable/{timetable_id}) para limitar a cardinalidade"""
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    endpoint = scope.get("endpoint")
+    return getattr(endpoint, "__name__", "unmatched")
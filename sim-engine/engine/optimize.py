@@ -0,0 +1,105 @@
+"""
+Optimize Module
+Projeto inverso: menor valor de um parâmetro de desempenho que atinge um tempo de ciclo alvo
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .service import SimulationService
+from .sweep import apply_point
+
+# Parâmetros em que o tempo de ida e volta diminui quando o valor aumenta
+OPTIMIZABLE_PARAMETERS = ("max_speed", "initial_accel", "loss_factor")
+DEFAULT_BOUND_FACTORS = (0.25, 4.0)
+
+
+def _base_value(base: Dict[str, Any], parameter: str) -> Optional[float]:
+    if parameter == "loss_factor":
+        curve = base.get("acceleration_curve_config") or {}
+        return curve.get("loss_factor")
+    return base.get(parameter)
+
+
+def find_minimum_parameter(service: SimulationService, base: Dict[str, Any], parameter: str,
+                           target_total_time: float, lower: Optional[float] = None,
+                           upper: Optional[float] = None, tolerance: float = 0.01,
+                           max_iterations: int = 40,
+                           checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Bisseção sobre um parâmetro monotônico até o tempo de ida e volta atingir o alvo
+
+    Cada avaliação usa o caminho só-cronograma (run_schedule). O parâmetro muda a
+    física a cada iteração, então nenhuma avaliação reaproveita segmentos em cache.
+
+    Para max_speed o tempo só é monotônico acima de threshold_speed (abaixo dele o
+    trem ainda acelera até o limiar): o limite inferior é elevado a
+    threshold_speed + tolerance.
+
+    Args:
+        base: Parâmetros base (dict de SimulationParamsDto)
+        parameter: Um de OPTIMIZABLE_PARAMETERS
+        target_total_time: Tempo de ida e volta desejado (s), incluindo dwells e layover
+        lower/upper: Intervalo de busca (padrão: 0.25x e 4x o valor base)
+        tolerance: Largura final do intervalo no parâmetro
+
+    Returns:
+        Valor encontrado, tempo atingido, iterações, tempo de cálculo e histórico
+    """
+    if parameter not in OPTIMIZABLE_PARAMETERS:
+        raise ValueError(f"Parâmetro não otimizável: {parameter}")
+
+    started = time.perf_counter()
+    history = []
+
+    def evaluate(value: float) -> float:
+        params = apply_point(base, {parameter: value})
+        total_time = service.run_schedule(params, checkpoint=checkpoint)["total_time"]
+        history.append({"value": value, "total_time": total_time})
+        return total_time
+
+    base_value = _base_value(base, parameter)
+    if lower is None or upper is None:
+        if base_value is None:
+            raise ValueError(f"Informe lower e upper para {parameter}")
+        lower = base_value * DEFAULT_BOUND_FACTORS[0] if lower is None else lower
+        upper = base_value * DEFAULT_BOUND_FACTORS[1] if upper is None else upper
+    if parameter == "max_speed" and base.get("threshold_speed") is not None:
+        lower = max(lower, base["threshold_speed"] + tolerance)
+        if lower >= upper:
+            raise ValueError("Intervalo de busca inválido: upper deve exceder threshold_speed + tolerance")
+    if not 0 < lower < upper:
+        raise ValueError("Intervalo de busca inválido: requer 0 < lower < upper")
+
+    def report(value: Optional[float], total_time: Optional[float], feasible: bool, converged: bool):
+        return {
+            "parameter": parameter,
+            "value": value,
+            "total_time": total_time,
+            "target_total_time": target_total_time,
+            "feasible": feasible,
+            "converged": converged,
+            "iterations": len(history),
+            "compute_time_s": time.perf_counter() - started,
+            "history": history,
+        }
+
+    upper_time = evaluate(upper)
+    if upper_time > target_total_time:
+        # Nem o limite superior atinge o alvo
+        return report(None, upper_time, feasible=False, converged=False)
+
+    lower_time = evaluate(lower)
+    if lower_time <= target_total_time:
+        return report(lower, lower_time, feasible=True, converged=True)
+
+    # Invariante: lower não atinge o alvo, upper atinge
+    while upper - lower > tolerance and len(history) < max_iterations:
+        middle = 0.5 * (lower + upper)
+        middle_time = evaluate(middle)
+        if middle_time <= target_total_time:
+            upper, upper_time = middle, middle_time
+        else:
+            lower = middle
+
+    return report(upper, upper_time, feasible=True, converged=upper - lower <= tolerance)
@@ -0,0 +1,61 @@
+"""
+Process Pool Module
+Simulações completas em processos filhos com retorno por memória compartilhada
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .schemas import SimulationParamsDto
+from .segment_store import SegmentStore
+from .service import SimulationService
+from .shm import SharedResult
+
+_process_service: Optional[SimulationService] = None
+
+
+def _init_worker(segment_store_dir: Optional[str], segment_store_max_bytes: int) -> None:
+    """Um SimulationService por processo (com o store em disco compartilhado, se houver)"""
+    global _process_service
+    store = SegmentStore(segment_store_dir, segment_store_max_bytes) if segment_store_dir else None
+    _process_service = SimulationService(segment_store=store)
+
+
+def _simulate_shared(payload: Dict[str, Any]) -> SharedResult:
+    params = SimulationParamsDto(**payload)
+    result = _process_service.run_simulation(params)
+    return SharedResult.export(result)
+
+
+class SimulationProcessPool:
+    """
+    ProcessPoolExecutor para run_simulation
+
+    Os parâmetros vão ao worker por pickle (pequenos); as colunas do resultado
+    voltam por SharedResult. O chamador é dono do bloco devolvido por submit().
+    """
+
+    def __init__(self, workers: int, segment_store_dir: Optional[str] = None,
+                 segment_store_max_bytes: int = 512 * 1024 * 1024):
+        if workers < 1:
+            raise ValueError("workers deve ser >= 1")
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(segment_store_dir, segment_store_max_bytes)
+        )
+
+    def submit(self, params) -> Future:
+        """Future de SharedResult; liberar com release() ou to_result()"""
+        return self._executor.submit(_simulate_shared, params.model_dump(exclude={"priority"}))
+
+    def run_simulation(self, params, checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """
+        Mesma interface de SimulationService.run_simulation (bloqueante)
+
+        Sem preempção entre segmentos: o trabalho roda no processo filho.
+        """
+        return self.submit(params).result().to_result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,219 @@
+"""
+Profiles Module
+Registro de perfis de material rodante com tabelas de segmento pré-calculadas
+
+Cada perfil integra uma única vez a partida em aceleração plena (template).
+Com frenagem a taxa constante b, um segmento de distância d começa a frear
+quando x + v²/2b = d, então o tempo de percurso para qualquer distância sai
+do template por interpolação: t(d) = t_frenagem + v_frenagem / b. A tabela é
+esse tempo em uma grade fina de distâncias; consultas só-cronograma de um
+perfil não integram nada.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .acceleration_curve import AccelerationCurve
+from .rk4 import RK4Solver, TrainPhysics
+from .schemas import RollingStockProfileDto
+
+MAX_TEMPLATE_STEPS = 2_000_000
+VALIDATION_DISTANCES = 5  # segmentos integrados por perfil para o relatório de precisão
+
+
+class RollingStockProfile:
+    """Física de um tipo de trem com template de aceleração e tabela tempo x distância"""
+
+    def __init__(self, config: RollingStockProfileDto):
+        started = time.perf_counter()
+        self.name = config.name
+        self.config = config
+        self.dt = config.dt
+        self.max_distance = config.max_distance_km * 1000
+
+        curve = None
+        if config.acceleration_curve_config:
+            curve = AccelerationCurve(config.acceleration_curve_config.model_dump())
+        self.physics = TrainPhysics(
+            initial_accel=config.initial_accel,
+            threshold_speed=config.threshold_speed,
+            max_speed=config.max_speed,
+            acceleration_curve=curve
+        )
+
+        # Curva de aceleração em arrays (km/h, m/s²)
+        points = curve.curve_points if curve else []
+        self.curve_velocity = np.array([v * 3.6 for v, _ in points])
+        self.curve_acceleration = np.array([a for _, a in points])
+
+        self._build_template()
+        self._build_table(config.distance_step_m)
+        self.validation_max_error_s: Optional[float] = None
+        self.build_time_s = time.perf_counter() - started
+
+    def _build_template(self) -> None:
+        """Integra a aceleração a partir do repouso até o ponto de frenagem de max_distance"""
+        solver = RK4Solver(dt=self.dt)
+        braking = self.physics.deceleration_rate
+
+        t, pos, vel = 0.0, 0.0, 0.0
+        times, positions, velocities = [t], [pos], [vel]
+        while pos + vel * vel / (2 * braking) < self.max_distance:
+            if len(times) > MAX_TEMPLATE_STEPS:
+                raise ValueError(f"Perfil {self.name}: template não alcança {self.max_distance:.0f} m")
+            pos, vel, _ = solver._step(t, pos, vel, self.physics.acceleration_function, None, False)
+            t += self.dt
+            times.append(t)
+            positions.append(pos)
+            velocities.append(vel)
+
+        self.template_time = np.array(times)
+        self.template_position = np.array(positions)
+        self.template_velocity = np.array(velocities)
+        # Ponto de parada se a frenagem começasse em cada instante (monotônico)
+        self.template_stopping = self.template_position + self.template_velocity ** 2 / (2 * braking)
+
+    def _build_table(self, step: float) -> None:
+        self.table_distance = np.arange(0.0, self.max_distance + step / 2, step)
+        onset_time = np.interp(self.table_distance, self.template_stopping, self.template_time)
+        onset_velocity = np.interp(self.table_distance, self.template_stopping, self.template_velocity)
+        self.table_time = onset_time + onset_velocity / self.physics.deceleration_rate
+        self.table_max_speed = onset_velocity
+
+    def segment_times(self, distances: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Tempo de percurso e velocidade máxima por segmento (interpolados da tabela)"""
+        distances = np.abs(np.asarray(distances, dtype=float))
+        if np.any(distances > self.max_distance):
+            raise ValueError(f"Perfil {self.name}: segmento maior que {self.max_distance:.0f} m")
+        return (np.interp(distances, self.table_distance, self.table_time),
+                np.interp(distances, self.table_distance, self.table_max_speed))
+
+    def validate(self, service) -> float:
+        """Maior diferença (s) entre a tabela e a integração completa em distâncias de amostra"""
+        solver = RK4Solver(dt=self.dt)
+        distances = np.geomspace(min(200.0, self.max_distance), self.max_distance, VALIDATION_DISTANCES)
+        table_times, _ = self.segment_times(distances)
+        errors = [
+            abs(service._segment_summary(solver, self.physics, 0.0, 0.0, float(d))["duration"] - expected)
+            for d, expected in zip(distances, table_times)
+        ]
+        self.validation_max_error_s = float(max(errors))
+        return self.validation_max_error_s
+
+    @property
+    def memory_bytes(self) -> int:
+        arrays = (self.curve_velocity, self.curve_acceleration, self.template_time,
+                  self.template_position, self.template_velocity, self.template_stopping,
+                  self.table_distance, self.table_time, self.table_max_speed)
+        return int(sum(array.nbytes for array in arrays))
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "build_time_s": self.build_time_s,
+            "memory_bytes": self.memory_bytes,
+            "template_points": len(self.template_time),
+            "table_points": len(self.table_distance),
+            "max_distance_m": self.max_distance,
+            "validation_max_error_s": self.validation_max_error_s,
+        }
+
+
+class ProfileRegistry:
+    """Perfis por nome, construídos na carga (startup)"""
+
+    def __init__(self):
+        self._profiles: Dict[str, RollingStockProfile] = {}
+
+    def load(self, path: str, service=None) -> List[Dict[str, Any]]:
+        """
+        Carrega perfis de um arquivo JSON ou YAML
+
+        O arquivo contém uma lista de perfis ou {"profiles": [...]}, cada um no
+        formato de RollingStockProfileDto.
+
+        Args:
+            service: SimulationService usado para validar a tabela contra a integração
+
+        Returns:
+            Relatório de warm-up dos perfis carregados
+        """
+        with open(path) as f:
+            if path.endswith((".yml", ".yaml")):
+                # PyYAML é opcional (perfis em JSON sempre funcionam) e só é importado aqui
+                try:
+                    import yaml
+                except ImportError:
+                    raise ValueError("PyYAML não está instalado; use um arquivo JSON") from None
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+
+        if isinstance(data, dict):
+            data = data.get("profiles", [])
+        return [self.add(RollingStockProfileDto(**entry), service).report() for entry in data]
+
+    def add(self, config: RollingStockProfileDto, service=None) -> RollingStockProfile:
+        profile = RollingStockProfile(config)
+        if service is not None:
+            profile.validate(service)
+        self._profiles[profile.name] = profile
+        return profile
+
+    def get(self, name: str) -> RollingStockProfile:
+        try:
+            return self._profiles[name]
+        except KeyError:
+            raise KeyError(name) from None
+
+    def names(self) -> List[str]:
+        return sorted(self._profiles)
+
+    def warmup_report(self) -> List[Dict[str, Any]]:
+        return [self._profiles[name].report() for name in self.names()]
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+
+def profile_schedule(service, profile: RollingStockProfile, params) -> Dict[str, Any]:
+    """
+    Cronograma de ida e volta de um perfil sem integração
+
+    Mesmo formato de SimulationService.run_schedule; params fornece stations,
+    dwell_time e terminal_layover.
+    """
+    stations, return_stations, _ = service._prepare_stations(params)
+    schedule = []
+    segment_times = []
+    max_speed = 0.0
+    current_time = 0.0
+
+    for index, sequence in enumerate((stations, return_stations)):
+        if index == 1:
+            current_time += params.terminal_layover
+        positions = np.array([pos for _, pos in sequence])
+        durations, speeds = profile.segment_times(np.diff(positions))
+        # Chegada k = partida anterior + percurso; partida = chegada + dwell
+        arrivals = current_time + np.cumsum(durations) + params.dwell_time * np.arange(len(durations))
+        for (name, _), arrival in zip(sequence[1:], arrivals):
+            schedule.append({
+                "station": name,
+                "arrival_time": float(arrival),
+                "departure_time": float(arrival + params.dwell_time),
+            })
+        segment_times.extend(durations.tolist())
+        max_speed = max(max_speed, float(speeds.max()))
+        current_time = schedule[-1]["departure_time"]
+
+    return {
+        "schedule": schedule,
+        "total_time": current_time,
+        "segment_times": segment_times,
+        "max_speed_reached": max_speed,
+        "profile": profile.name,
+    }
@@ -0,0 +1,153 @@
+"""
+Profiling Module
+Perfil sob demanda de uma simulação: funções mais custosas e pilhas para flamegraph
+
+Dois modos:
+    cprofile: profiler determinístico (cProfile), tempos exatos por função
+    sampling: coleta periódica da pilha da thread (baixo overhead) e pilhas
+              no formato "collapsed" (uma linha "a;b;c N" por pilha)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+PROFILING_MODES = ("cprofile", "sampling")
+DEFAULT_TOP = 25
+DEFAULT_SAMPLE_INTERVAL = 0.001  # s
+
+
+def _frame_name(name: str, filename: str, line: int) -> str:
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+class StackSampler:
+    """Amostra a pilha de uma thread a cada `interval` segundos em uma thread auxiliar"""
+
+    def __init__(self, thread_id: int, root_frame, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        # Desligado antes de stop(): a pilha de stop() não entra nas amostras
+        self.active = True
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="sim-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            # Só os quadros abaixo de quem iniciou o perfil
+            while frame is not None and frame is not self.root_frame:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack and self.active:
+                self.stacks[tuple(reversed(stack))] += 1
+
+
+class RequestProfiler:
+    """
+    Executa uma chamada sob profiler e guarda o relatório em `report`
+
+    Args:
+        mode: Um de PROFILING_MODES
+        top: Número de funções no ranking (por tempo próprio)
+        interval: Intervalo entre amostras no modo sampling (s)
+    """
+
+    def __init__(self, mode: str = "cprofile", top: int = DEFAULT_TOP,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL):
+        if mode not in PROFILING_MODES:
+            raise ValueError(f"Modo de profiling desconhecido: {mode}")
+        self.mode = mode
+        self.top = top
+        self.interval = interval
+        self.report: Optional[Dict[str, Any]] = None
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Chama fn(*args, **kwargs) nesta thread sob o profiler e devolve seu resultado"""
+        if self.mode == "cprofile":
+            # cProfile/pstats só são importados quando algum perfil é pedido
+            import cProfile
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            try:
+                return profiler.runcall(fn, *args, **kwargs)
+            finally:
+                self.report = self._cprofile_report(profiler, time.perf_counter() - started)
+
+        sampler = StackSampler(threading.get_ident(), sys._getframe(), self.interval)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.active = False
+            wall_time = time.perf_counter() - started
+            sampler.stop()
+            self.report = self._sampling_report(sampler.stacks, wall_time)
+
+    def _cprofile_report(self, profiler: "cProfile.Profile", wall_time: float) -> Dict[str, Any]:
+        import pstats
+        stats = pstats.Stats(profiler).stats
+        ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+        functions = [
+            {
+                "function": name,
+                "file": filename,
+                "line": line,
+                "calls": calls,
+                "self_time_s": self_time,
+                "cumulative_time_s": cumulative,
+            }
+            for (filename, line, name), (_, calls, self_time, cumulative, _) in ranked
+        ]
+        return {"mode": self.mode, "wall_time_s": wall_time, "samples": None,
+                "functions": functions, "collapsed": None}
+
+    def _sampling_report(self, stacks: Counter, wall_time: float) -> Dict[str, Any]:
+        total = sum(stacks.values())
+        self_samples: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in stacks.items():
+            self_samples[stack[-1]] += count
+            for frame in set(stack):
+                inclusive[frame] += count
+
+        # Amostras convertidas em tempo pela fração do tempo de parede
+        seconds = wall_time / total if total else 0.0
+        functions = [
+            {
+                "function": name,
+                "file": filename,
+                "line": line,
+                "calls": None,
+                "self_time_s": count * seconds,
+                "cumulative_time_s": inclusive[(name, filename, line)] * seconds,
+            }
+            for (name, filename, line), count in self_samples.most_common(self.top)
+        ]
+        return {"mode": self.mode, "wall_time_s": wall_time, "samples": total,
+                "functions": functions, "collapsed": collapsed_stacks(stacks)}
+
+
+def collapsed_stacks(stacks: Counter) -> str:
+    """Pilhas no formato collapsed (entrada de flamegraph.pl / speedscope)"""
+    lines: List[str] = []
+    for stack, count in sorted(stacks.items(), key=lambda item: item[1], reverse=True):
+        names = ";".join(_frame_name(*frame) for frame in stack)
+        lines.append(f"{names} {count}")
+    return "\n".join(lines) + ("\n" if lines else "")
+
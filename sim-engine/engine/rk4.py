@@ -1,5 +1,9 @@
+import time
+
 import numpy as np
-from typing import Tuple, List, Optional, Dict
+from typing import Tuple, Optional, Dict
+
+from .metrics import STAGE_DURATION, STEPS_INTEGRATED
 
 # Tolerâncias configuráveis para regimes físicos
 VELOCITY_EPSILON_RATIO = 1e-3  # * max_speed (ex: 0.03 m/s para vmax=30m/s)
@@ -13,6 +17,7 @@ class RK4Solver:
     def __init__(self, dt: float = 0.1):
         self.dt = dt
         self.braking_state = False  # Estado de frenagem com histerese
+        self.last_steps = 0  # Passos integrados na última chamada de solve
 
     def solve(self,
               initial_position: float,
@@ -20,7 +25,8 @@ class RK4Solver:
               time_span: Tuple[float, float],
               acceleration_func,
               target_position: float = None,
-              use_braking: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+              use_braking: bool = False,
+              record_every: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         Resolve o sistema usando RK4
 
@@ -29,92 +35,205 @@ class RK4Solver:
             initial_velocity: Velocidade inicial (m/s)
             time_span: (tempo_inicial, tempo_final)
             acceleration_func: Função que retorna aceleração dado (t, pos, vel)
+            record_every: Registra um estado a cada k passos. O primeiro ponto, o
+                primeiro ponto que alcança target_position e o ponto final são
+                sempre mantidos; a memória é proporcional aos pontos registrados.
 
         Returns:
             Tuple com arrays de (tempo, posição, velocidade)
         """
+        if record_every < 1:
+            raise ValueError("record_every deve ser >= 1")
+
+        started = time.perf_counter()
         t_start, t_end = time_span
         n_steps = int((t_end - t_start) / self.dt) + 1
+        # Mesma grade temporal de np.linspace(t_start, t_end, n_steps)
+        step = (t_end - t_start) / (n_steps - 1) if n_steps > 1 else 0.0
 
-        t = np.linspace(t_start, t_end, n_steps)
-        position = np.zeros(n_steps)
-        velocity = np.zeros(n_steps)
+        capacity = (n_steps - 1) // record_every + 3
+        t = np.empty(capacity)
+        position = np.empty(capacity)
+        velocity = np.empty(capacity)
 
         # Condições iniciais
+        t[0] = t_start
         position[0] = initial_position
         velocity[0] = initial_velocity
+        count = 1
 
         # Reset braking state no início da simulação
         self.braking_state = False
 
+        t_curr = float(t_start)
+        pos_curr = float(initial_position)
+        vel_curr = float(initial_velocity)
+        reached = target_position is None or pos_curr >= target_position
+
         for i in range(n_steps - 1):
-            pos_curr = position[i]
-            vel_curr = velocity[i]
-            t_curr = t[i]
-
-            # Determinar aceleração com histerese de frenagem
-            current_accel = self._get_acceleration_with_hysteresis(
-                t_curr, pos_curr, vel_curr, acceleration_func,
-                target_position, use_braking
+            new_position, new_velocity, current_accel = self._step(
+                t_curr, pos_curr, vel_curr, acceleration_func, target_position, use_braking
             )
 
-            # RK4 para posição e velocidade
-            k1_pos = vel_curr
-            k1_vel = current_accel
+            stop = False
+            # Detectar zero-crossing de velocidade
+            if vel_curr > 0 and new_velocity < 0:
+                # Interpolar para encontrar t* onde v=0 e recalcular a posição nesse ponto
+                partial_dt = self.dt * (vel_curr / (vel_curr - new_velocity))
+                t_next = t_curr + partial_dt
+                pos_next = pos_curr + vel_curr * partial_dt + 0.5 * current_accel * partial_dt**2
+                vel_next = 0.0
+                stop = True
+            else:
+                t_next = t_end if i + 1 == n_steps - 1 else (i + 1) * step + t_start
+                pos_next = new_position
+                vel_next = max(0, new_velocity)  # Clamp como backup
+
+                # Parar se chegou muito perto do alvo
+                if (target_position is not None and
+                    abs(pos_next - target_position) < 0.1 and
+                    vel_next < 0.5):
+                    vel_next = 0.0
+                    pos_next = target_position
+                    stop = True
+
+            # Âncora: primeiro ponto na estação (usado por _find_arrival_index)
+            anchor = not reached and pos_next >= target_position
+            reached = reached or anchor
+
+            if stop or anchor or (i + 1) % record_every == 0 or i + 1 == n_steps - 1:
+                t[count] = t_next
+                position[count] = pos_next
+                velocity[count] = vel_next
+                count += 1
+
+            t_curr, pos_curr, vel_curr = t_next, pos_next, vel_next
+            if stop:
+                # Truncar arrays na parada/chegada (o restante da grade não foi integrado)
+                break
 
-            k2_pos = vel_curr + 0.5 * self.dt * k1_vel
-            k2_vel = self._get_acceleration(t_curr + 0.5 * self.dt,
-                                          pos_curr + 0.5 * self.dt * k1_pos,
-                                          vel_curr + 0.5 * self.dt * k1_vel,
-                                          acceleration_func, target_position, use_braking)
+        self.last_steps = i + 1 if n_steps > 1 else 0
+        STEPS_INTEGRATED.inc(self.last_steps, mode="trajectory")
+        STAGE_DURATION.observe(time.perf_counter() - started, stage="integration")
+        return t[:count], position[:count], velocity[:count]
+
+    def solve_final(self,
+                    initial_position: float,
+                    initial_velocity: float,
+                    time_span: Tuple[float, float],
+                    acceleration_func,
+                    target_position: float = None,
+                    use_braking: bool = False) -> Dict[str, float]:
+        """
+        Mesma integração de solve(), sem materializar os arrays
 
-            k3_pos = vel_curr + 0.5 * self.dt * k2_vel
-            k3_vel = self._get_acceleration(t_curr + 0.5 * self.dt,
-                                          pos_curr + 0.5 * self.dt * k2_pos,
-                                          vel_curr + 0.5 * self.dt * k2_vel,
-                                          acceleration_func, target_position, use_braking)
+        Mantém apenas o estado corrente (memória O(1)) e registra o primeiro
+        instante em que a posição alcança target_position, como _find_arrival_index
+        faria sobre os arrays completos.
+
+        Returns:
+            Dict com final_time, final_position, final_velocity, arrival_time,
+            max_velocity (até a chegada) e steps
+        """
+        started = time.perf_counter()
+        t_start, t_end = time_span
+        n_steps = int((t_end - t_start) / self.dt) + 1
+        # Mesma grade temporal de np.linspace(t_start, t_end, n_steps)
+        step = (t_end - t_start) / (n_steps - 1) if n_steps > 1 else 0.0
 
-            k4_pos = vel_curr + self.dt * k3_vel
-            k4_vel = self._get_acceleration(t_curr + self.dt,
-                                          pos_curr + self.dt * k3_pos,
-                                          vel_curr + self.dt * k3_vel,
-                                          acceleration_func, target_position, use_braking)
+        self.braking_state = False
 
-            # Atualização usando RK4
-            new_position = pos_curr + (self.dt / 6) * (k1_pos + 2*k2_pos + 2*k3_pos + k4_pos)
-            new_velocity = vel_curr + (self.dt / 6) * (k1_vel + 2*k2_vel + 2*k3_vel + k4_vel)
+        t_curr = float(t_start)
+        pos_curr = float(initial_position)
+        vel_curr = float(initial_velocity)
 
-            # Detectar zero-crossing de velocidade
-            if vel_curr > 0 and new_velocity < 0:
-                # Interpolar para encontrar t* onde v=0
-                zero_time_fraction = vel_curr / (vel_curr - new_velocity)
+        arrival_time = None
+        max_velocity = 0.0
+        if target_position is not None and pos_curr >= target_position:
+            arrival_time = t_curr
 
-                # Recalcular posição no ponto exato v=0
-                partial_dt = self.dt * zero_time_fraction
-                position[i + 1] = pos_curr + vel_curr * partial_dt + 0.5 * current_accel * partial_dt**2
-                velocity[i + 1] = 0.0
+        steps = 0
+        for i in range(n_steps - 1):
+            new_position, new_velocity, current_accel = self._step(
+                t_curr, pos_curr, vel_curr, acceleration_func, target_position, use_braking
+            )
+            steps += 1
 
-                # Ajustar array de tempo para refletir parada exata
-                t[i + 1] = t[i] + partial_dt
+            if arrival_time is None and vel_curr > max_velocity:
+                max_velocity = vel_curr
 
-                # Truncar arrays no ponto de parada
-                t = t[:i + 2]
-                position = position[:i + 2]
-                velocity = velocity[:i + 2]
-                break
+            stop = False
+            if vel_curr > 0 and new_velocity < 0:
+                # Zero-crossing: parada exata no instante interpolado
+                partial_dt = self.dt * (vel_curr / (vel_curr - new_velocity))
+                t_next = t_curr + partial_dt
+                pos_next = pos_curr + vel_curr * partial_dt + 0.5 * current_accel * partial_dt**2
+                vel_next = 0.0
+                stop = True
             else:
-                position[i + 1] = new_position
-                velocity[i + 1] = max(0, new_velocity)  # Clamp como backup
-
-            # Parar se chegou muito perto do alvo
-            if (target_position is not None and
-                abs(position[i + 1] - target_position) < 0.1 and
-                velocity[i + 1] < 0.5):
-                velocity[i + 1] = 0.0
-                position[i + 1] = target_position
+                t_next = t_end if i + 1 == n_steps - 1 else (i + 1) * step + t_start
+                pos_next = new_position
+                vel_next = max(0, new_velocity)
+
+                if (target_position is not None and
+                        abs(pos_next - target_position) < 0.1 and vel_next < 0.5):
+                    pos_next = target_position
+                    vel_next = 0.0
+                    stop = True
+
+            t_curr, pos_curr, vel_curr = t_next, pos_next, vel_next
+            if arrival_time is None and target_position is not None and pos_curr >= target_position:
+                arrival_time = t_curr
+            if stop:
                 break
 
-        return t, position, velocity
+        STEPS_INTEGRATED.inc(steps, mode="final")
+        STAGE_DURATION.observe(time.perf_counter() - started, stage="integration")
+        return {
+            "final_time": t_curr,
+            "final_position": pos_curr,
+            "final_velocity": vel_curr,
+            "arrival_time": t_curr if arrival_time is None else arrival_time,
+            "max_velocity": max_velocity,
+            "steps": steps,
+        }
+
+    def _step(self, t_curr: float, pos_curr: float, vel_curr: float,
+              acceleration_func, target_position: float = None,
+              use_braking: bool = False) -> Tuple[float, float, float]:
+        """Um passo RK4; retorna (nova posição, nova velocidade, aceleração no início do passo)"""
+        # Determinar aceleração com histerese de frenagem
+        current_accel = self._get_acceleration_with_hysteresis(
+            t_curr, pos_curr, vel_curr, acceleration_func,
+            target_position, use_braking
+        )
+
+        # RK4 para posição e velocidade
+        k1_pos = vel_curr
+        k1_vel = current_accel
+
+        k2_pos = vel_curr + 0.5 * self.dt * k1_vel
+        k2_vel = self._get_acceleration(t_curr + 0.5 * self.dt,
+                                      pos_curr + 0.5 * self.dt * k1_pos,
+                                      vel_curr + 0.5 * self.dt * k1_vel,
+                                      acceleration_func, target_position, use_braking)
+
+        k3_pos = vel_curr + 0.5 * self.dt * k2_vel
+        k3_vel = self._get_acceleration(t_curr + 0.5 * self.dt,
+                                      pos_curr + 0.5 * self.dt * k2_pos,
+                                      vel_curr + 0.5 * self.dt * k2_vel,
+                                      acceleration_func, target_position, use_braking)
+
+        k4_pos = vel_curr + self.dt * k3_vel
+        k4_vel = self._get_acceleration(t_curr + self.dt,
+                                      pos_curr + self.dt * k3_pos,
+                                      vel_curr + self.dt * k3_vel,
+                                      acceleration_func, target_position, use_braking)
+
+        # Atualização usando RK4
+        new_position = pos_curr + (self.dt / 6) * (k1_pos + 2*k2_pos + 2*k3_pos + k4_pos)
+        new_velocity = vel_curr + (self.dt / 6) * (k1_vel + 2*k2_vel + 2*k3_vel + k4_vel)
+        return new_position, new_velocity, current_accel
 
     def _get_acceleration_with_hysteresis(self, t: float, pos: float, vel: float,
                                          acceleration_func, target_position: float = None,
@@ -146,18 +265,24 @@ class TrainPhysics:
     """Classe para definir a física específica do trem"""
 
     def __init__(self, initial_accel: float, threshold_speed: float, max_speed: float,
-                 acceleration_curve_config: Optional[Dict] = None):
+                 acceleration_curve_config: Optional[Dict] = None,
+                 acceleration_curve=None):
         self.initial_accel = initial_accel
         self.threshold_speed = threshold_speed
         self.max_speed = max_speed
         self.deceleration_rate = 2.0  # m/s² para frenagem
 
-        # Configurar curva de aceleração se fornecida
-        self.acceleration_curve = None
-        if acceleration_curve_config:
+        # Configurar curva de aceleração se fornecida (ou reutilizar uma já construída)
+        self.acceleration_curve = acceleration_curve
+        if self.acceleration_curve is None and acceleration_curve_config:
             from .acceleration_curve import AccelerationCurve
             self.acceleration_curve = AccelerationCurve(acceleration_curve_config)
 
+        # Chave que identifica a física (usada pelos caches de segmento)
+        curve_key = self.acceleration_curve.cache_key if self.acceleration_curve else None
+        self.cache_key = (initial_accel, threshold_speed, max_speed,
+                          self.deceleration_rate, curve_key)
+
     def acceleration_function(self, t: float, position: float, velocity: float) -> float:
         """
         Define a função de aceleração baseada na velocidade atual
@@ -0,0 +1,206 @@
+"""
+Scheduler Module
+Escalonamento por classe de prioridade entre simulações interativas e lotes (bulk)
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from .metrics import STAGE_DURATION
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+PRIORITY_CLASSES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+DEFAULT_WEIGHTS = {PRIORITY_INTERACTIVE: 8, PRIORITY_BULK: 1}
+WAIT_SAMPLE_WINDOW = 2048  # amostras de espera mantidas por classe
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "future", "priority", "enqueued_at", "context")
+
+    def __init__(self, fn, args, kwargs, priority):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.priority = priority
+        self.enqueued_at = time.perf_counter()
+        # Contexto de quem submeteu (trace da requisição) para o worker
+        self.context = contextvars.copy_context()
+
+
+class SimulationScheduler:
+    """
+    Pool de workers com uma fila por classe de prioridade e despacho
+    weighted round robin (smooth, estilo nginx) entre as filas não vazias.
+
+    Jobs bulk são preemptíveis em fronteiras de segmento: a simulação chama
+    `checkpoint()` entre segmentos e, se houver trabalho interativo esperando,
+    o próprio worker bulk executa esse trabalho antes de retomar.
+    """
+
+    def __init__(self, workers: int = 2, weights: Optional[Dict[str, int]] = None):
+        if workers < 1:
+            raise ValueError("workers deve ser >= 1")
+
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+
+        self._queues = {cls: deque() for cls in PRIORITY_CLASSES}
+        self._current_weight = {cls: 0 for cls in PRIORITY_CLASSES}
+        self._waits = {cls: deque(maxlen=WAIT_SAMPLE_WINDOW) for cls in PRIORITY_CLASSES}
+        self._running = {cls: 0 for cls in PRIORITY_CLASSES}
+        self._completed = {cls: 0 for cls in PRIORITY_CLASSES}
+        self._preemptions = 0
+
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._shutdown = False
+
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"sim-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    # ------------------------------------------------------------------ API
+
+    @property
+    def workers(self) -> int:
+        return len(self._threads)
+
+    def submit(self, fn: Callable, *args, priority: str = PRIORITY_INTERACTIVE, **kwargs) -> Future:
+        """Enfileira `fn(*args, **kwargs)` na classe indicada"""
+        if priority not in self._queues:
+            raise ValueError(f"Classe de prioridade desconhecida: {priority}")
+
+        job = _Job(fn, args, kwargs, priority)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler encerrado")
+            self._queues[priority].append(job)
+            self._cond.notify()
+        return job.future
+
+    async def run(self, fn: Callable, *args, priority: str = PRIORITY_INTERACTIVE, **kwargs) -> Any:
+        """Versão awaitable de `submit` para os handlers FastAPI"""
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=priority, **kwargs))
+
+    def checkpoint(self) -> None:
+        """
+        Ponto de preempção chamado entre segmentos.
+
+        Em jobs bulk, executa inline todo trabalho interativo pendente.
+        Fora de um worker ou em jobs interativos, não faz nada.
+        """
+        if getattr(self._local, "priority", None) != PRIORITY_BULK:
+            return
+
+        while True:
+            with self._cond:
+                queue = self._queues[PRIORITY_INTERACTIVE]
+                if not queue:
+                    return
+                job = queue.popleft()
+                self._preemptions += 1
+            self._execute(job)
+
+    def queue_depth(self) -> Dict[str, int]:
+        with self._cond:
+            return {cls: len(queue) for cls, queue in self._queues.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidade das filas e percentis de espera por classe (ms)"""
+        with self._cond:
+            classes = {}
+            for cls in PRIORITY_CLASSES:
+                waits = np.array(self._waits[cls]) * 1000.0
+                if len(waits):
+                    p50, p95, p99 = np.percentile(waits, [50, 95, 99])
+                else:
+                    p50 = p95 = p99 = 0.0
+                classes[cls] = {
+                    "weight": self.weights[cls],
+                    "queued": len(self._queues[cls]),
+                    "running": self._running[cls],
+                    "completed": self._completed[cls],
+                    "wait_samples": len(waits),
+                    "wait_p50_ms": float(p50),
+                    "wait_p95_ms": float(p95),
+                    "wait_p99_ms": float(p99),
+                }
+            return {
+                "workers": self.workers,
+                "preemptions": self._preemptions,
+                "classes": classes,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    # ------------------------------------------------------------ internals
+
+    def _next_job(self) -> Optional[_Job]:
+        """Smooth weighted round robin entre as classes com trabalho (chamar com lock)"""
+        candidates = [cls for cls in PRIORITY_CLASSES if self._queues[cls]]
+        if not candidates:
+            return None
+
+        total = 0
+        best = None
+        for cls in candidates:
+            self._current_weight[cls] += self.weights[cls]
+            total += self.weights[cls]
+            if best is None or self._current_weight[cls] > self._current_weight[best]:
+                best = cls
+        self._current_weight[best] -= total
+        return self._queues[best].popleft()
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    job = self._next_job()
+            self._execute(job)
+
+    def _execute(self, job: _Job) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            return
+
+        previous = getattr(self._local, "priority", None)
+        self._local.priority = job.priority
+        wait = time.perf_counter() - job.enqueued_at
+        STAGE_DURATION.observe(wait, stage="queue")
+        with self._cond:
+            self._waits[job.priority].append(wait)
+            self._running[job.priority] += 1
+
+        try:
+            result = job.context.run(job.fn, *job.args, **job.kwargs)
+        except BaseException as e:
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(result)
+        finally:
+            self._local.priority = previous
+            with self._cond:
+                self._running[job.priority] -= 1
+                self._completed[job.priority] += 1
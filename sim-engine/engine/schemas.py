@@ -0,0 +1,378 @@
+"""
+Schemas Module
+DTOs Pydantic da API do sim-engine
+"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, Literal
+
+class StationDto(BaseModel):
+    name: str = Field(..., description="Nome da estação")
+    km: float = Field(..., ge=0, description="Quilometragem da estação")
+
+class AccelerationCurveConfig(BaseModel):
+    linear_velocity_threshold: float = Field(30, gt=0, le=100, description="Velocidade linear em km/h")
+    initial_acceleration: float = Field(1.1, gt=0, le=3, description="Aceleração inicial em m/s²")
+    velocity_increment: float = Field(1, gt=0, le=10, description="Incremento de velocidade em km/h")
+    loss_factor: float = Field(46, gt=0, le=1000, description="Fator de perda")
+    max_velocity: float = Field(160, gt=0, le=300, description="Velocidade máxima em km/h")
+
+class SimulationParamsDto(BaseModel):
+    initial_accel: float = Field(..., gt=0, description="Aceleração inicial (m/s²)")
+    threshold_speed: float = Field(..., gt=0, description="Velocidade limite para mudança (m/s)")
+    max_speed: float = Field(..., gt=0, description="Velocidade máxima (m/s)")
+    stations: List[StationDto] = Field(..., min_items=2, description="Lista de estações")
+    dwell_time: float = Field(..., ge=0, description="Tempo de parada nas estações (s)")
+    terminal_layover: float = Field(..., ge=0, description="Tempo de espera no terminal (s)")
+    dt: float = Field(0.1, gt=0, le=1, description="Passo de integração (s)")
+    # Modo precisão: dt escolhido automaticamente (substitui dt)
+    arrival_tolerance: Optional[float] = Field(None, gt=0, description="Tolerância nas chegadas (s)")
+    # Amostragem da saída, independente do passo de integração
+    output_interval: Optional[float] = Field(None, gt=0, description="Intervalo entre pontos de saída (s)")
+    max_points: Optional[int] = Field(None, ge=10, description="Limite de pontos de saída")
+    # Parâmetro opcional para curva de aceleração
+    acceleration_curve_config: Optional[AccelerationCurveConfig] = Field(None, description="Configuração da curva de aceleração")
+    # Classe de prioridade (também aceita via header X-Priority)
+    priority: Optional[Literal["interactive", "bulk"]] = Field(None, description="Classe de prioridade no scheduler")
+
+class ScheduleEntry(BaseModel):
+    station: str
+    arrival_time: float
+    departure_time: float
+
+class DtSelectionDto(BaseModel):
+    dt: float
+    tolerance: float
+    estimated_error: float
+    met: bool
+    levels_evaluated: int
+
+class ProfiledFunctionDto(BaseModel):
+    function: str
+    file: str
+    line: int
+    calls: Optional[int] = None
+    self_time_s: float
+    cumulative_time_s: float
+
+class ProfilingReportDto(BaseModel):
+    mode: Literal["cprofile", "sampling"]
+    wall_time_s: float
+    samples: Optional[int] = None
+    functions: List[ProfiledFunctionDto]
+    # Pilhas "a;b;c N" para flamegraph (modo sampling)
+    collapsed: Optional[str] = None
+
+class MemoryEstimateDto(BaseModel):
+    points: int
+    bytes: int
+    segments: int
+    limit_bytes: Optional[int] = None
+    # max_points imposto pelo limite de memória (SIM_MEMORY_POLICY=decimate)
+    decimated: bool = False
+    max_points: Optional[int] = None
+
+class SimulationResultDto(BaseModel):
+    time: List[float]
+    position: List[float]
+    velocity: List[float]
+    schedule: List[ScheduleEntry]
+    # Id para re-simulação incremental (/simulate/derive)
+    result_id: Optional[str] = None
+    # Passo escolhido pelo modo precisão (arrival_tolerance)
+    dt_selection: Optional[DtSelectionDto] = None
+    # Relatório do profiler (header X-Profile)
+    profiling: Optional[ProfilingReportDto] = None
+    # Estimativa de memória usada na admissão
+    memory_estimate: Optional[MemoryEstimateDto] = None
+
+class SimulationPatchDto(BaseModel):
+    initial_accel: Optional[float] = Field(None, gt=0)
+    threshold_speed: Optional[float] = Field(None, gt=0)
+    max_speed: Optional[float] = Field(None, gt=0)
+    stations: Optional[List[StationDto]] = Field(None, min_items=2)
+    dwell_time: Optional[float] = Field(None, ge=0)
+    terminal_layover: Optional[float] = Field(None, ge=0)
+    dt: Optional[float] = Field(None, gt=0, le=1)
+    arrival_tolerance: Optional[float] = Field(None, gt=0)
+    output_interval: Optional[float] = Field(None, gt=0)
+    max_points: Optional[int] = Field(None, ge=10)
+    acceleration_curve_config: Optional[AccelerationCurveConfig] = None
+
+class SimulationDeriveDto(BaseModel):
+    base_result_id: str = Field(..., description="result_id de uma simulação anterior")
+    patch: SimulationPatchDto = Field(..., description="Parâmetros alterados")
+    priority: Optional[Literal["interactive", "bulk"]] = Field(None, description="Classe de prioridade no scheduler")
+
+class DerivationStatsDto(BaseModel):
+    base_result_id: str
+    segments: int
+    reused_segments: int
+    integrated_segments: int
+
+class DerivedSimulationResultDto(SimulationResultDto):
+    derivation: DerivationStatsDto
+
+class ScheduleResultDto(BaseModel):
+    schedule: List[ScheduleEntry]
+    total_time: float
+    segment_times: List[float]
+    max_speed_reached: float
+    dt_selection: Optional[DtSelectionDto] = None
+    profiling: Optional[ProfilingReportDto] = None
+
+class AccelerationCurvePoint(BaseModel):
+    velocity: float = Field(..., description="Velocidade em km/h")
+    acceleration: float = Field(..., description="Aceleração em m/s²")
+
+class AccelerationCurveResponse(BaseModel):
+    points: List[AccelerationCurvePoint]
+    config: AccelerationCurveConfig
+
+class SimulationBatchDto(BaseModel):
+    items: List[SimulationParamsDto] = Field(..., min_items=1, max_items=1000, description="Conjuntos de parâmetros")
+    priority: Literal["interactive", "bulk"] = Field("bulk", description="Classe de prioridade do batch no scheduler")
+    stream: bool = Field(False, description="Retornar NDJSON conforme cada item termina")
+
+class SimulationBatchItemDto(BaseModel):
+    index: int
+    status: Literal["ok", "error"]
+    result: Optional[SimulationResultDto] = None
+    error: Optional[str] = None
+
+class SimulationBatchResultDto(BaseModel):
+    total: int
+    unique: int
+    results: List[SimulationBatchItemDto]
+
+class SweepRangeDto(BaseModel):
+    min: Optional[float] = Field(None, description="Limite inferior")
+    max: Optional[float] = Field(None, description="Limite superior")
+    steps: int = Field(5, ge=1, le=1000, description="Pontos no eixo (estratégia grid)")
+    values: Optional[List[float]] = Field(None, min_items=1, description="Valores explícitos do eixo")
+
+class SweepRequestDto(BaseModel):
+    base: SimulationParamsDto
+    parameters: Dict[Literal["initial_accel", "threshold_speed", "max_speed", "dwell_time",
+                             "terminal_layover", "loss_factor"], SweepRangeDto] = Field(..., min_length=1)
+    strategy: Literal["grid", "lhs", "random"] = Field("grid", description="Estratégia de amostragem")
+    samples: int = Field(100, ge=1, le=100000, description="Pontos para lhs/random")
+    seed: Optional[int] = Field(None, description="Semente para lhs/random")
+    sweep_id: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9_-]{1,64}$",
+                                    description="Identificador para checkpoint e retomada")
+    include_trajectories: bool = Field(False, description="Incluir trajetórias completas por ponto")
+
+class SweepPointDto(BaseModel):
+    index: int
+    values: Dict[str, float]
+    metrics: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class SweepResultDto(BaseModel):
+    sweep_id: Optional[str] = None
+    strategy: str
+    # Semente usada por lhs/random (sorteada e persistida no checkpoint se omitida)
+    seed: Optional[int] = None
+    total_points: int
+    resumed_points: int
+    points: List[SweepPointDto]
+
+class OptimizeRequestDto(BaseModel):
+    base: SimulationParamsDto
+    parameter: Literal["max_speed", "initial_accel", "loss_factor"] = Field("max_speed", description="Parâmetro a ajustar")
+    target_total_time: float = Field(..., gt=0, description="Tempo de ida e volta alvo (s)")
+    lower: Optional[float] = Field(None, gt=0, description="Limite inferior da busca")
+    upper: Optional[float] = Field(None, gt=0, description="Limite superior da busca")
+    tolerance: float = Field(0.01, gt=0, description="Largura final do intervalo no parâmetro")
+    max_iterations: int = Field(40, ge=2, le=200, description="Máximo de simulações")
+
+class OptimizeIterationDto(BaseModel):
+    value: float
+    total_time: float
+
+class OptimizeResultDto(BaseModel):
+    parameter: str
+    value: Optional[float] = None
+    total_time: Optional[float] = None
+    target_total_time: float
+    feasible: bool
+    converged: bool
+    iterations: int
+    compute_time_s: float
+    history: List[OptimizeIterationDto]
+
+class FleetVariantDto(BaseModel):
+    initial_accel: Optional[float] = Field(None, gt=0)
+    threshold_speed: Optional[float] = Field(None, gt=0)
+    max_speed: Optional[float] = Field(None, gt=0)
+    acceleration_curve_config: Optional[AccelerationCurveConfig] = None
+
+class DeparturePlanDto(BaseModel):
+    base: SimulationParamsDto
+    headway: Optional[float] = Field(None, gt=0, description="Intervalo entre partidas (s)")
+    first_departure: float = Field(0, ge=0, description="Primeira partida (s)")
+    last_departure: Optional[float] = Field(None, ge=0, description="Última partida (s)")
+    count: Optional[int] = Field(None, ge=1, le=5000, description="Número de partidas")
+    departures: Optional[List[float]] = Field(None, min_items=1, max_items=5000, description="Partidas explícitas (s)")
+
+class FleetRequestDto(DeparturePlanDto):
+    variants: List[FleetVariantDto] = Field(default_factory=list, description="Físicas alternativas")
+    train_variants: Optional[List[int]] = Field(None, description="Índice em variants por trem (-1 = base)")
+    sample_interval: float = Field(10, gt=0, le=600, description="Passo da grade de tempo (s)")
+
+class FleetSeparationDto(BaseModel):
+    distance_m: float
+    leader: int
+    follower: int
+    time: float
+
+class FleetSummaryDto(BaseModel):
+    trains: int
+    distinct_runs: int
+    service_start: float
+    service_end: float
+    max_trains_in_service: int
+    min_separation: Optional[FleetSeparationDto] = None
+
+class FleetBlockDto(BaseModel):
+    from_station: str = Field(..., alias="from")
+    to: str
+    direction: str
+    max_trains: int
+    occupied_fraction: float
+
+class FleetOccupancyDto(BaseModel):
+    time: List[float]
+    trains_in_service: List[int]
+
+class FleetTrainDto(BaseModel):
+    index: int
+    departure_time: float
+    variant: int
+    end_time: float
+
+class FleetResultDto(BaseModel):
+    summary: FleetSummaryDto
+    blocks: List[FleetBlockDto]
+    occupancy: FleetOccupancyDto
+    trains: List[FleetTrainDto]
+
+class TimetableRequestDto(DeparturePlanDto):
+    pass
+
+class TimetableStopDto(BaseModel):
+    station: str
+    direction: str
+    arrival_offset: float
+    departure_offset: float
+
+class TimetableResultDto(BaseModel):
+    timetable_id: str
+    round_trip_time: float
+    departures: List[float]
+    stops: List[TimetableStopDto]
+    arrival_times: List[List[float]]
+    departure_times: List[List[float]]
+
+class ConflictRunDto(BaseModel):
+    id: Optional[str] = None
+    schedule: List[ScheduleEntry] = Field(..., min_items=1)
+    offset: float = Field(0, description="Deslocamento somado aos horários do cronograma (s)")
+    origin: Optional[str] = Field(None, description="Estação de partida no instante offset")
+
+class ConflictRequestDto(BaseModel):
+    runs: Optional[List[ConflictRunDto]] = Field(None, max_items=100000)
+    timetable_id: Optional[str] = Field(None, description="Quadro gerado por /timetable")
+    min_headway: float = Field(0, ge=0, description="Headway mínimo por plataforma (s)")
+    max_conflicts: int = Field(1000, ge=0, le=100000, description="Máximo de conflitos listados")
+
+class ConflictDto(BaseModel):
+    type: Literal["overlap", "headway"]
+    location: Dict[str, Optional[str]]
+    runs: List[Any]
+    start: float
+    end: float
+
+class ConflictLocationDto(BaseModel):
+    kind: Literal["station", "block"]
+    station: Optional[str] = None
+    from_station: Optional[str] = Field(None, alias="from")
+    to: Optional[str] = None
+    occupancies: int
+    overlaps: int
+    min_headway: Optional[float] = None
+
+class ConflictResultDto(BaseModel):
+    runs: int
+    intervals: int
+    conflict_counts: Dict[str, int]
+    conflicts: List[ConflictDto]
+    locations: List[ConflictLocationDto]
+    truncated: bool
+    compute_time_s: float
+
+class DistributionDto(BaseModel):
+    distribution: Literal["fixed", "normal", "lognormal", "uniform", "triangular"] = "normal"
+    mean: Optional[float] = Field(None, description="Média (padrão: valor de base)")
+    std: Optional[float] = Field(None, ge=0, description="Desvio padrão")
+    low: Optional[float] = Field(None, description="Limite inferior (trunca as amostras)")
+    high: Optional[float] = Field(None, description="Limite superior (trunca as amostras)")
+    mode: Optional[float] = Field(None, description="Moda (triangular)")
+    resolution: Optional[float] = Field(None, gt=0, description="Quantização das amostras de física")
+
+class StochasticRequestDto(BaseModel):
+    base: SimulationParamsDto
+    samples: int = Field(1000, ge=1, le=100000, description="Número de amostras")
+    seed: Optional[int] = Field(None, description="Semente do gerador")
+    dwell_time: Optional[DistributionDto] = Field(None, description="Dwell em todas as paradas")
+    station_dwell: Dict[str, DistributionDto] = Field(default_factory=dict, description="Dwell por estação")
+    initial_accel: Optional[DistributionDto] = None
+    max_speed: Optional[DistributionDto] = None
+    percentiles: List[float] = Field([5, 50, 95, 99], min_items=1, description="Percentis reportados")
+
+class DistributionSummaryDto(BaseModel):
+    mean: float
+    std: float
+    min: float
+    max: float
+    percentiles: Dict[str, float]
+
+class StochasticStopDto(BaseModel):
+    station: str
+    direction: str
+    arrival: DistributionSummaryDto
+
+class StochasticResultDto(BaseModel):
+    samples: int
+    seed: Optional[int] = None
+    distinct_physics: int
+    round_trip_time: DistributionSummaryDto
+    stops: List[StochasticStopDto]
+    compute_time_s: float
+
+class RollingStockProfileDto(BaseModel):
+    name: str = Field(..., min_length=1, description="Nome do perfil")
+    initial_accel: float = Field(..., gt=0, description="Aceleração inicial (m/s²)")
+    threshold_speed: float = Field(..., gt=0, description="Velocidade limite para mudança (m/s)")
+    max_speed: float = Field(..., gt=0, description="Velocidade máxima (m/s)")
+    acceleration_curve_config: Optional[AccelerationCurveConfig] = None
+    dt: float = Field(0.1, gt=0, le=1, description="Passo de integração do template (s)")
+    max_distance_km: float = Field(50, gt=0, le=500, description="Maior distância entre estações tabelada")
+    distance_step_m: float = Field(10, gt=0, le=1000, description="Resolução da tabela (m)")
+
+class ProfileReportDto(BaseModel):
+    name: str
+    build_time_s: float
+    memory_bytes: int
+    template_points: int
+    table_points: int
+    max_distance_m: float
+    validation_max_error_s: Optional[float] = None
+
+class ProfileScheduleRequestDto(BaseModel):
+    stations: List[StationDto] = Field(..., min_items=2, description="Lista de estações")
+    dwell_time: float = Field(..., ge=0, description="Tempo de parada nas estações (s)")
+    terminal_layover: float = Field(..., ge=0, description="Tempo de espera no terminal (s)")
+
+class ProfileScheduleResultDto(ScheduleResultDto):
+    profile: str
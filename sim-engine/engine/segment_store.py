@@ -0,0 +1,181 @@
+"""
+Segment Store Module
+Armazenamento persistente de trajetórias de segmento compartilhado entre processos
+
+Índice em SQLite (modo WAL) e um arquivo .npy por segmento com as linhas
+(tempo, posição, velocidade) em coordenadas relativas. Leituras usam
+np.load(mmap_mode="r"): os workers compartilham as páginas do arquivo sem
+cópia. Escritas vão para um arquivo temporário no mesmo diretório e são
+publicadas com os.replace (atômico); o tamanho total é limitado por
+evicção LRU.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+# Versão do formato/solver: alterar invalida os segmentos já gravados
+STORE_VERSION = "rk4-v1"
+ACCESS_UPDATE_INTERVAL = 60.0  # s entre atualizações de last_access do mesmo segmento
+
+
+class SegmentStore:
+    """Segmentos em disco indexados por hash da chave de cache do SimulationService"""
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        with self._lock:
+            self._db().execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                " key TEXT PRIMARY KEY, file TEXT NOT NULL, bytes INTEGER NOT NULL,"
+                " created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db().execute("CREATE INDEX IF NOT EXISTS segments_lru ON segments(last_access)")
+
+    # ------------------------------------------------------------------ API
+
+    @staticmethod
+    def key_hash(key: Hashable) -> str:
+        return hashlib.sha1(f"{STORE_VERSION}:{key!r}".encode()).hexdigest()
+
+    def get(self, key: Hashable) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Trajetória (t, pos, vel) somente leitura mapeada do disco, ou None"""
+        digest = self.key_hash(key)
+        with self._lock:
+            row = self._db().execute("SELECT file FROM segments WHERE key = ?", (digest,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touch(digest)
+
+        try:
+            data = np.load(os.path.join(self.directory, row[0]), mmap_mode="r")
+        except (OSError, ValueError):
+            # Arquivo removido por outro processo entre a consulta e a leitura
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data[0], data[1], data[2]
+
+    def put(self, key: Hashable, trajectory: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> None:
+        """Grava a trajetória de forma atômica e aplica o limite de tamanho"""
+        digest = self.key_hash(key)
+        data = np.vstack(trajectory).astype(np.float64, copy=False)
+        filename = f"{digest}.npy"
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, data)
+            os.replace(tmp_path, os.path.join(self.directory, filename))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        now = time.time()
+        with self._lock:
+            with self._db():
+                self._db().execute(
+                    "INSERT OR REPLACE INTO segments (key, file, bytes, created, last_access)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (digest, filename, data.nbytes, now, now)
+                )
+            self.writes += 1
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            with self._db():
+                files = [row[0] for row in self._db().execute("SELECT file FROM segments")]
+                self._db().execute("DELETE FROM segments")
+            for filename in files:
+                self._unlink(filename)
+            self._touched.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM segments"
+            ).fetchone()
+        return {
+            "size": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+    # ------------------------------------------------------------ internals
+
+    def _db(self) -> sqlite3.Connection:
+        """Conexão deste processo (reaberta após fork dos workers)"""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                os.path.join(self.directory, "index.sqlite"), timeout=30, check_same_thread=False
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._connection
+
+    def _touch(self, digest: str) -> None:
+        """Atualiza last_access no máximo uma vez por ACCESS_UPDATE_INTERVAL (chamar com lock)"""
+        now = time.time()
+        if now - self._touched.get(digest, 0.0) < ACCESS_UPDATE_INTERVAL:
+            return
+        self._touched[digest] = now
+        with self._db():
+            self._db().execute("UPDATE segments SET last_access = ? WHERE key = ?", (now, digest))
+
+    def _evict(self) -> None:
+        """Remove os segmentos menos usados até caber em max_bytes (chamar com lock)"""
+        total = self._db().execute("SELECT COALESCE(SUM(bytes), 0) FROM segments").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        victims = []
+        for digest, filename, size in self._db().execute(
+            "SELECT key, file, bytes FROM segments ORDER BY last_access"
+        ):
+            if total <= self.max_bytes:
+                break
+            victims.append((digest, filename))
+            total -= size
+
+        with self._db():
+            self._db().executemany("DELETE FROM segments WHERE key = ?", [(d,) for d, _ in victims])
+        for digest, filename in victims:
+            # Leitores com o arquivo mapeado continuam válidos após o unlink
+            self._unlink(filename)
+            self._touched.pop(digest, None)
+        self.evictions += len(victims)
+
+    def _unlink(self, filename: str) -> None:
+        try:
+            os.unlink(os.path.join(self.directory, filename))
+        except FileNotFoundError:
+            pass
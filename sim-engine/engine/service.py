@@ -1,85 +1,143 @@
+import copy
+import time
 import numpy as np
-from typing import List, Dict, Any
+import uuid
+from typing import List, Dict, Any, Callable, Optional, Sequence, Tuple
 from .rk4 import RK4Solver, TrainPhysics, POSITION_TOLERANCE
+from .acceleration_curve import AccelerationCurve
+from .cache import LRUCache
+from .metrics import POINTS_RETURNED, SEGMENT_DURATION, SEGMENT_EXTENSIONS, STAGE_DURATION
+from .tracing import NULL_SPAN, start_span
+from .stochastic import DEFAULT_PERCENTILES, DEFAULT_RESOLUTION, quantize, sample_distribution, spec_value, summarize
 import logging
 
-# Configurar logging para debug visual
-logging.basicConfig(level=logging.INFO)
+# O nível e os handlers são configurados pelo app (create_app), não na importação
 logger = logging.getLogger(__name__)
 
+# Passos candidatos do modo precisão (1 s, 0.5 s, ... 1/256 s)
+DT_LADDER = tuple(2.0 ** -k for k in range(9))
+# Faixas de velocidade do perfil de aceleração usado nas estimativas sem integrar
+PROFILE_BINS = 512
+# Folga sobre o tempo de viagem estimado (passo de integração e histerese da frenagem)
+TRAVEL_TIME_MARGIN = 1.1
+
 class SimulationService:
     """Serviço principal para orquestrar a simulação física"""
 
-    def run_simulation(self, params) -> Dict[str, Any]:
+    def __init__(self, segment_cache_size: int = 1024, physics_cache_size: int = 128,
+                 result_store_size: int = 256, segment_store=None):
+        # Caches compartilhados entre requisições (e entre itens de um batch)
+        self.physics_cache = LRUCache(physics_cache_size)
+        self.curve_cache = LRUCache(physics_cache_size)
+        self.segment_cache = LRUCache(segment_cache_size)
+        self.segment_summary_cache = LRUCache(segment_cache_size * 4)
+        # Resultados anteriores (parâmetros + segmentos) para re-simulação incremental
+        self.result_store = LRUCache(result_store_size)
+        # dt escolhido por (física, tolerância, segmentos) no modo precisão
+        self.dt_cache = LRUCache(physics_cache_size)
+        # Perfil de aceleração (velocidade, tempo, distância) por física
+        self.profile_cache = LRUCache(physics_cache_size)
+        # Segundo nível opcional em disco (SegmentStore) compartilhado entre processos
+        self.segment_store = segment_store
+
+    def build_physics(self, params) -> TrainPhysics:
+        """Retorna a TrainPhysics dos parâmetros, reutilizando física e curva em cache"""
+        span = start_span("physics")
+        curve_config = None
+        config = getattr(params, "acceleration_curve_config", None)
+        if config:
+            curve_config = config.model_dump() if hasattr(config, "model_dump") else dict(config)
+
+        curve_key = tuple(sorted(curve_config.items())) if curve_config else None
+        physics_key = (params.initial_accel, params.threshold_speed, params.max_speed, curve_key)
+
+        def create_physics():
+            curve = None
+            if curve_config:
+                curve = self.curve_cache.get_or_create(curve_key, lambda: AccelerationCurve(curve_config))
+            return TrainPhysics(
+                initial_accel=params.initial_accel,
+                threshold_speed=params.threshold_speed,
+                max_speed=params.max_speed,
+                acceleration_curve=curve
+            )
+
+        physics = self.physics_cache.get_or_create(physics_key, create_physics)
+        span.end()
+        return physics
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            "physics": self.physics_cache.stats(),
+            "curve": self.curve_cache.stats(),
+            "segment": self.segment_cache.stats(),
+            "segment_summary": self.segment_summary_cache.stats(),
+            "dt": self.dt_cache.stats(),
+            "profile": self.profile_cache.stats(),
+            **({"segment_store": self.segment_store.stats()} if self.segment_store else {}),
+        }
+
+    def run_simulation(self, params, checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
         """
         Executa simulação completa baseada nos parâmetros
 
         Args:
             params: Parâmetros da simulação (SimulationParamsDto)
+            checkpoint: Chamado entre segmentos (ponto de preempção do scheduler)
 
         Returns:
             Resultado da simulação com tempo, posição, velocidade e cronograma
         """
-        # Extrair parâmetros
-        stations = [(s.name, s.km * 1000) for s in params.stations]  # Converter km para metros
-        stations.sort(key=lambda x: x[1])  # Ordenar por posição
+        started = time.perf_counter()
+        span = start_span("simulation")
 
-        # Calcular distância total
-        total_distance = stations[-1][1] - stations[0][1]
+        # Modo precisão: dt escolhido a partir da tolerância de chegada
+        params, dt_selection = self.resolve_dt(params)
 
-        # Configurar física do trem
-        # Converter configuração da curva de aceleração se fornecida
-        curve_config = None
-        if params.acceleration_curve_config:
-            curve_config = params.acceleration_curve_config.dict()
-
-        physics = TrainPhysics(
-            initial_accel=params.initial_accel,
-            threshold_speed=params.threshold_speed,
-            max_speed=params.max_speed,
-            acceleration_curve_config=curve_config
-        )
+        # Extrair parâmetros (estações da ida e da volta espelhada)
+        stations, return_stations, total_distance = self._prepare_stations(params)
+
+        # Configurar física do trem (com curva de aceleração, se fornecida)
+        physics = self.build_physics(params)
 
-        # Configurar solver RK4
+        # Configurar solver RK4 (integra a cada dt, registra a cada `stride` passos)
         solver = RK4Solver(dt=params.dt)
+        stride = self.output_stride(params)
 
         # Simular ida e volta
         logger.info(f"🚀 Iniciando simulação - Total stations: {len(stations)}, Layover: {params.terminal_layover}s")
 
         outbound_result = self._simulate_direction(
-            solver, physics, stations, params.dwell_time, "outbound"
+            solver, physics, stations, params.dwell_time, "outbound",
+            checkpoint=checkpoint, record_every=stride
         )
 
         logger.info(f"✅ IDA completa - Pontos: {len(outbound_result['time'])}, Tempo final: {outbound_result['final_time']:.1f}s")
         logger.info(f"   Posição final ida: {outbound_result['position'][-1]:.0f}m, Velocidade: {outbound_result['velocity'][-1]:.1f}m/s")
 
         # Simular volta com coordenadas espelhadas reais
-        # Espelhamento direto: 0km→0km, 5km→10km, 15km→0km
-        return_stations = []
-        max_distance = stations[-1][1]  # Distância da última estação
-        for name, original_pos in reversed(stations):
-            # Espelhamento direto: preserva distâncias reais
-            mirror_distance = max_distance - original_pos
-            return_stations.append((name, mirror_distance))
-
         logger.info(f"🔄 Estações da volta: {[(name, pos/1000) for name, pos in return_stations]}")
 
         return_result = self._simulate_direction(
             solver, physics, return_stations, params.dwell_time, "return",
             time_offset=outbound_result["final_time"] + params.terminal_layover,
-            total_distance=total_distance
+            total_distance=total_distance, checkpoint=checkpoint, record_every=stride
         )
 
         logger.info(f"✅ VOLTA completa - Pontos: {len(return_result['time'])}, Tempo final: {return_result['final_time']:.1f}s")
         logger.info(f"   Posição final volta: {return_result['position'][-1]:.0f}m, Velocidade: {return_result['velocity'][-1]:.1f}m/s")
 
-        # Adicionar terminal layover como pontos estáticos
-        layover_points = int(params.terminal_layover / params.dt)
+        assembly_started = time.perf_counter()
+        assembly_span = start_span("assembly", layover=params.terminal_layover)
+
+        # Adicionar terminal layover como pontos estáticos (no intervalo de saída)
+        output_dt = params.dt * stride
+        layover_points = int(params.terminal_layover / output_dt)
         logger.info(f"🕰️ Terminal Layover - {params.terminal_layover}s = {layover_points} pontos")
 
         if layover_points > 0:
             layover_start_time = outbound_result["final_time"]
-            layover_time = [layover_start_time + i * params.dt for i in range(layover_points)]
+            layover_time = [layover_start_time + i * output_dt for i in range(layover_points)]
             layover_position = [outbound_result["position"][-1]] * layover_points
             layover_velocity = [0.0] * layover_points
             logger.info(f"   Layover de {layover_start_time:.1f}s a {layover_time[-1]:.1f}s na posição {layover_position[0]:.0f}m")
@@ -149,16 +207,414 @@ class SimulationService:
             "schedule": combined_schedule
         }
 
+        validation_started = time.perf_counter()
+        STAGE_DURATION.observe(validation_started - assembly_started, stage="assembly")
+        assembly_span.end()
+
         # Validar continuidade dos dados
-        self._validate_data_continuity(result)
+        with start_span("validation"):
+            self._validate_data_continuity(result)
+
+        finished = time.perf_counter()
+        STAGE_DURATION.observe(finished - validation_started, stage="validation")
+        STAGE_DURATION.observe(finished - started, stage="simulation")
+        POINTS_RETURNED.inc(len(combined_time))
+        span.set(points=len(combined_time), dt=params.dt)
+        span.end()
+
+        if dt_selection is not None:
+            result["dt_selection"] = dt_selection
+        return result
+
+    def store_result(self, params, keep_segments: bool = True) -> str:
+        """
+        Registra uma simulação concluída para derivações futuras
+
+        Guarda os parâmetros e referências às trajetórias de segmento em cache
+        (sem cópia), de modo que sobrevivam a evicções do cache de segmentos.
+        Com keep_segments=False (simulação feita em outro processo, cache local
+        frio) só os parâmetros são guardados, sem resolver dt nem chaves.
+        """
+        segments = {}
+        for key in (self.segment_keys(params) if keep_segments else ()):
+            trajectory = self.segment_cache.peek(key)
+            if trajectory is not None:
+                segments[key] = trajectory
+
+        result_id = uuid.uuid4().hex
+        self.result_store.put(result_id, {"params": params, "segments": segments})
+        return result_id
+
+    def run_and_store(self, params, checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """run_simulation + store_result na mesma tarefa (caches ainda quentes), com result_id no resultado"""
+        result = self.run_simulation(params, checkpoint=checkpoint)
+        result["result_id"] = self.store_result(params)
+        return result
+
+    def get_stored_params(self, result_id: str):
+        record = self.result_store.get(result_id)
+        if record is None:
+            raise KeyError(result_id)
+        return record["params"]
 
+    def derive_simulation(self, base_result_id: str, params,
+                          checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """
+        Re-simula a partir de um resultado anterior com parâmetros alterados
+
+        Os segmentos da simulação base voltam ao cache antes da execução; apenas
+        segmentos cuja distância ou física mudou são integrados. Os demais são
+        reposicionados no tempo pela montagem normal de run_simulation.
+
+        Args:
+            base_result_id: Id retornado por store_result
+            params: Parâmetros completos já com o patch aplicado
+
+        Returns:
+            Resultado de run_simulation com result_id e estatísticas da derivação
+        """
+        record = self.result_store.get(base_result_id)
+        if record is None:
+            raise KeyError(base_result_id)
+
+        for key, trajectory in record["segments"].items():
+            if self.segment_cache.peek(key) is None:
+                self.segment_cache.put(key, trajectory)
+
+        keys = self.segment_keys(params)
+        # Contagem por segmento da ida e volta (reused + integrated == segments)
+        integrated = sum(1 for key in keys if self.segment_cache.peek(key) is None)
+
+        result = self.run_and_store(params, checkpoint=checkpoint)
+        result["derivation"] = {
+            "base_result_id": base_result_id,
+            "segments": len(keys),
+            "reused_segments": len(keys) - integrated,
+            "integrated_segments": integrated,
+        }
         return result
 
+    def segment_keys(self, params) -> List[tuple]:
+        """Chaves de cache dos segmentos da ida e da volta, na ordem de simulação"""
+        params, _ = self.resolve_dt(params)
+        stations, return_stations, _ = self._prepare_stations(params)
+        physics = self.build_physics(params)
+        stride = self.output_stride(params)
+        keys = []
+        for direction in (stations, return_stations):
+            for start, end in zip(direction, direction[1:]):
+                keys.append(self._segment_key(physics, params.dt, end[1] - start[1], record_every=stride))
+        return keys
+
+    def output_stride(self, params) -> int:
+        """
+        Passos de integração por ponto de saída
+
+        output_interval (s) fixa o intervalo; max_points limita o total de pontos
+        a partir do tempo de viagem estimado (estimate_travel_time, sem integrar).
+        Sem nenhum dos dois, todos os passos são registrados.
+        """
+        stride = 1
+        output_interval = getattr(params, "output_interval", None)
+        max_points = getattr(params, "max_points", None)
+
+        if output_interval:
+            stride = max(1, int(round(output_interval / params.dt)))
+
+        if max_points:
+            travel_time, segments = self.estimate_travel_time(params)
+            # Por segmento: ponto inicial, âncora de chegada, ponto final e ponto de partida
+            budget = max_points - 4 * segments
+            if budget <= 0:
+                raise ValueError(f"max_points deve ser maior que {4 * segments} para {segments} segmentos")
+            recorded_time = travel_time * TRAVEL_TIME_MARGIN + params.terminal_layover
+            stride = max(stride, int(np.ceil(recorded_time / params.dt / budget)))
+
+        return stride
+
+    def estimate_travel_time(self, params) -> Tuple[float, int]:
+        """
+        Tempo de viagem previsto da ida e volta (sem dwell e layover) e número de segmentos
+
+        Cada segmento acelera pelo perfil da física até o ponto em que a frenagem
+        precisa começar, cruza na velocidade atingida e freia; não integra no tempo.
+        """
+        stations, return_stations, _ = self._prepare_stations(params)
+        distances = np.array([end[1] - start[1]
+                              for sequence in (stations, return_stations)
+                              for start, end in zip(sequence, sequence[1:])], dtype=float)
+        if distances.size == 0:
+            return 0.0, 0
+
+        physics = self.build_physics(params)
+        velocity, elapsed, covered = self.profile_cache.get_or_create(
+            physics.cache_key, lambda: self._acceleration_profile(physics))
+        deceleration = physics.deceleration_rate
+
+        # Maior velocidade da qual ainda se para no fim do segmento
+        stopping = covered + velocity ** 2 / (2 * deceleration)
+        peak = np.maximum(np.searchsorted(stopping, distances, side="right") - 1, 0)
+        peak_velocity = velocity[peak]
+        cruise = distances - stopping[peak]
+        times = elapsed[peak] + peak_velocity / deceleration
+        moving = peak_velocity > 0
+        times[moving] += cruise[moving] / peak_velocity[moving]
+
+        # Abaixo da primeira faixa: aceleração inicial constante até o ponto de frenagem
+        short = ~moving
+        if short.any():
+            rate = 1 / physics.initial_accel + 1 / deceleration
+            top = np.sqrt(2 * distances[short] / rate)
+            times[short] = top * rate
+        return float(times.sum()), int(distances.size)
+
+    @staticmethod
+    def _acceleration_profile(physics: TrainPhysics) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Velocidade, tempo e distância acumulados acelerando a partir do repouso (integral em v)"""
+        edges = np.linspace(0.0, physics.max_speed, PROFILE_BINS + 1)
+        middle = 0.5 * (edges[:-1] + edges[1:])
+        acceleration = np.array([physics.acceleration_function(0.0, 0.0, v) for v in middle])
+        # Sem aceleração a física não passa desta velocidade
+        reachable = int(np.argmax(acceleration <= 0)) if (acceleration <= 0).any() else PROFILE_BINS
+        step = np.diff(edges)[:reachable] / acceleration[:reachable]
+        elapsed = np.concatenate(([0.0], np.cumsum(step)))
+        covered = np.concatenate(([0.0], np.cumsum(step * middle[:reachable])))
+        return edges[:reachable + 1], elapsed, covered
+
+    def run_schedule(self, params, checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """
+        Modo rápido: apenas o cronograma (chegadas e partidas)
+
+        Integra cada segmento com RK4Solver.solve_final, mantendo só o estado
+        corrente e os tempos de fim de segmento. Não materializa trajetórias,
+        não monta o layover e não executa _validate_data_continuity.
+
+        Returns:
+            schedule, total_time, segment_times e max_speed_reached
+        """
+        params, dt_selection = self.resolve_dt(params)
+        stations, return_stations, _ = self._prepare_stations(params)
+        physics = self.build_physics(params)
+        solver = RK4Solver(dt=params.dt)
+
+        outbound = self._schedule_direction(
+            solver, physics, stations, params.dwell_time, checkpoint=checkpoint
+        )
+        inbound = self._schedule_direction(
+            solver, physics, return_stations, params.dwell_time,
+            time_offset=outbound["final_time"] + params.terminal_layover, checkpoint=checkpoint
+        )
+
+        result = {
+            "schedule": outbound["schedule"] + inbound["schedule"],
+            "total_time": inbound["final_time"],
+            "segment_times": outbound["segment_times"] + inbound["segment_times"],
+            "max_speed_reached": max(outbound["max_speed"], inbound["max_speed"]),
+        }
+        if dt_selection is not None:
+            result["dt_selection"] = dt_selection
+        return result
+
+    def resolve_dt(self, params):
+        """
+        Aplica o modo precisão: com arrival_tolerance, substitui dt pelo passo escolhido
+
+        Returns:
+            (parâmetros com dt resolvido, relatório da escolha ou None)
+        """
+        tolerance = getattr(params, "arrival_tolerance", None)
+        if not tolerance:
+            return params, None
+        selection = self.select_dt(params, tolerance)
+        resolved = copy.copy(params)
+        resolved.dt = selection["dt"]
+        resolved.arrival_tolerance = None
+        return resolved, selection
+
+    def select_dt(self, params, tolerance: float) -> Dict[str, Any]:
+        """
+        Maior passo de DT_LADDER cujo erro estimado nas chegadas cabe na tolerância
+
+        O erro de um segmento no passo h é estimado por step-doubling: a maior
+        diferença do tempo de chegada contra as soluções com h/2 e h/4. Os erros
+        dos segmentos se acumulam ao longo da viagem, então o erro reportado é a
+        soma sobre todos os segmentos da ida e volta (pior chegada: a última).
+        A escolha fica em cache por física, tolerância e conjunto de segmentos.
+        """
+        stations, return_stations, _ = self._prepare_stations(params)
+        physics = self.build_physics(params)
+        distances = [end[1] - start[1] for sequence in (stations, return_stations)
+                     for start, end in zip(sequence, sequence[1:])]
+        key = (physics.cache_key, tolerance, tuple(distances))
+        return self.dt_cache.get_or_create(key, lambda: self._search_dt(physics, distances, tolerance))
+
+    def _search_dt(self, physics: TrainPhysics, distances: List[float], tolerance: float) -> Dict[str, Any]:
+        distinct = sorted(set(distances))
+        counts = np.array([distances.count(d) for d in distinct])
+        durations: Dict[int, np.ndarray] = {}
+
+        def level(k: int) -> np.ndarray:
+            if k not in durations:
+                solver = RK4Solver(dt=2.0 ** -k)
+                durations[k] = np.array([
+                    self._segment_summary(solver, physics, 0.0, 0.0, d)["duration"] for d in distinct
+                ])
+            return durations[k]
+
+        error = float("inf")
+        for k, dt in enumerate(DT_LADDER):
+            segment_error = np.maximum(np.abs(level(k) - level(k + 1)), np.abs(level(k) - level(k + 2)))
+            error = float(np.sum(segment_error * counts))
+            if error <= tolerance:
+                break
+
+        return {
+            "dt": dt,
+            "tolerance": tolerance,
+            "estimated_error": error,
+            "met": error <= tolerance,
+            "levels_evaluated": len(durations),
+        }
+
+    def run_stochastic(self, params, samples: int = 1000, seed: Optional[int] = None,
+                       dwell_time: Any = None, station_dwell: Optional[Dict[str, Any]] = None,
+                       initial_accel: Any = None, max_speed: Any = None,
+                       percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                       max_physics: Optional[int] = None,
+                       checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """
+        Modo Monte Carlo: distribuição do tempo de ida e volta e das chegadas
+
+        Amostras de física são quantizadas (campo resolution da distribuição) e
+        cada física distinta é integrada uma única vez no modo só-cronograma.
+        Dwells apenas deslocam a linha do tempo, então cada amostra é uma soma
+        cumulativa vetorizada de tempos de segmento e dwells.
+
+        Args:
+            params: Parâmetros base (valores usados onde não há distribuição)
+            samples: Número de amostras
+            seed: Semente do gerador (resultados reproduzíveis)
+            dwell_time: Distribuição do dwell em todas as paradas
+            station_dwell: Distribuição do dwell por nome de estação (sobrepõe dwell_time)
+            initial_accel, max_speed: Distribuições dos parâmetros de desempenho
+            percentiles: Percentis reportados
+            max_physics: Limite de físicas distintas (ValueError antes de integrar)
+
+        Returns:
+            round_trip_time e chegadas por parada agregados, física distinta integrada
+            e tempo de cálculo
+        """
+        if samples < 1:
+            raise ValueError("samples deve ser >= 1")
+        started = time.perf_counter()
+        rng = np.random.default_rng(seed)
+
+        stations, return_stations, _ = self._prepare_stations(params)
+        stops = ([(name, "outbound") for name, _ in stations[1:]] +
+                 [(name, "return") for name, _ in return_stations[1:]])
+        outbound_stops = len(stations) - 1
+
+        # Física por amostra (quantizada) e integração única por física distinta
+        columns = []
+        for name, spec in (("initial_accel", initial_accel), ("max_speed", max_speed)):
+            values = sample_distribution(spec, samples, rng, getattr(params, name))
+            if spec is not None:
+                values = quantize(values, spec_value(spec, "resolution") or DEFAULT_RESOLUTION[name])
+            if np.any(values <= 0):
+                raise ValueError(f"Amostras de {name} devem ser > 0 (use low para truncar)")
+            columns.append(values)
+        distinct, inverse = np.unique(np.column_stack(columns), axis=0, return_inverse=True)
+        if max_physics is not None and len(distinct) > max_physics:
+            raise ValueError(f"{len(distinct)} físicas distintas excedem o limite de {max_physics}; "
+                             "aumente resolution ou reduza a dispersão")
+
+        distinct_times = np.empty((len(distinct), len(stops)))
+        for i, (accel, speed) in enumerate(distinct):
+            variant = copy.copy(params)
+            variant.initial_accel = float(accel)
+            variant.max_speed = float(speed)
+            distinct_times[i] = self.run_schedule(variant, checkpoint=checkpoint)["segment_times"]
+        segment_times = distinct_times[inverse.ravel()]
+
+        station_dwell = station_dwell or {}
+        dwells = np.empty((samples, len(stops)))
+        for j, (name, _) in enumerate(stops):
+            spec = station_dwell.get(name, dwell_time)
+            dwells[:, j] = np.maximum(sample_distribution(spec, samples, rng, params.dwell_time), 0.0)
+
+        # Chegada k: segmentos até k + dwells anteriores (+ layover na volta)
+        arrivals = np.cumsum(segment_times, axis=1) + np.cumsum(dwells, axis=1) - dwells
+        arrivals[:, outbound_stops:] += params.terminal_layover
+        round_trip = arrivals[:, -1] + dwells[:, -1]
+
+        return {
+            "samples": samples,
+            "seed": seed,
+            "distinct_physics": len(distinct),
+            "round_trip_time": summarize(round_trip, percentiles),
+            "stops": [
+                {"station": name, "direction": direction, "arrival": stats}
+                for (name, direction), stats in zip(stops, summarize(arrivals, percentiles))
+            ],
+            "compute_time_s": time.perf_counter() - started,
+        }
+
+    def _prepare_stations(self, params):
+        """Estações da ida (em metros, ordenadas), da volta espelhada e distância total"""
+        stations = [(s.name, s.km * 1000) for s in params.stations]  # Converter km para metros
+        stations.sort(key=lambda x: x[1])  # Ordenar por posição
+
+        # Calcular distância total
+        total_distance = stations[-1][1] - stations[0][1]
+
+        # Espelhamento direto: 0km→0km, 5km→10km, 15km→0km (preserva distâncias reais)
+        max_distance = stations[-1][1]  # Distância da última estação
+        return_stations = [(name, max_distance - original_pos) for name, original_pos in reversed(stations)]
+
+        return stations, return_stations, total_distance
+
+    def _schedule_direction(self, solver: RK4Solver, physics: TrainPhysics,
+                            stations: List[tuple], dwell_time: float, time_offset: float = 0,
+                            checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """Equivalente a _simulate_direction para o modo só-cronograma (memória O(1) por segmento)"""
+        schedule = []
+        segment_times = []
+        max_speed = 0.0
+        current_time = time_offset
+
+        for i in range(len(stations) - 1):
+            summary = self._segment_summary(solver, physics, stations[i][1], 0.0, stations[i + 1][1])
+
+            arrival_time = summary["duration"] + current_time
+            departure_time = arrival_time + dwell_time
+            schedule.append({
+                "station": stations[i + 1][0],
+                "arrival_time": arrival_time,
+                "departure_time": departure_time
+            })
+            segment_times.append(summary["duration"])
+            max_speed = max(max_speed, summary["max_speed"])
+            current_time = departure_time
+
+            if checkpoint is not None:
+                checkpoint()
+
+        return {
+            "schedule": schedule,
+            "segment_times": segment_times,
+            "max_speed": max_speed,
+            "final_time": current_time
+        }
+
     def _simulate_direction(self, solver: RK4Solver, physics: TrainPhysics,
                           stations: List[tuple], dwell_time: float,
                           direction: str, time_offset: float = 0,
-                          total_distance: float = 0) -> Dict[str, Any]:
+                          total_distance: float = 0,
+                          checkpoint: Optional[Callable[[], None]] = None,
+                          record_every: int = 1) -> Dict[str, Any]:
         """Simula movimento em uma direção"""
+        started = time.perf_counter()
+        span = start_span("direction", direction=direction, segments=len(stations) - 1)
 
         all_time = []
         all_position = []
@@ -178,7 +634,7 @@ class SimulationService:
             # Simular movimento até a próxima estação com extensão automática
             t, pos, vel = self._simulate_with_extension(
                 solver, physics, current_position, current_velocity,
-                end_station[1], current_time
+                end_station[1], current_time, record_every=record_every
             )
 
             # Encontrar quando chegamos na estação
@@ -228,6 +684,11 @@ class SimulationService:
             current_position = end_station[1]  # Posição simulada (antes de conversão)
             current_velocity = 0.0
 
+            if checkpoint is not None:
+                checkpoint()
+
+        STAGE_DURATION.observe(time.perf_counter() - started, stage="direction")
+        span.end()
         return {
             "time": all_time,
             "position": all_position,
@@ -317,10 +778,116 @@ class SimulationService:
 
     def _simulate_with_extension(self, solver: RK4Solver, physics: TrainPhysics,
                                start_pos: float, start_vel: float, target_pos: float,
-                               start_time: float, max_extensions: int = 3):
-        """Simula com extensão automática até atingir target"""
+                               start_time: float, max_extensions: int = 3,
+                               record_every: int = 1):
+        """
+        Simula com extensão automática até atingir target
+
+        A trajetória depende apenas da distância do segmento, da física e do dt,
+        então é calculada em coordenadas relativas (t=0, pos=0), guardada no
+        cache de segmentos e deslocada para start_time/start_pos.
+        """
+        started = time.perf_counter()
+        relative_target = target_pos - start_pos
+        span = start_span("segment", distance=relative_target)
+        key = self._segment_key(physics, solver.dt, relative_target, start_vel, max_extensions, record_every)
+
+        source = "memory"
+        cached = self.segment_cache.get(key)
+        if cached is None and self.segment_store is not None:
+            source = "store"
+            cached = self.segment_store.get(key)
+            if cached is not None:
+                self.segment_cache.put(key, cached)
+        if cached is None:
+            source = "integrated"
+            cached = self._solve_segment(solver, physics, start_vel, relative_target, max_extensions,
+                                         record_every, trace_span=span)
+            for array in cached:
+                array.flags.writeable = False
+            self.segment_cache.put(key, cached)
+            if self.segment_store is not None:
+                self.segment_store.put(key, cached)
+
+        t, pos, vel = cached
+        shifted = t + start_time, pos + start_pos, vel.copy()
+        SEGMENT_DURATION.observe(time.perf_counter() - started, source=source)
+        span.set(source=source, points=len(t))
+        span.end()
+        return shifted
+
+    def _segment_key(self, physics: TrainPhysics, dt: float, relative_target: float,
+                     start_vel: float = 0.0, max_extensions: int = 3, record_every: int = 1) -> tuple:
+        key = (physics.cache_key, dt, relative_target, start_vel, max_extensions)
+        # Trajetórias amostradas têm chave própria; a completa mantém a chave original
+        return key + (record_every,) if record_every != 1 else key
+
+    def _segment_summary(self, solver: RK4Solver, physics: TrainPhysics,
+                         start_pos: float, start_vel: float, target_pos: float,
+                         max_extensions: int = 3) -> Dict[str, float]:
+        """Duração, velocidade máxima e passos de um segmento (sem trajetória)"""
+        relative_target = target_pos - start_pos
+        key = self._segment_key(physics, solver.dt, relative_target, start_vel, max_extensions)
+
+        summary = self.segment_summary_cache.get(key)
+        if summary is None:
+            trajectory = self.segment_cache.peek(key)
+            if trajectory is None and self.segment_store is not None:
+                trajectory = self.segment_store.get(key)
+            if trajectory is not None:
+                summary = self._summary_from_trajectory(*trajectory, relative_target)
+            else:
+                summary = self._solve_segment_summary(solver, physics, start_vel, relative_target, max_extensions)
+            self.segment_summary_cache.put(key, summary)
+        return summary
+
+    def _summary_from_trajectory(self, t: np.ndarray, pos: np.ndarray, vel: np.ndarray,
+                                 target_distance: float) -> Dict[str, float]:
+        arrival_idx = self._find_arrival_index(pos, target_distance)
+        return {
+            "duration": float(t[arrival_idx]),
+            "max_speed": float(vel[:arrival_idx].max()) if arrival_idx > 0 else 0.0,
+            "steps": len(t) - 1,
+        }
+
+    def _solve_segment_summary(self, solver: RK4Solver, physics: TrainPhysics,
+                               start_vel: float, target_distance: float,
+                               max_extensions: int) -> Dict[str, float]:
+        """Mesma lógica de extensão de _solve_segment usando RK4Solver.solve_final"""
+        current_span = self._estimate_travel_time(
+            abs(target_distance), physics.max_speed, physics.initial_accel
+        )
 
-        segment_distance = abs(target_pos - start_pos)
+        for attempt in range(max_extensions + 1):
+            final = solver.solve_final(
+                initial_position=0.0,
+                initial_velocity=start_vel,
+                time_span=(0.0, current_span),
+                acceleration_func=physics.acceleration_function,
+                target_position=target_distance,
+                use_braking=True
+            )
+            final_distance = abs(final["final_position"] - target_distance)
+            if final_distance < POSITION_TOLERANCE:
+                break
+            current_span *= 1.5
+            SEGMENT_EXTENSIONS.inc()
+
+        if final_distance >= POSITION_TOLERANCE:
+            logger.error(f"   ⚠️  Falha ao alcançar target após {max_extensions+1} tentativas. Distância final: {final_distance:.2f}m")
+
+        return {
+            "duration": final["arrival_time"],
+            "max_speed": final["max_velocity"],
+            "steps": final["steps"],
+        }
+
+    def _solve_segment(self, solver: RK4Solver, physics: TrainPhysics,
+                       start_vel: float, target_distance: float, max_extensions: int,
+                       record_every: int = 1, trace_span=NULL_SPAN):
+        """Integra um segmento em coordenadas relativas, estendendo o horizonte se necessário"""
+        steps = 0
+        segment_distance = abs(target_distance)
         estimated_time = self._estimate_travel_time(
             segment_distance, physics.max_speed, physics.initial_accel
         )
@@ -328,27 +895,31 @@ class SimulationService:
 
         for attempt in range(max_extensions + 1):
             t, pos, vel = solver.solve(
-                initial_position=start_pos,
+                initial_position=0.0,
                 initial_velocity=start_vel,
-                time_span=(start_time, start_time + current_span),
+                time_span=(0.0, current_span),
                 acceleration_func=physics.acceleration_function,
-                target_position=target_pos,
-                use_braking=True
+                target_position=target_distance,
+                use_braking=True,
+                record_every=record_every
             )
+            steps += solver.last_steps
 
             # Verificar se chegou próximo do alvo
-            final_distance = abs(pos[-1] - target_pos)
+            final_distance = abs(pos[-1] - target_distance)
             if final_distance < POSITION_TOLERANCE:
                 logger.info(f"   Chegada bem-sucedida em {attempt+1} tentativa(s): distância final {final_distance:.2f}m")
                 break
 
             # Estender tempo para próxima tentativa
             current_span *= 1.5
+            SEGMENT_EXTENSIONS.inc()
             logger.warning(f"   Estendendo tempo de simulação para {current_span:.1f}s (tentativa {attempt+1})")
 
         if final_distance >= POSITION_TOLERANCE:
             logger.error(f"   ⚠️  Falha ao alcançar target após {max_extensions+1} tentativas. Distância final: {final_distance:.2f}m")
 
+        trace_span.set(steps=steps, extensions=attempt)
         return t, pos, vel
 
     def _find_arrival_index(self, positions: np.ndarray, target_position: float) -> int:
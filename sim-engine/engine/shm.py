@@ -0,0 +1,155 @@
+"""
+Shared Memory Module
+Entrega de colunas de resultado entre processos sem serialização
+
+O worker copia as colunas numéricas para um bloco multiprocessing.shared_memory
+e devolve apenas um descritor pequeno (nome do bloco, layout e metadados).
+O processo da API mapeia o bloco (views NumPy sem cópia) e é o dono do ciclo
+de vida: release() fecha e remove o bloco. Se o processo dono morrer sem
+liberar, o resource tracker do multiprocessing remove o bloco na saída.
+
+render() serializa a resposta direto das views; to_result() copia as colunas
+para listas e só serve a quem precisa do dict de run_simulation.
+"""
+
+import os
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+RESULT_COLUMNS = ("time", "position", "velocity")
+
+T = TypeVar("T")
+
+
+def _tracker_name(name: str) -> str:
+    """Nome do bloco no resource tracker: o do shm_open, com a barra que SharedMemory.name omite no POSIX"""
+    return name if name.startswith("/") else "/" + name
+
+
+class SharedResult:
+    """Descritor picklável de colunas float64 em um bloco de memória compartilhada"""
+
+    def __init__(self, name: str, layout: Dict[str, Tuple[int, int]], metadata: Dict[str, Any]):
+        self.name = name
+        self.layout = layout  # coluna -> (offset em elementos, comprimento)
+        self.metadata = metadata
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._released = False
+
+    @classmethod
+    def export(cls, result: Dict[str, Any], columns: Sequence[str] = RESULT_COLUMNS) -> "SharedResult":
+        """
+        Copia as colunas de `result` para um novo bloco (lado do worker)
+
+        As demais chaves de `result` seguem em metadata (pickle normal, pequenas).
+        """
+        arrays = {name: np.asarray(result[name], dtype=np.float64) for name in columns}
+        total = sum(len(array) for array in arrays.values())
+
+        shm = shared_memory.SharedMemory(create=True, size=max(total, 1) * 8)
+        try:
+            buffer = np.ndarray((total,), dtype=np.float64, buffer=shm.buf)
+            layout = {}
+            offset = 0
+            for name, array in arrays.items():
+                buffer[offset:offset + len(array)] = array
+                layout[name] = (offset, len(array))
+                offset += len(array)
+            del buffer
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+        metadata = {key: value for key, value in result.items() if key not in arrays}
+        # Fecha apenas o mapeamento do worker; o bloco passa a pertencer ao receptor.
+        # Sem o unregister, o resource tracker do worker removeria o bloco quando
+        # o worker terminasse, mesmo que o receptor ainda não o tivesse lido.
+        shm.close()
+        if os.name == "posix":
+            resource_tracker.unregister(_tracker_name(shm.name), "shared_memory")
+        return cls(shm.name, layout, metadata)
+
+    def __getstate__(self):
+        return {"name": self.name, "layout": self.layout, "metadata": self.metadata}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+        self._released = False
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Views somente leitura sobre o bloco (sem cópia); válidas até release()"""
+        if self._released:
+            raise ValueError(f"Bloco {self.name} já foi liberado")
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        views = {}
+        for name, (offset, length) in self.layout.items():
+            view = np.ndarray((length,), dtype=np.float64, buffer=self._shm.buf, offset=offset * 8)
+            view.flags.writeable = False
+            views[name] = view
+        return views
+
+    def render(self, fn: Callable[[Dict[str, Any]], T]) -> T:
+        """
+        fn(resultado com as colunas como views) com o bloco mapeado; libera em seguida
+
+        Caminho sem cópia: fn serializa direto das views (p.ex. encoding.result_json)
+        e não pode guardar referências a elas no que devolve.
+        """
+        views = self.arrays()
+        result = {**views, **self.metadata}
+        del views
+        try:
+            return fn(result)
+        finally:
+            # O traceback de uma exceção ainda referencia o dict: esvaziar solta as views
+            result.clear()
+            self.release()
+
+    def to_result(self) -> Dict[str, Any]:
+        """Resultado no formato de run_simulation (colunas copiadas para listas) e libera o bloco"""
+        try:
+            views = self.arrays()
+            result = {name: view.tolist() for name, view in views.items()}
+            del views
+        finally:
+            self.release()
+        result.update(self.metadata)
+        return result
+
+    def release(self) -> None:
+        """
+        Fecha o mapeamento e remove o bloco (idempotente)
+
+        As views de arrays() devem ter sido descartadas antes; se alguma ainda
+        estiver viva, o bloco é removido e o mapeamento fica para o GC.
+        """
+        if self._released:
+            return
+        try:
+            shm = self._shm or shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            self._released = True
+            return
+        try:
+            shm.close()
+        except BufferError:
+            # Views ainda referenciadas (p.ex. por um traceback): o mapeamento
+            # sai com elas no GC, mas o bloco é removido agora
+            pass
+        self._shm = None
+        self._released = True
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SharedResult":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
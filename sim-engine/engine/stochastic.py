@@ -0,0 +1,98 @@
+"""
+Stochastic Module
+Amostragem de distribuições e agregação em percentis para o modo Monte Carlo
+
+Distribuições são dicts no formato de DistributionDto:
+    {"distribution": "normal", "mean": 30, "std": 5, "low": 10, "high": 60}
+"""
+
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+DISTRIBUTIONS = ("fixed", "normal", "lognormal", "uniform", "triangular")
+DEFAULT_PERCENTILES = (5.0, 50.0, 95.0, 99.0)
+
+# Resolução padrão ao quantizar amostras de física (define o reuso de segmentos)
+DEFAULT_RESOLUTION = {"initial_accel": 0.01, "max_speed": 0.1}
+
+
+def spec_value(spec: Any, name: str) -> Optional[float]:
+    """Campo de uma distribuição (dict ou DistributionDto)"""
+    if hasattr(spec, "model_dump"):
+        spec = spec.model_dump()
+    return spec.get(name)
+
+
+def sample_distribution(spec: Any, size: Any, rng: np.random.Generator,
+                        default: Optional[float] = None) -> np.ndarray:
+    """
+    Amostras de uma distribuição (None = valor fixo `default`)
+
+    Os limites low/high, quando informados, truncam as amostras (clip).
+    """
+    if spec is None:
+        return np.full(size, float(default))
+
+    kind = spec_value(spec, "distribution") or "fixed"
+    mean = spec_value(spec, "mean")
+    std = spec_value(spec, "std") or 0.0
+    low = spec_value(spec, "low")
+    high = spec_value(spec, "high")
+
+    if kind == "fixed":
+        values = np.full(size, float(mean if mean is not None else default))
+    elif kind == "normal":
+        values = rng.normal(mean if mean is not None else default, std, size)
+    elif kind == "lognormal":
+        # mean/std referem-se à própria variável (não ao log)
+        center = mean if mean is not None else default
+        sigma2 = np.log1p((std / center) ** 2)
+        values = rng.lognormal(np.log(center) - sigma2 / 2, np.sqrt(sigma2), size)
+    elif kind == "uniform":
+        if low is None or high is None:
+            raise ValueError("Distribuição uniform requer low e high")
+        values = rng.uniform(low, high, size)
+    elif kind == "triangular":
+        if low is None or high is None:
+            raise ValueError("Distribuição triangular requer low e high")
+        mode = spec_value(spec, "mode")
+        values = rng.triangular(low, mode if mode is not None else 0.5 * (low + high), high, size)
+    else:
+        raise ValueError(f"Distribuição desconhecida: {kind}")
+
+    if low is not None or high is not None:
+        values = np.clip(values, low, high)
+    return values
+
+
+def quantize(values: np.ndarray, resolution: Optional[float]) -> np.ndarray:
+    """Arredonda para múltiplos de `resolution` (amostras próximas compartilham segmentos)"""
+    if not resolution:
+        return values
+    return np.round(values / resolution) * resolution
+
+
+def summarize(values: np.ndarray, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+              axis: int = 0) -> Any:
+    """Média, desvio, extremos e percentis ao longo de `axis`"""
+    points = np.percentile(values, percentiles, axis=axis)
+    stats = {
+        "mean": np.mean(values, axis=axis),
+        "std": np.std(values, axis=axis),
+        "min": np.min(values, axis=axis),
+        "max": np.max(values, axis=axis),
+    }
+    if np.ndim(stats["mean"]) == 0:
+        return {
+            **{key: float(value) for key, value in stats.items()},
+            "percentiles": {f"p{p:g}": float(v) for p, v in zip(percentiles, points)},
+        }
+    # Uma entrada por coluna
+    return [
+        {
+            **{key: float(value[i]) for key, value in stats.items()},
+            "percentiles": {f"p{p:g}": float(points[k][i]) for k, p in enumerate(percentiles)},
+        }
+        for i in range(len(stats["mean"]))
+    ]
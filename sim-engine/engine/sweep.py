@@ -0,0 +1,385 @@
+"""
+Sweep Module
+Estudos paramétricos (grid, Latin hypercube, aleatório) sobre SimulationParamsDto
+
+Uso via linha de comando:
+    python -m engine.sweep spec.json --checkpoint sweep.jsonl --workers 4
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import secrets
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .schemas import AccelerationCurveConfig, SimulationParamsDto
+from .service import SimulationService
+
+try:
+    import fcntl
+except ImportError:  # fora do POSIX não há trava entre processos
+    fcntl = None
+
+SWEEP_PARAMETERS = ("initial_accel", "threshold_speed", "max_speed",
+                    "dwell_time", "terminal_layover", "loss_factor")
+SWEEP_STRATEGIES = ("grid", "lhs", "random")
+
+
+# --------------------------------------------------------------- expansão
+
+def _axis_values(spec: Dict[str, Any]) -> List[float]:
+    """Valores de um eixo do grid: lista explícita ou linspace(min, max, steps)"""
+    if spec.get("values"):
+        return [float(v) for v in spec["values"]]
+    steps = int(spec.get("steps", 5))
+    return np.linspace(spec["min"], spec["max"], steps).tolist()
+
+
+def _bounds(spec: Dict[str, Any]) -> Tuple[float, float]:
+    if spec.get("values"):
+        return float(min(spec["values"])), float(max(spec["values"]))
+    return float(spec["min"]), float(spec["max"])
+
+
+def validate_parameters(parameters: Dict[str, Dict[str, Any]], strategy: str) -> None:
+    unknown = set(parameters) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Parâmetros não suportados no sweep: {sorted(unknown)}")
+    if strategy not in SWEEP_STRATEGIES:
+        raise ValueError(f"Estratégia desconhecida: {strategy}")
+    for name, spec in parameters.items():
+        if not spec.get("values") and (spec.get("min") is None or spec.get("max") is None):
+            raise ValueError(f"Parâmetro {name}: informe min/max ou values")
+
+
+def expand_points(parameters: Dict[str, Dict[str, Any]], strategy: str = "grid",
+                  samples: int = 100, seed: Optional[int] = None) -> Iterator[Dict[str, float]]:
+    """
+    Gera os pontos do estudo de forma preguiçosa
+
+    Args:
+        parameters: nome do parâmetro -> {min, max, steps} ou {values}
+        strategy: "grid" (produto cartesiano), "lhs" (Latin hypercube) ou "random"
+        samples: número de pontos para lhs/random
+        seed: semente do gerador (pontos reproduzíveis para retomar o estudo)
+    """
+    validate_parameters(parameters, strategy)
+    names = list(parameters)
+
+    if strategy == "grid":
+        axes = [_axis_values(parameters[name]) for name in names]
+        for combo in itertools.product(*axes):
+            yield dict(zip(names, combo))
+        return
+
+    rng = np.random.default_rng(seed)
+    bounds = [_bounds(parameters[name]) for name in names]
+
+    if strategy == "lhs":
+        # Uma permutação dos estratos por dimensão: O(samples * dims) inteiros
+        strata = [rng.permutation(samples) for _ in names]
+        for i in range(samples):
+            point = {}
+            for name, (low, high), perm in zip(names, bounds, strata):
+                u = (perm[i] + rng.random()) / samples
+                point[name] = low + u * (high - low)
+            yield point
+        return
+
+    for _ in range(samples):
+        yield {name: low + rng.random() * (high - low) for name, (low, high) in zip(names, bounds)}
+
+
+def count_points(parameters: Dict[str, Dict[str, Any]], strategy: str, samples: int) -> int:
+    validate_parameters(parameters, strategy)
+    if strategy == "grid":
+        return int(np.prod([len(_axis_values(spec)) for spec in parameters.values()]))
+    return samples
+
+
+# --------------------------------------------------------------- avaliação
+
+def apply_point(base: Dict[str, Any], values: Dict[str, float]) -> SimulationParamsDto:
+    """Aplica os valores de um ponto aos parâmetros base (com validação)"""
+    payload = dict(base)
+    for name, value in values.items():
+        if name == "loss_factor":
+            curve = dict(payload.get("acceleration_curve_config") or AccelerationCurveConfig().model_dump())
+            curve["loss_factor"] = value
+            payload["acceleration_curve_config"] = curve
+        else:
+            payload[name] = value
+    return SimulationParamsDto(**payload)
+
+
+def summarize_result(result: Dict[str, Any], terminal_layover: float) -> Dict[str, Any]:
+    """Métricas resumidas de uma simulação completa (sem trajetórias)"""
+    schedule = result["schedule"]
+    half = len(schedule) // 2
+    segment_times = []
+    previous_departure = 0.0
+    for i, entry in enumerate(schedule):
+        if i == half:
+            # Volta parte do terminal após o layover
+            previous_departure += terminal_layover
+        segment_times.append(entry["arrival_time"] - previous_departure)
+        previous_departure = entry["departure_time"]
+
+    return {
+        "total_time": schedule[-1]["departure_time"] if schedule else 0.0,
+        "segment_times": segment_times,
+        "max_speed_reached": max(result["velocity"]) if result["velocity"] else 0.0,
+    }
+
+
+def evaluate_point(service: SimulationService, base: Dict[str, Any], values: Dict[str, float],
+                   include_trajectory: bool = False,
+                   checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    params = apply_point(base, values)
+    if not include_trajectory:
+        # Caminho só-cronograma: sem trajetórias por passo
+        schedule = service.run_schedule(params, checkpoint=checkpoint)
+        return {
+            "total_time": schedule["total_time"],
+            "segment_times": schedule["segment_times"],
+            "max_speed_reached": schedule["max_speed_reached"],
+        }
+
+    result = service.run_simulation(params, checkpoint=checkpoint)
+    summary = summarize_result(result, params.terminal_layover)
+    summary["result"] = result
+    return summary
+
+
+_process_service: Optional[SimulationService] = None
+
+
+def _evaluate_in_process(base: Dict[str, Any], values: Dict[str, float],
+                         include_trajectory: bool = False) -> Dict[str, Any]:
+    """Avaliação em processo filho (um SimulationService com caches por processo)"""
+    global _process_service
+    if _process_service is None:
+        _process_service = SimulationService()
+    return evaluate_point(_process_service, base, values, include_trajectory)
+
+
+# --------------------------------------------------------------- checkpoint
+
+class SweepLockedError(RuntimeError):
+    """Outro run_sweep já está escrevendo no mesmo checkpoint"""
+
+
+def sweep_fingerprint(base: Dict[str, Any], parameters: Dict[str, Any], strategy: str,
+                      samples: int, seed: Optional[int], include_trajectories: bool = False) -> str:
+    spec = {"base": base, "parameters": parameters, "strategy": strategy,
+            "samples": samples, "seed": seed, "include_trajectories": include_trajectories}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def open_checkpoint(path: str):
+    """
+    Abre o checkpoint para append com trava exclusiva (liberada ao fechar)
+
+    Dois estudos anexando ao mesmo arquivo intercalariam pontos: o segundo
+    falha com SweepLockedError em vez de esperar.
+    """
+    checkpoint_file = open(path, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(checkpoint_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            checkpoint_file.close()
+            raise SweepLockedError(f"Checkpoint {path} em uso por outro estudo em execução") from None
+    return checkpoint_file
+
+
+def read_checkpoint_header(path: str) -> Optional[Dict[str, Any]]:
+    """Cabeçalho (primeira linha) do checkpoint, ou None se o arquivo não existe ou está vazio"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        line = f.readline().strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        raise ValueError(f"Checkpoint {path} com cabeçalho inválido") from None
+
+
+def load_checkpoint(path: str, fingerprint: str) -> Dict[int, Dict[str, Any]]:
+    """Lê os pontos já concluídos; falha se o arquivo pertence a outro estudo"""
+    done: Dict[int, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return done
+
+    with open(path) as f:
+        for line_number, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # última linha truncada por uma interrupção
+            if line_number == 0:
+                if record.get("sweep") != fingerprint:
+                    raise ValueError(f"Checkpoint {path} pertence a outro estudo")
+                continue
+            done[record["index"]] = record
+    return done
+
+
+# --------------------------------------------------------------- execução
+
+def run_sweep(base: Dict[str, Any], parameters: Dict[str, Dict[str, Any]],
+              strategy: str = "grid", samples: int = 100, seed: Optional[int] = None,
+              checkpoint_path: Optional[str] = None,
+              submit: Optional[Callable[..., Future]] = None,
+              service: Optional[SimulationService] = None,
+              max_in_flight: int = 16,
+              include_trajectories: bool = False) -> Dict[str, Any]:
+    """
+    Executa um estudo paramétrico
+
+    Args:
+        base: Parâmetros base (dict de SimulationParamsDto)
+        parameters: Faixas por parâmetro (ver expand_points)
+        seed: Semente de lhs/random; com checkpoint e sem semente, uma é sorteada e
+            gravada no cabeçalho para que a retomada reproduza o mesmo desenho
+        checkpoint_path: Arquivo JSONL de pontos concluídos; se existir, o estudo é
+            retomado. Travado durante a execução (SweepLockedError se já em uso)
+        submit: `submit(values) -> Future` que avalia um ponto no pool de workers;
+            None executa em série neste processo
+        service: SimulationService usado quando os pontos rodam neste processo
+        max_in_flight: Máximo de pontos submetidos e ainda não concluídos
+
+    Returns:
+        Dicionário com os pontos (valores + métricas resumidas ou erro) em ordem
+    """
+    if strategy == "grid" and seed is not None:
+        seed = None  # grid é determinístico
+    service = service or SimulationService()
+
+    done: Dict[int, Dict[str, Any]] = {}
+    checkpoint_file = open_checkpoint(checkpoint_path) if checkpoint_path else None
+    try:
+        if checkpoint_file and strategy != "grid" and seed is None:
+            # Retomar exige o mesmo desenho: a semente sorteada fica no cabeçalho
+            header = read_checkpoint_header(checkpoint_path) or {}
+            seed = header.get("seed")
+            if seed is None:
+                seed = secrets.randbits(63)
+        fingerprint = sweep_fingerprint(base, parameters, strategy, samples, seed, include_trajectories)
+
+        if checkpoint_file:
+            done = load_checkpoint(checkpoint_path, fingerprint)
+            if os.path.getsize(checkpoint_path) > 0:
+                # Garantir que a próxima linha não se junte a uma linha truncada
+                with open(checkpoint_path, "rb") as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    if existing.read(1) != b"\n":
+                        checkpoint_file.write("\n")
+            else:
+                checkpoint_file.write(json.dumps({"sweep": fingerprint, "seed": seed}) + "\n")
+                checkpoint_file.flush()
+    except BaseException:
+        if checkpoint_file:
+            checkpoint_file.close()
+        raise
+    resumed = len(done)
+
+    def record(index: int, values: Dict[str, float], outcome: Any) -> None:
+        entry: Dict[str, Any] = {"index": index, "values": values}
+        if isinstance(outcome, BaseException):
+            entry["error"] = str(outcome)
+        else:
+            entry["metrics"] = outcome
+        done[index] = entry
+        if checkpoint_file:
+            checkpoint_file.write(json.dumps(entry, default=float) + "\n")
+            checkpoint_file.flush()
+
+    in_flight: deque = deque()
+
+    def drain(limit: int) -> None:
+        while len(in_flight) > limit:
+            index, values, future = in_flight.popleft()
+            try:
+                record(index, values, future.result())
+            except Exception as e:
+                record(index, values, e)
+
+    try:
+        for index, values in enumerate(expand_points(parameters, strategy, samples, seed)):
+            if index in done:
+                continue
+            if submit is None:
+                try:
+                    record(index, values, evaluate_point(service, base, values, include_trajectories))
+                except Exception as e:
+                    record(index, values, e)
+                continue
+            in_flight.append((index, values, submit(values)))
+            drain(max_in_flight)
+        drain(0)
+    finally:
+        if checkpoint_file:
+            checkpoint_file.close()
+
+    return {
+        "fingerprint": fingerprint,
+        "strategy": strategy,
+        "seed": seed,
+        "total_points": len(done),
+        "resumed_points": resumed,
+        "points": [done[i] for i in sorted(done)],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Parameter sweep over SimulationParamsDto")
+    parser.add_argument("spec", help="JSON com base, parameters, strategy, samples e seed")
+    parser.add_argument("--checkpoint", help="Arquivo JSONL para checkpoint/retomada")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="Arquivo de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+
+    base = SimulationParamsDto(**spec["base"]).model_dump(exclude_none=True, exclude={"priority"})
+    options = dict(
+        strategy=spec.get("strategy", "grid"),
+        samples=spec.get("samples", 100),
+        seed=spec.get("seed"),
+        checkpoint_path=args.checkpoint,
+    )
+
+    if args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            result = run_sweep(
+                base, spec["parameters"],
+                submit=lambda values: pool.submit(_evaluate_in_process, base, values),
+                max_in_flight=args.workers * 4, **options
+            )
+    else:
+        result = run_sweep(base, spec["parameters"], **options)
+
+    output = json.dumps(result, indent=2, default=float)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
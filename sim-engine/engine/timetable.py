@@ -0,0 +1,119 @@
+"""
+Timetable Module
+Quadro de horários do dia a partir de uma única ida e volta simulada
+
+O ciclo é calculado uma vez (modo só-cronograma) e os horários de todas as
+partidas saem de uma soma externa partidas x paradas. Trajetórias densas
+são geradas sob demanda, uma partida por vez.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .service import SimulationService
+
+
+def round_trip_stops(service: SimulationService, params,
+                     checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Paradas de uma ida e volta com chegada e partida relativas à partida da origem
+
+    A partida do terminal inclui o layover (início efetivo da volta).
+
+    Returns:
+        stops (station, direction, arrival_offset, departure_offset) e round_trip_time
+    """
+    stations, _, _ = service._prepare_stations(params)
+    schedule = service.run_schedule(params, checkpoint=checkpoint)
+    outbound_stops = len(stations) - 1
+
+    stops = [{"station": stations[0][0], "direction": "outbound",
+              "arrival_offset": 0.0, "departure_offset": 0.0}]
+    for i, entry in enumerate(schedule["schedule"]):
+        departure = entry["departure_time"]
+        if i == outbound_stops - 1:
+            departure += params.terminal_layover
+        stops.append({
+            "station": entry["station"],
+            "direction": "outbound" if i < outbound_stops else "return",
+            "arrival_offset": entry["arrival_time"],
+            "departure_offset": departure,
+        })
+
+    return {"stops": stops, "round_trip_time": schedule["total_time"]}
+
+
+def build_timetable(service: SimulationService, params, departures: Sequence[float],
+                    checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Horários de chegada e partida de todas as partidas do dia
+
+    Args:
+        params: Parâmetros da ida e volta (SimulationParamsDto)
+        departures: Horário de partida de cada viagem na origem (s)
+
+    Returns:
+        stops, round_trip_time e matrizes (viagens x paradas) de chegada e partida
+    """
+    departures = np.asarray(departures, dtype=float)
+    if len(departures) == 0:
+        raise ValueError("Nenhuma partida informada")
+
+    plan = round_trip_stops(service, params, checkpoint=checkpoint)
+    arrival_offsets = np.array([stop["arrival_offset"] for stop in plan["stops"]])
+    departure_offsets = np.array([stop["departure_offset"] for stop in plan["stops"]])
+
+    return {
+        "round_trip_time": plan["round_trip_time"],
+        "departures": departures.tolist(),
+        "stops": plan["stops"],
+        "arrival_times": np.add.outer(departures, arrival_offsets).tolist(),
+        "departure_times": np.add.outer(departures, departure_offsets).tolist(),
+    }
+
+
+def departure_trajectory(service: SimulationService, params, departure_time: float,
+                         checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Trajetória densa de uma viagem: a ida e volta em cache deslocada para departure_time"""
+    result = service.run_simulation(params, checkpoint=checkpoint)
+    return {
+        "time": (np.asarray(result["time"]) + departure_time).tolist(),
+        "position": result["position"],
+        "velocity": result["velocity"],
+        "schedule": [
+            {
+                "station": entry["station"],
+                "arrival_time": entry["arrival_time"] + departure_time,
+                "departure_time": entry["departure_time"] + departure_time,
+            }
+            for entry in result["schedule"]
+        ],
+    }
+
+
+def iter_trajectories(service: SimulationService, params,
+                      departures: Sequence[float]) -> Iterator[Dict[str, Any]]:
+    """Gera as trajetórias densas uma partida por vez (segmentos vêm do cache após a primeira)"""
+    for departure_time in departures:
+        yield departure_trajectory(service, params, float(departure_time))
+
+
+def timetable_runs(service: SimulationService, params, departures: Sequence[float],
+                   checkpoint: Optional[Callable[[], None]] = None) -> List[Dict[str, Any]]:
+    """
+    Viagens do quadro no formato de engine.conflicts (um cronograma compartilhado + offset)
+
+    O cronograma vem de round_trip_stops: o terminal fica ocupado durante o
+    layover e o bloco de volta só começa na partida efetiva.
+    """
+    origin, *stops = round_trip_stops(service, params, checkpoint=checkpoint)["stops"]
+    schedule = [
+        {"station": stop["station"], "arrival_time": stop["arrival_offset"],
+         "departure_time": stop["departure_offset"]}
+        for stop in stops
+    ]
+    return [
+        {"id": i, "schedule": schedule, "offset": float(departure), "origin": origin["station"]}
+        for i, departure in enumerate(departures)
+    ]
@@ -0,0 +1,217 @@
+"""
+Tracing Module
+Traces por requisição com spans aninhados, gravados em formato Chrome trace event
+
+Cada requisição amostrada ganha um Trace (contextvar, propagado às threads do
+scheduler); os spans viram eventos completos ("ph": "X") e são anexados a um
+arquivo local rotativo que abre direto em chrome://tracing, Perfetto ou speedscope.
+Sem trace ativo, start_span devolve um span nulo e não registra nada.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+REQUEST_ID_HEADER = "x-request-id"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_BACKUPS = 3
+
+
+def _microseconds(seconds: float) -> float:
+    return round(seconds * 1e6, 3)
+
+
+class Trace:
+    """Eventos de uma requisição (adicionados de qualquer thread)"""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, args: Optional[Dict[str, Any]] = None) -> None:
+        event = {
+            "name": name,
+            "cat": "sim-engine",
+            "ph": "X",
+            "ts": _microseconds(start),
+            "dur": _microseconds(end - start),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"request_id": self.request_id, **(args or {})},
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def find(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next((event for event in self.events if event["name"] == name), None)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("sim_trace", default=None)
+
+
+class Span:
+    """Intervalo aberto em um trace; `set` acrescenta atributos, `end` registra o evento"""
+
+    __slots__ = ("trace", "name", "args", "start")
+
+    def __init__(self, trace: Trace, name: str, args: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.args = args
+        self.start = time.perf_counter()
+
+    def set(self, **args) -> None:
+        self.args.update(args)
+
+    def end(self) -> None:
+        self.trace.add(self.name, self.start, time.perf_counter(), self.args)
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.end()
+
+
+class _NullSpan:
+    """Span sem trace ativo: todas as operações são no-op"""
+
+    __slots__ = ()
+
+    def set(self, **args) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+def start_span(name: str, **args):
+    """Abre um span no trace corrente (ou devolve NULL_SPAN)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return NULL_SPAN
+    return Span(trace, name, args)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+class TraceWriter:
+    """
+    Arquivo de trace rotativo no formato JSON Array do Chrome
+
+    O arquivo começa com "[" e cada evento termina em ",\\n"; o "]" final é
+    opcional no formato, então o arquivo é válido a qualquer momento. Ao passar
+    de max_bytes, o arquivo vira path.1 (path.1 -> path.2, ...) e um novo começa.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, backups: int = DEFAULT_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        payload = "".join(json.dumps(event, default=str) + ",\n" for event in events)
+        with self._lock:
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(payload) > self.max_bytes:
+                self._rotate()
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a") as f:
+                if new_file:
+                    f.write("[\n")
+                f.write(payload)
+
+    def _rotate(self) -> None:
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI: id de requisição (X-Request-ID, propagado do mean-api ou gerado)
+    e trace das requisições amostradas
+
+    Além dos spans do serviço, registra "request" (requisição inteira) e, a partir
+    do span "handler", "parse_validate" (antes do endpoint) e "serialize" (depois).
+    """
+
+    def __init__(self, app, writer: Optional[TraceWriter] = None, sample_rate: float = 0.0):
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = [(k, v) for k, v in message.get("headers", []) if k != REQUEST_ID_HEADER.encode()]
+                headers.append((REQUEST_ID_HEADER.encode(), request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampled = self.writer is not None and self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled:
+            await self.app(scope, receive, send_with_id)
+            return
+
+        trace = Trace(request_id)
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            finished = time.perf_counter()
+            _current_trace.reset(token)
+            trace.add("request", started, finished, {"method": scope["method"], "path": scope["path"]})
+            handler = trace.find("handler")
+            if handler is not None:
+                handler_start = handler["ts"] / 1e6
+                handler_end = (handler["ts"] + handler["dur"]) / 1e6
+                trace.add("parse_validate", started, handler_start)
+                trace.add("serialize", handler_end, finished)
+            self.writer.write(trace.events)
+
+
+def read_trace(path: str) -> List[Dict[str, Any]]:
+    """Lê um arquivo escrito por TraceWriter (sem o "]" final)"""
+    with open(path) as f:
+        content = f.read().rstrip().rstrip(",")
+    return json.loads(content + "]") if content else []
@@ -0,0 +1,72 @@
+"""
+Warmup Module
+Aquecimento do worker no startup: perfis de material rodante, curvas e simulações mínimas
+
+Roda antes de o servidor aceitar requisições, para que a primeira requisição
+depois de um scale-up encontre módulos importados, caches de física/curva
+populados e os caminhos do solver, do serviço e da serialização já exercitados.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from .schemas import AccelerationCurveConfig, SimulationParamsDto, SimulationResultDto
+
+logger = logging.getLogger(__name__)
+
+# Linha mínima: três estações em 1.5 km, passo grosso (alguns milissegundos)
+WARMUP_LINE = {
+    "initial_accel": 1.0,
+    "threshold_speed": 8.0,
+    "max_speed": 20.0,
+    "stations": [{"name": "W0", "km": 0.0}, {"name": "W1", "km": 0.8}, {"name": "W2", "km": 1.5}],
+    "dwell_time": 10.0,
+    "terminal_layover": 10.0,
+    "dt": 0.5,
+}
+
+
+def warm_up(service, profile_registry=None, profiles_path: Optional[str] = None,
+            process_pool=None, simulations: bool = True) -> Dict[str, Any]:
+    """
+    Aquece o serviço; cada etapa é cronometrada
+
+    Args:
+        profile_registry: Registro onde os perfis de profiles_path são construídos
+        process_pool: SimulationProcessPool cujos processos filhos são iniciados
+        simulations: False carrega só os perfis (SIM_WARMUP=0)
+
+    Returns:
+        {"steps": {etapa: segundos}, "profiles": quantidade, "total_s": segundos}
+    """
+    steps: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    def step(name, fn, *args):
+        step_started = time.perf_counter()
+        result = fn(*args)
+        steps[name] = time.perf_counter() - step_started
+        return result
+
+    profiles = 0
+    if profile_registry is not None and profiles_path:
+        profiles = len(step("profiles", profile_registry.load, profiles_path, service))
+
+    if simulations:
+        plain = SimulationParamsDto(**WARMUP_LINE)
+        curve = SimulationParamsDto(**WARMUP_LINE, acceleration_curve_config=AccelerationCurveConfig())
+        # Física e curva padrão nos caches do serviço
+        step("curves", service.build_physics, curve)
+        result = step("simulation", service.run_simulation, plain)
+        step("simulation_curve", service.run_simulation, curve)
+        step("schedule", service.run_schedule, plain)
+        step("serialization", lambda: SimulationResultDto.model_validate(result).model_dump_json())
+        if process_pool is not None:
+            # Um job por worker: os processos filhos sobem (e importam o engine) agora
+            step("process_pool", lambda: [future.result().to_result() for future in
+                                          [process_pool.submit(plain) for _ in range(process_pool.workers)]])
+
+    total = time.perf_counter() - started
+    logger.info("Warm-up em %.3fs: %s", total, ", ".join(f"{name} {seconds:.3f}s" for name, seconds in steps.items()))
+    return {"steps": steps, "profiles": profiles, "total_s": total}
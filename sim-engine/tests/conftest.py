@@ -0,0 +1,23 @@
+"""
+Configuração compartilhada dos testes: parâmetros da linha padrão
+"""
+
+import copy
+
+# Linha de três estações (8 km) usada pela maioria dos testes
+LINE = {
+    "initial_accel": 1.0,
+    "threshold_speed": 8.0,
+    "max_speed": 20.0,
+    "stations": [{"name": "A", "km": 0}, {"name": "B", "km": 3}, {"name": "C", "km": 8}],
+    "dwell_time": 30.0,
+    "terminal_layover": 120.0,
+    "dt": 0.2,
+}
+
+
+def line_params(**overrides):
+    """Cópia de LINE com os campos informados substituídos (payload de SimulationParamsDto)"""
+    params = copy.deepcopy(LINE)
+    params.update(overrides)
+    return params
@@ -0,0 +1,85 @@
+"""
+Testes da fábrica do app, do warm-up e do relatório de startup
+"""
+
+import json
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+import engine.api as api
+from engine.app import create_app
+from engine.profiles import ProfileRegistry
+from engine.service import SimulationService
+from engine.warmup import warm_up
+
+PROFILES = [{"name": "metro", "initial_accel": 1.0, "threshold_speed": 8.0, "max_speed": 20.0,
+             "max_distance_km": 3}]
+
+
+class TestWarmup:
+
+    def test_populates_caches_and_reports_steps(self):
+        service = SimulationService()
+        report = warm_up(service)
+        assert set(report["steps"]) == {"curves", "simulation", "simulation_curve", "schedule", "serialization"}
+        assert report["profiles"] == 0
+        assert len(service.curve_cache) == 1 and len(service.segment_cache) > 0
+
+    def test_profiles_only(self, tmp_path):
+        path = tmp_path / "profiles.json"
+        path.write_text(json.dumps(PROFILES))
+        registry = ProfileRegistry()
+        report = warm_up(SimulationService(), registry, str(path), simulations=False)
+        assert list(report["steps"]) == ["profiles"]
+        assert report["profiles"] == 1 and registry.names() == ["metro"]
+
+
+class TestAppFactory:
+
+    def test_startup_report_after_lifespan(self, monkeypatch, tmp_path):
+        path = tmp_path / "profiles.json"
+        path.write_text(json.dumps(PROFILES))
+        monkeypatch.setattr(api, "PROFILES_PATH", str(path))
+        monkeypatch.setattr(api, "profile_registry", ProfileRegistry())
+
+        app = create_app()
+        assert TestClient(app).get("/startup").json()["ready"] is False
+        with TestClient(app) as client:
+            report = client.get("/startup").json()
+            assert report["ready"] and client.get("/health").json()["ready"]
+            assert report["total_s"] >= report["imports_s"] + report["warmup_s"]
+            assert report["warmup"]["profiles"] == 1
+            assert [p["name"] for p in client.get("/profiles").json()] == ["metro"]
+            assert 'sim_startup_seconds{phase="warmup"}' in client.get("/metrics").text
+
+    def test_configures_scheduler_workers(self):
+        original = api.simulation_scheduler.workers
+        try:
+            create_app(workers=original + 1, warmup=False)
+            assert api.simulation_scheduler.workers == original + 1
+            assert api.process_pool is None
+        finally:
+            api.configure(workers=original)
+
+    def test_production_cors(self, monkeypatch):
+        monkeypatch.setenv("ALLOWED_ORIGINS", "https://ops.example.com")
+        preflight = {"Access-Control-Request-Method": "POST"}
+        production = TestClient(create_app(production=True))
+        allowed = production.options("/simulate", headers={**preflight, "Origin": "https://ops.example.com"})
+        denied = production.options("/simulate", headers={**preflight, "Origin": "https://evil.example.com"})
+        assert allowed.status_code == 200 and denied.status_code == 400
+
+        development = TestClient(create_app())
+        assert development.options("/simulate", headers={**preflight, "Origin": "https://evil.example.com"}
+                                   ).status_code == 200
+
+    def test_import_is_lean(self):
+        # Módulos opcionais só carregam quando usados; o engine não configura logging
+        code = ("import logging, sys, engine.api; print(len(logging.getLogger().handlers)); "
+                "import main; "
+                "print([m for m in ('yaml', 'cProfile', 'engine.process_pool', 'engine.segment_store') "
+                "if m in sys.modules])")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert output.stdout.split() == ["0", "[]"]
@@ -0,0 +1,82 @@
+"""
+Testes da escolha automática do passo de integração (arrival_tolerance)
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine.schemas import SimulationParamsDto
+from engine.service import DT_LADDER, SimulationService
+from main import app
+
+BASE = line_params(stations=[{"name": "A", "km": 0}, {"name": "B", "km": 3}, {"name": "C", "km": 5}], dt=0.1)
+
+
+def params(**overrides):
+    return SimulationParamsDto(**{**BASE, **overrides})
+
+
+class TestSelectDt:
+
+    def test_chosen_dt_meets_tolerance_against_fine_reference(self):
+        service = SimulationService()
+        tolerance = 1.0
+        selection = service.select_dt(params(), tolerance)
+
+        assert selection["met"]
+        assert selection["dt"] in DT_LADDER
+        assert selection["estimated_error"] <= tolerance
+
+        chosen = service.run_schedule(params(dt=selection["dt"]))
+        reference = service.run_schedule(params(dt=DT_LADDER[-1]))
+        arrivals = np.array([e["arrival_time"] for e in chosen["schedule"]])
+        expected = np.array([e["arrival_time"] for e in reference["schedule"]])
+        assert np.max(np.abs(arrivals - expected)) <= tolerance
+
+    def test_looser_tolerance_allows_larger_step(self):
+        service = SimulationService()
+        tight = service.select_dt(params(), 0.05)
+        loose = service.select_dt(params(), 5.0)
+        assert loose["dt"] >= tight["dt"]
+
+    def test_selection_is_cached_per_line_and_tolerance(self):
+        service = SimulationService()
+        first = service.select_dt(params(), 1.0)
+        assert service.select_dt(params(dwell_time=10.0), 1.0) is first
+        assert service.cache_stats()["dt"]["hits"] == 1
+
+        service.select_dt(params(), 2.0)
+        assert service.cache_stats()["dt"]["size"] == 2
+
+    def test_schedule_reports_selection_and_uses_chosen_dt(self):
+        service = SimulationService()
+        result = service.run_schedule(params(arrival_tolerance=1.0))
+        selection = result["dt_selection"]
+
+        plain = service.run_schedule(params(dt=selection["dt"]))
+        assert result["total_time"] == pytest.approx(plain["total_time"])
+
+    def test_without_tolerance_dt_is_unchanged(self):
+        service = SimulationService()
+        resolved, selection = service.resolve_dt(params(dt=0.1))
+        assert selection is None
+        assert resolved.dt == 0.1
+
+
+class TestEndpoint:
+
+    def test_simulate_with_arrival_tolerance(self):
+        client = TestClient(app)
+        response = client.post("/simulate", json={**BASE, "arrival_tolerance": 1.0})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["dt_selection"]["met"]
+        assert data["dt_selection"]["dt"] in DT_LADDER
+        assert np.diff(data["time"])[:10] == pytest.approx(data["dt_selection"]["dt"])
+
+    def test_invalid_tolerance_rejected(self):
+        client = TestClient(app)
+        response = client.post("/simulate", json={**BASE, "arrival_tolerance": 0})
+        assert response.status_code == 422
@@ -0,0 +1,90 @@
+"""
+Testes do endpoint /simulate/batch e dos caches compartilhados do serviço
+"""
+
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine.service import SimulationService
+from main import app
+
+client = TestClient(app)
+
+
+def make_params(**overrides):
+    return line_params(**{
+        "initial_accel": 1.2,
+        "threshold_speed": 12.0,
+        "stations": [{"name": "A", "km": 0}, {"name": "B", "km": 2}, {"name": "C", "km": 4}],
+        "dwell_time": 20.0,
+        "terminal_layover": 60.0,
+        **overrides,
+    })
+
+
+class TestSegmentCache:
+
+    def test_return_trip_reuses_outbound_segments(self):
+        """Segmentos com mesma distância e física são integrados uma única vez"""
+        service = SimulationService()
+        params = SimpleNamespace(
+            stations=[SimpleNamespace(name="A", km=0), SimpleNamespace(name="B", km=3),
+                      SimpleNamespace(name="C", km=5)],
+            initial_accel=1.5, threshold_speed=12.0, max_speed=20.0,
+            dwell_time=10.0, terminal_layover=30.0, dt=0.1
+        )
+
+        first = service.run_simulation(params)
+        stats = service.cache_stats()["segment"]
+        assert stats["misses"] == 2  # 3 km e 2 km
+        assert stats["hits"] == 2    # volta: 2 km e 3 km
+
+        second = service.run_simulation(params)
+        assert service.cache_stats()["segment"]["misses"] == 2
+        assert second["schedule"] == first["schedule"]
+
+
+class TestBatchEndpoint:
+
+    def test_results_in_order_with_dedupe(self):
+        items = [make_params(), make_params(max_speed=25.0), make_params()]
+        response = client.post("/simulate/batch", json={"items": items})
+        assert response.status_code == 200
+
+        body = response.json()
+        assert body["total"] == 3
+        assert body["unique"] == 2
+        assert [r["index"] for r in body["results"]] == [0, 1, 2]
+        assert all(r["status"] == "ok" for r in body["results"])
+        assert body["results"][0]["result"] == body["results"][2]["result"]
+
+    def test_item_error_does_not_fail_batch(self, monkeypatch):
+        from engine import api
+        original = api.simulation_service.run_simulation
+
+        def flaky(params, checkpoint=None):
+            if params.max_speed == 99.0:
+                raise ValueError("boom")
+            return original(params, checkpoint=checkpoint)
+
+        monkeypatch.setattr(api.simulation_service, "run_simulation", flaky)
+        response = client.post("/simulate/batch", json={"items": [make_params(), make_params(max_speed=99.0)]})
+        assert response.status_code == 200
+
+        results = response.json()["results"]
+        assert results[0]["status"] == "ok"
+        assert results[1]["status"] == "error"
+        assert "boom" in results[1]["error"]
+
+    def test_streaming_emits_one_line_per_item(self):
+        items = [make_params(), make_params(), make_params(dwell_time=5.0)]
+        response = client.post("/simulate/batch", json={"items": items, "stream": True})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+        assert all(line["status"] == "ok" for line in lines)
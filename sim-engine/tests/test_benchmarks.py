@@ -0,0 +1,53 @@
+"""
+Testes da suíte de benchmarks (execução, baseline e comparação)
+"""
+
+import json
+
+from benchmarks.suite import BENCHMARKS, compare, main, run
+
+
+def report(**medians):
+    return {"meta": {}, "results": {name: {"median_ms": value} for name, value in medians.items()}}
+
+
+class TestCompare:
+
+    def test_statuses(self):
+        baseline = report(a=10.0, b=10.0, c=10.0, gone=5.0)
+        current = report(a=13.0, b=7.0, c=10.5, added=1.0)
+        statuses = {row["name"]: row["status"] for row in compare(baseline, current, threshold=0.2)}
+        assert statuses == {"a": "regression", "b": "improvement", "c": "ok",
+                            "gone": "missing", "added": "new"}
+
+    def test_compare_command_exit_code(self, tmp_path, capsys):
+        base, slow, same = tmp_path / "base.json", tmp_path / "slow.json", tmp_path / "same.json"
+        base.write_text(json.dumps(report(a=10.0)))
+        slow.write_text(json.dumps(report(a=20.0)))
+        same.write_text(json.dumps(report(a=10.2)))
+
+        assert main(["compare", str(base), str(slow)]) == 1
+        assert "regression" in capsys.readouterr().out
+        assert main(["compare", str(base), str(same)]) == 0
+
+
+class TestRun:
+
+    def test_suite_covers_layers(self):
+        assert {"rk4.solve", "rk4.solve_curve", "curve.get_acceleration",
+                "service.run_simulation.small", "service.run_simulation.medium",
+                "service.run_simulation.large", "http.simulate.medium"} <= set(BENCHMARKS)
+
+    def test_run_writes_baseline(self, tmp_path):
+        output = tmp_path / "result.json"
+        assert main(["run", "--filter", "service.run_simulation.small", "--rounds", "2",
+                     "--output", str(output)]) == 0
+        result = json.loads(output.read_text())
+        row = result["results"]["service.run_simulation.small"]
+        assert row["rounds"] == 2
+        assert 0 < row["min_ms"] <= row["median_ms"]
+        assert "python" in result["meta"]
+
+    def test_http_benchmark_runs(self):
+        result = run(["http.simulate.medium"], rounds=1)
+        assert result["results"]["http.simulate.medium"]["median_ms"] > 0
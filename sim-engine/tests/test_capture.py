@@ -0,0 +1,129 @@
+"""
+Testes da captura de requisições e do replay (benchmarks.replay)
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import engine.api as api
+from conftest import line_params
+from benchmarks.replay import main as replay_main
+from benchmarks.replay import replay_concurrent, replay_serial, replayable, summarize
+from engine.capture import (CaptureWriter, compare_outcomes, read_capture, sanitize_params,
+                            summarize_result)
+from engine.encoding import COMPACT_BINARY
+
+PARAMS = line_params(
+    stations=[{"name": "Luz", "km": 0}, {"name": "Brás", "km": 2}, {"name": "Tatuapé", "km": 3.5}],
+    terminal_layover=60.0,
+    dt=0.11,
+)
+
+
+def capturing_app(monkeypatch, tmp_path, sample_rate=1.0):
+    """App com instrument_app e captura em tmp_path"""
+    path = str(tmp_path / "capture.jsonl")
+    monkeypatch.setattr(api, "capture_writer", CaptureWriter(path))
+    monkeypatch.setattr(api, "CAPTURE_SAMPLE_RATE", sample_rate)
+    captured = FastAPI()
+    api.instrument_app(captured)
+    captured.include_router(api.router)
+    return TestClient(captured), path
+
+
+class TestCapture:
+
+    def test_sanitize_drops_names_and_rejects_invalid(self):
+        params = sanitize_params(json.dumps({**PARAMS, "token": "secret"}).encode())
+        assert [station["name"] for station in params["stations"]] == ["S0", "S1", "S2"]
+        assert "token" not in params
+        assert sanitize_params(b'{"dt": 0.1}') is None
+        assert sanitize_params(b"not json") is None
+
+    def test_middleware_records_request_and_outcome(self, monkeypatch, tmp_path):
+        client, path = capturing_app(monkeypatch, tmp_path)
+        response = client.post("/simulate", json=PARAMS, headers={"X-Request-ID": "req-7",
+                                                                  "X-Priority": "bulk"})
+        assert response.status_code == 200
+        client.post("/simulate", json={"dt": 0.1})
+
+        records = read_capture(path)
+        assert len(records) == 1
+        record = records[0]
+        assert record["request_id"] == "req-7" and record["priority"] == "bulk"
+        assert record["status"] == 200 and record["duration_ms"] > 0
+        assert record["params"]["stations"][1] == {"name": "S1", "km": 2.0}
+        assert record["outcome"] == summarize_result(response.json())
+
+    def test_compact_response_outcome(self, monkeypatch, tmp_path):
+        client, path = capturing_app(monkeypatch, tmp_path)
+        plain = client.post("/simulate", json=PARAMS)
+        binary = client.post("/simulate", json=PARAMS, headers={"Accept": COMPACT_BINARY})
+        assert binary.headers["content-type"] == COMPACT_BINARY
+
+        plain_outcome, binary_outcome = [record["outcome"] for record in read_capture(path)]
+        assert plain_outcome == summarize_result(plain.json())
+        assert compare_outcomes(plain_outcome, binary_outcome, tolerance=1e-6) == []
+
+    def test_unsampled_requests_not_written(self, monkeypatch, tmp_path):
+        client, path = capturing_app(monkeypatch, tmp_path, sample_rate=0.0)
+        assert client.post("/simulate", json=PARAMS).status_code == 200
+        assert not (tmp_path / "capture.jsonl").exists()
+
+    def test_rotated_files_read_oldest_first(self, tmp_path):
+        path = str(tmp_path / "c.jsonl")
+        writer = CaptureWriter(path, max_bytes=60, backups=3)
+        for index in range(4):
+            writer.write([{"index": index, "pad": "x" * 20}])
+        assert [record["index"] for record in read_capture(path)] == [0, 1, 2, 3]
+        assert [record["index"] for record in read_capture(path, include_rotated=False)] == [3]
+
+    def test_compare_outcomes(self):
+        before = {"points": 10, "end_time": 100.0, "max_velocity": 20.0,
+                  "arrivals": [50.0, 90.0], "departures": [60.0, 100.0]}
+        assert compare_outcomes(before, {**before, "points": 5}, 0.1) == []
+        shifted = {**before, "arrivals": [50.05, 91.0]}
+        assert compare_outcomes(before, shifted, 0.1) == ["arrivals[1]: 90.000 -> 91.000"]
+        assert compare_outcomes(before, {**before, "arrivals": [50.0]}, 0.1) == ["stops: 2 -> 1"]
+
+
+class TestReplay:
+
+    @pytest.fixture
+    def records(self, monkeypatch, tmp_path):
+        client, path = capturing_app(monkeypatch, tmp_path)
+        for dt in (0.11, 0.12):
+            assert client.post("/simulate", json={**PARAMS, "dt": dt}).status_code == 200
+        return read_capture(path)
+
+    def test_serial_replay_matches_capture(self, records):
+        rows = replay_serial(replayable(records))
+        assert [row["error"] for row in rows] == [None, None]
+        assert all(row["divergences"] == [] for row in rows)
+
+        summary = summarize(rows, wall_time=1.0)
+        assert summary["divergent"] == 0 and summary["speedup"]["median"] > 0
+
+    def test_serial_replay_reports_divergence(self, records):
+        records[0]["outcome"]["arrivals"][0] += 5.0
+        rows = replay_serial(replayable(records))
+        assert rows[0]["divergences"] and not rows[1]["divergences"]
+
+    def test_concurrent_replay(self, records):
+        rows = replay_concurrent(replayable(records), concurrency=2)
+        assert [row["index"] for row in rows] == [0, 1]
+        assert all(row["error"] is None and row["divergences"] == [] for row in rows)
+
+    def test_cli_baseline_comparison(self, records, tmp_path, capsys):
+        capture = tmp_path / "corpus.jsonl"
+        capture.write_text("".join(json.dumps(record) + "\n" for record in records))
+        before = tmp_path / "before.json"
+        assert replay_main([str(capture), "--output", str(before)]) == 0
+        assert "2 requests, 0 errors, 0 divergent" in capsys.readouterr().out
+        assert replay_main([str(capture), "--baseline", str(before), "--json"]) == 0
+        report = json.loads(capsys.readouterr().out)
+        assert report["summary"]["reference"] == "baseline"
+        assert all(row["speedup"] > 0 for row in report["rows"])
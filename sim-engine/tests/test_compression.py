@@ -0,0 +1,107 @@
+"""
+Testes da compressão negociada das respostas
+"""
+
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+
+from benchmarks.compression import run as run_benchmark
+from conftest import line_params
+from engine.compression import COMPRESSION_BYTES, CompressionMiddleware, LEVELS, level_for, negotiate
+from main import app
+
+PARAMS = line_params(stations=[{"name": "A", "km": 0}, {"name": "B", "km": 3}], terminal_layover=60.0, dt=0.1)
+
+
+class TestNegotiation:
+
+    @pytest.mark.parametrize("header, codecs, expected", [
+        ("gzip, deflate", ["zstd", "br", "gzip"], "gzip"),
+        ("gzip;q=0.5, br;q=1.0", ["gzip", "br"], "gzip"),
+        ("gzip;q=0, *", ["gzip", "br"], "br"),
+        ("gzip;q=0", ["gzip"], None),
+        ("identity", ["gzip"], None),
+        (None, ["gzip"], None),
+        ("*", ["zstd", "gzip"], "zstd"),
+    ])
+    def test_server_preference_with_refusals(self, header, codecs, expected):
+        assert negotiate(header, codecs) == expected
+
+    def test_level_drops_with_size(self):
+        levels = [level_for("gzip", size) for size in (10_000, 500_000, 50_000_000)]
+        assert levels == sorted(levels, reverse=True) and levels[-1] == 1
+        assert level_for("gzip", None) in {level for _, level in LEVELS["gzip"]}
+
+
+class TestMiddleware:
+
+    def test_large_result_is_gzipped(self):
+        client = TestClient(app)
+        before = COMPRESSION_BYTES.value(codec="gzip", kind="input")
+        response = client.post("/simulate", json=PARAMS, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) * 2 < len(response.content)
+        assert COMPRESSION_BYTES.value(codec="gzip", kind="input") - before == len(response.content)
+
+        identity = client.post("/simulate", json=PARAMS, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert "Accept-Encoding" in identity.headers["vary"]
+        assert identity.json()["schedule"] == response.json()["schedule"]
+
+    def test_small_response_not_compressed(self):
+        response = TestClient(app).get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        # Mesma URL pode vir comprimida com corpos maiores: caches precisam separar as variantes
+        assert "Accept-Encoding" in response.headers["vary"]
+
+    def test_streaming_is_compressed_per_chunk(self):
+        lines = [f'{{"index": {i}, "status": "ok"}}\n'.encode() for i in range(3)]
+
+        async def ndjson(request):
+            async def generate():
+                for line in lines:
+                    yield line
+            return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+        streaming = CompressionMiddleware(Starlette(routes=[Route("/stream", ndjson)]), codecs=["gzip"])
+        messages = []
+
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()  # sem desconexão do cliente
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/stream", "raw_path": b"/stream",
+                 "query_string": b"", "root_path": "", "scheme": "http", "server": ("test", 80),
+                 "headers": [(b"accept-encoding", b"gzip")], "http_version": "1.1"}
+        asyncio.run(streaming(scope, receive, send))
+
+        start = messages[0]
+        assert (b"content-encoding", b"gzip") in start["headers"]
+        assert not any(name == b"content-length" for name, _ in start["headers"])
+        # Cada chunk decodifica sozinho até a sua linha (flush síncrono)
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        bodies = [message["body"] for message in messages[1:]]
+        for line, body in zip(lines, bodies):
+            assert decoder.decompress(body) == line
+        assert gzip.decompress(b"".join(bodies)) == b"".join(lines)
+
+
+def test_benchmark_rows():
+    rows = run_benchmark(["small"], levels=[1], rounds=1)
+    assert {row["payload"] for row in rows} == {"small.json", "small.compact"}
+    assert all(row["ratio"] > 1 and row["compress_ms"] > 0 for row in rows)
+    assert sum(row["chosen"] for row in rows if row["codec"] == "gzip") == 2
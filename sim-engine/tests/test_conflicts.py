@@ -0,0 +1,137 @@
+"""
+Testes da detecção de conflitos de headway e ocupação
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine.conflicts import build_intervals, detect_conflicts
+from engine.schemas import SimulationParamsDto
+from engine.service import SimulationService
+from engine.timetable import timetable_runs
+from main import app
+
+SCHEDULE = [
+    {"station": "B", "arrival_time": 100.0, "departure_time": 130.0},
+    {"station": "C", "arrival_time": 250.0, "departure_time": 280.0},
+]
+
+
+def brute_force_overlaps(runs):
+    """Referência O(n²): intervalos que começam dentro de uma ocupação anterior no mesmo local"""
+    intervals = build_intervals(runs)
+    location, start, end = intervals["location"], intervals["start"], intervals["end"]
+    return sum(
+        any(location[a] == location[b] and start[a] < start[b] < end[a] for a in range(len(start)))
+        for b in range(len(start))
+    )
+
+
+class TestBuildIntervals:
+
+    def test_station_and_block_intervals(self):
+        intervals = build_intervals([{"schedule": SCHEDULE, "offset": 10.0, "origin": "A"}])
+        locations = [intervals["locations"][i] for i in intervals["location"]]
+        assert locations == [
+            {"kind": "block", "from": "A", "to": "B"},
+            {"kind": "station", "station": "B", "from": "A"},
+            {"kind": "block", "from": "B", "to": "C"},
+            {"kind": "station", "station": "C", "from": "B"},
+        ]
+        assert intervals["start"].tolist() == [10.0, 110.0, 140.0, 260.0]
+        assert intervals["end"].tolist() == [110.0, 140.0, 260.0, 290.0]
+
+
+class TestDetectConflicts:
+
+    def test_well_spaced_runs_have_no_conflicts(self):
+        runs = [{"schedule": SCHEDULE, "offset": 300.0 * i, "origin": "A"} for i in range(50)]
+        result = detect_conflicts(runs, min_headway=120.0)
+        assert result["conflict_counts"] == {"overlap": 0, "headway": 0}
+        station_b = next(loc for loc in result["locations"] if loc.get("station") == "B")
+        assert station_b["min_headway"] == pytest.approx(300.0)
+
+    def test_overlap_and_headway(self):
+        runs = [
+            {"id": "first", "schedule": SCHEDULE, "offset": 0.0, "origin": "A"},
+            {"id": "second", "schedule": SCHEDULE, "offset": 60.0, "origin": "A"},
+        ]
+        result = detect_conflicts(runs, min_headway=90.0)
+        counts = result["conflict_counts"]
+        # Blocos A-B e B-C sobrepostos; plataformas B e C livres; headway de 60s em B e C
+        assert counts["overlap"] == 2
+        assert counts["headway"] == 2
+        block = next(c for c in result["conflicts"] if c["type"] == "overlap")
+        assert block["runs"] == ["first", "second"]
+        assert block["location"] == {"kind": "block", "from": "A", "to": "B"}
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(1)
+        runs = [{"schedule": SCHEDULE, "offset": float(t), "origin": "A"}
+                for t in rng.uniform(0, 5000, 80)]
+        assert detect_conflicts(runs)["conflict_counts"]["overlap"] == brute_force_overlaps(runs)
+
+    def test_truncated_listing_keeps_totals(self):
+        runs = [{"schedule": SCHEDULE, "offset": 10.0 * i, "origin": "A"} for i in range(100)]
+        result = detect_conflicts(runs, min_headway=60.0, max_conflicts=5)
+        assert len(result["conflicts"]) == 5
+        assert result["truncated"]
+        assert result["conflict_counts"]["headway"] > 5
+
+    def test_scales_to_many_runs(self):
+        runs = [{"schedule": SCHEDULE, "offset": 300.0 * i, "origin": "A"} for i in range(20000)]
+        result = detect_conflicts(runs, min_headway=60.0)
+        assert result["intervals"] == 80000
+        assert result["conflict_counts"]["overlap"] == 0
+        assert result["compute_time_s"] < 5
+
+
+class TestTimetableRuns:
+
+    def test_layover_occupies_terminal_platform(self):
+        # Layover maior que o headway: os trens se acumulam no terminal, não no bloco de volta
+        params = SimulationParamsDto(**line_params(terminal_layover=900.0))
+        runs = timetable_runs(SimulationService(), params, [0.0, 400.0, 800.0])
+        terminal = runs[0]["schedule"][1]
+        assert terminal["station"] == "C"
+        assert terminal["departure_time"] == pytest.approx(terminal["arrival_time"] + 30.0 + 900.0)
+
+        result = detect_conflicts(runs)
+        locations = [conflict["location"] for conflict in result["conflicts"]]
+        assert result["conflict_counts"]["overlap"] == 2
+        assert locations == [{"kind": "station", "station": "C", "from": "B"}] * 2
+        assert not any(location["kind"] == "block" for location in locations)
+
+
+class TestConflictsEndpoint:
+
+    def test_explicit_runs(self):
+        client = TestClient(app)
+        response = client.post("/conflicts", json={
+            "runs": [{"schedule": SCHEDULE, "origin": "A"}, {"schedule": SCHEDULE, "offset": 60, "origin": "A"}],
+            "min_headway": 90,
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["conflict_counts"] == {"overlap": 2, "headway": 2}
+        assert {"kind": "block", "from": "A", "to": "B"}.items() <= data["locations"][0].items()
+
+    def test_from_timetable(self):
+        client = TestClient(app)
+        timetable = client.post("/timetable", json={
+            "base": line_params(stations=[{"name": "A", "km": 0}, {"name": "B", "km": 3}]),
+            "headway": 60, "count": 10,
+        }).json()
+
+        response = client.post("/conflicts", json={"timetable_id": timetable["timetable_id"], "min_headway": 120})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["runs"] == 10
+        assert data["conflict_counts"]["headway"] > 0
+
+    def test_requires_exactly_one_source(self):
+        client = TestClient(app)
+        assert client.post("/conflicts", json={}).status_code == 400
+        assert client.post("/conflicts", json={"timetable_id": "missing"}).status_code == 404
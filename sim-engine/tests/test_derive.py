@@ -0,0 +1,115 @@
+"""
+Testes da re-simulação incremental a partir de um resultado anterior
+"""
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine import api
+from engine.schemas import SimulationParamsDto
+from engine.service import SimulationService
+from main import app
+
+BASE = line_params(
+    initial_accel=1.1,
+    threshold_speed=12.0,
+    max_speed=22.0,
+    stations=[{"name": "A", "km": 0}, {"name": "B", "km": 2}, {"name": "C", "km": 5}, {"name": "D", "km": 9}, {"name": "E", "km": 14}],
+    dt=0.1,
+)
+
+
+def derive(service, base_id, **patch):
+    payload = dict(BASE)
+    payload.update(patch)
+    return service.derive_simulation(base_id, SimulationParamsDto(**payload))
+
+
+class TestDeriveSimulation:
+
+    def test_dwell_change_integrates_nothing(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        base = service.run_simulation(params)
+        base_id = service.store_result(params)
+
+        # Cache de segmentos limpo: só os segmentos guardados com o resultado restam
+        service.segment_cache.clear()
+        derived = derive(service, base_id, dwell_time=45.0)
+
+        assert derived["derivation"]["integrated_segments"] == 0
+        assert derived["derivation"]["reused_segments"] == derived["derivation"]["segments"] == 8
+        # Primeira chegada inalterada, demais deslocadas pelo dwell extra
+        assert derived["schedule"][0]["arrival_time"] == base["schedule"][0]["arrival_time"]
+        assert derived["schedule"][1]["arrival_time"] == pytest.approx(base["schedule"][1]["arrival_time"] + 15.0)
+
+    def test_moving_one_station_integrates_adjacent_segments(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        service.run_simulation(params)
+        base_id = service.store_result(params)
+
+        stations = [dict(s) for s in BASE["stations"]]
+        stations[2]["km"] = 5.4
+        derived = derive(service, base_id, stations=stations)
+
+        # B→C e C→D mudam na ida e na volta espelhada
+        derivation = derived["derivation"]
+        assert derivation["integrated_segments"] == 4
+        assert derivation["reused_segments"] + derivation["integrated_segments"] == derivation["segments"] == 8
+        expected = SimulationService().run_simulation(SimulationParamsDto(**{**BASE, "stations": stations}))
+        for got, want in zip(derived["schedule"], expected["schedule"]):
+            assert got["arrival_time"] == pytest.approx(want["arrival_time"])
+
+    def test_unknown_base_id(self):
+        with pytest.raises(KeyError):
+            SimulationService().derive_simulation("missing", SimulationParamsDto(**BASE))
+
+
+class TestDeriveEndpoint:
+
+    def test_simulate_then_derive(self):
+        client = TestClient(app)
+        first = client.post("/simulate", json=BASE)
+        assert first.status_code == 200
+        result_id = first.json()["result_id"]
+        assert result_id
+
+        response = client.post("/simulate/derive", json={
+            "base_result_id": result_id, "patch": {"terminal_layover": 300.0},
+        })
+        assert response.status_code == 200
+        body = response.json()
+        assert body["derivation"]["integrated_segments"] == 0
+        assert body["result_id"] != result_id
+
+    def test_result_is_stored_off_the_event_loop(self, monkeypatch):
+        threads = []
+        store_result = api.simulation_service.store_result
+
+        def recording_store(params, **kwargs):
+            threads.append(threading.current_thread().name)
+            return store_result(params, **kwargs)
+
+        monkeypatch.setattr(api.simulation_service, "store_result", recording_store)
+        response = TestClient(app).post("/simulate", json=BASE)
+        assert response.status_code == 200
+        assert response.json()["result_id"]
+        # Registrado na tarefa do scheduler, junto com a simulação
+        assert len(threads) == 1 and threads[0].startswith("sim-worker-")
+
+    def test_pool_results_store_params_only(self):
+        service = SimulationService()
+        result_id = service.store_result(SimulationParamsDto(**{**BASE, "arrival_tolerance": 0.05}),
+                                         keep_segments=False)
+        # Sem resolver dt (busca na escada de passos) nem montar chaves de segmento
+        assert service.dt_cache.stats()["misses"] == 0
+        assert service.result_store.get(result_id)["segments"] == {}
+
+    def test_unknown_result_id_is_404(self):
+        client = TestClient(app)
+        response = client.post("/simulate/derive", json={"base_result_id": "nope", "patch": {}})
+        assert response.status_code == 404
@@ -0,0 +1,110 @@
+"""
+Testes da codificação compacta do resultado (trechos de tempo e deltas quantizados)
+"""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine import encoding
+from engine.encoding import (COMPACT_BINARY, COMPACT_JSON, decode_result, decode_time, encode_result,
+                             encode_result_binary, encode_time, parse_accept, result_json)
+from engine.schemas import SimulationParamsDto, SimulationResultDto
+from engine.service import SimulationService
+from main import app
+
+PARAMS = line_params(
+    stations=[{"name": "A", "km": 0}, {"name": "B", "km": 2.3}, {"name": "C", "km": 5.1}],
+    dt=0.1,
+)
+
+
+@pytest.fixture(scope="module")
+def result():
+    return SimulationService().run_simulation(SimulationParamsDto(**PARAMS))
+
+
+class TestTimeRuns:
+
+    def test_uniform_runs_and_isolated_events(self):
+        time_values = np.concatenate([np.arange(0, 10) * 0.1, [2.05], 5.0 + np.arange(0, 4) * 0.5])
+        runs = encode_time(time_values)
+        assert len(runs["count"]) == 3 and sum(runs["count"]) == len(time_values)
+        assert runs["count"][0] == 10 and runs["step"][0] == pytest.approx(0.1)
+        assert np.abs(decode_time(runs) - time_values).max() <= 1e-6
+
+    def test_accumulated_steps_stay_one_run(self):
+        time_values = np.cumsum(np.full(100_000, 0.01))
+        assert encode_time(time_values)["count"] == [100_000]
+
+
+class TestRoundTrip:
+
+    @pytest.mark.parametrize("encode", [encode_result, encode_result_binary])
+    def test_decoded_within_precision(self, result, encode):
+        decoded = decode_result(encode(result, {"position": 0.01}))
+        assert np.abs(decoded["time"] - result["time"]).max() <= 1e-6
+        assert np.abs(decoded["position"] - result["position"]).max() <= 0.005 + 1e-9
+        assert np.abs(decoded["velocity"] - result["velocity"]).max() <= 0.0005 + 1e-9
+        assert decoded["schedule"] == json.loads(json.dumps(result["schedule"]))
+
+    def test_payload_shrinks(self, result):
+        plain = len(json.dumps({**result, "schedule": json.loads(json.dumps(result["schedule"]))}))
+        compact = len(json.dumps(encode_result(result), separators=(",", ":")))
+        binary = len(encode_result_binary(result))
+        assert plain / compact >= 3
+        assert plain / binary >= 8
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_plain_json_from_arrays(self, result, monkeypatch, use_orjson):
+        if not use_orjson:
+            monkeypatch.setattr(encoding, "orjson", None)
+        arrays = {**result, **{name: np.asarray(result[name]) for name in ("time", "position", "velocity")}}
+        body = json.loads(result_json(arrays, SimulationResultDto))
+        # Mesma forma e valores do response_model
+        assert body == SimulationResultDto.model_validate(result).model_dump(mode="json")
+
+    def test_accept_negotiation(self):
+        assert parse_accept("application/json") is None
+        media_type, precision = parse_accept(f"text/html, {COMPACT_JSON}; position_precision=0.01")
+        assert media_type == COMPACT_JSON and precision == {"position": 0.01, "velocity": 1e-3}
+        with pytest.raises(ValueError):
+            parse_accept(f"{COMPACT_BINARY}; velocity_precision=0")
+        with pytest.raises(ValueError):
+            parse_accept(f"{COMPACT_BINARY}; time_precision=0.1")
+
+
+class TestEndpoint:
+
+    def test_simulate_compact_json_and_binary(self):
+        client = TestClient(app)
+        plain = client.post("/simulate", json=PARAMS)
+        compact = client.post("/simulate", json=PARAMS, headers={"Accept": COMPACT_JSON})
+        binary = client.post("/simulate", json=PARAMS, headers={"Accept": COMPACT_BINARY})
+        assert compact.headers["content-type"] == COMPACT_JSON
+        assert binary.headers["content-type"] == COMPACT_BINARY
+
+        expected = plain.json()
+        for response in (compact, binary):
+            decoded = decode_result(response.content)
+            assert np.allclose(decoded["position"], expected["position"], atol=1e-3)
+            assert decoded["schedule"] == expected["schedule"]
+            assert decoded["memory_estimate"] == expected["memory_estimate"]
+        assert len(plain.content) / len(binary.content) >= 8
+
+    def test_derive_compact(self):
+        client = TestClient(app)
+        base = client.post("/simulate", json=PARAMS).json()
+        response = client.post("/simulate/derive", headers={"Accept": COMPACT_JSON},
+                               json={"base_result_id": base["result_id"], "patch": {"dwell_time": 45.0}})
+        assert response.status_code == 200
+        decoded = decode_result(response.json())
+        assert len(decoded["time"]) == len(decoded["velocity"]) > 0
+
+    def test_invalid_precision_is_400(self):
+        response = TestClient(app).post("/simulate", json=PARAMS,
+                                        headers={"Accept": f"{COMPACT_JSON}; position_precision=abc"})
+        assert response.status_code == 400
@@ -0,0 +1,185 @@
+"""
+Testes da simulação de frota em headway
+"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine import api
+from engine.conflicts import detect_conflicts
+from engine.fleet import count_active, departure_offsets, path_coordinate, simulate_fleet, stop_times
+from engine.memory import MemoryLimitError, admit_fleet
+from engine.schemas import SimulationParamsDto
+from engine.service import SimulationService
+from engine.timetable import timetable_runs
+from main import app
+
+BASE = line_params()
+
+
+class TestDepartures:
+
+    def test_by_count_and_by_last_departure(self):
+        assert departure_offsets(100, 60, count=3).tolist() == [100, 160, 220]
+        assert departure_offsets(0, 300, last_departure=900).tolist() == [0, 300, 600, 900]
+
+    def test_invalid_headway(self):
+        with pytest.raises(ValueError):
+            departure_offsets(0, 0, count=3)
+
+    def test_path_coordinate_is_monotonic_round_trip(self):
+        path = path_coordinate([0, 5, 10, 10, 4, 0])
+        assert path.tolist() == [0, 5, 10, 10, 16, 20]
+
+
+class TestSimulateFleet:
+
+    def test_identical_trains_share_one_run(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        result = simulate_fleet(service, params, departure_offsets(0, 300, count=20))
+
+        summary = result["summary"]
+        assert summary["trains"] == 20
+        assert summary["distinct_runs"] == 1
+        single = service.run_simulation(params)["time"][-1]
+        assert result["trains"][-1]["end_time"] == pytest.approx(19 * 300 + single)
+        # Ciclo maior que o headway: vários trens simultâneos
+        assert summary["max_trains_in_service"] == int(np.ceil(single / 300))
+
+    def test_min_separation_is_positive_for_identical_trains(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        result = simulate_fleet(service, params, departure_offsets(0, 120, count=5), sample_interval=2)
+
+        separation = result["summary"]["min_separation"]
+        assert separation is not None
+        assert separation["distance_m"] >= 0
+        assert separation["follower"] == separation["leader"] + 1
+
+    def test_slower_variant_is_caught_up(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        slow = SimulationParamsDto(**{**BASE, "max_speed": 10.0})
+        result = simulate_fleet(service, params, [0, 60], variants=[slow],
+                                train_variants=[0, -1], sample_interval=2)
+
+        assert result["summary"]["distinct_runs"] == 2
+        fast_only = simulate_fleet(service, params, [0, 60], sample_interval=2)
+        assert (result["summary"]["min_separation"]["distance_m"]
+                < fast_only["summary"]["min_separation"]["distance_m"])
+
+    def test_block_occupancy(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        result = simulate_fleet(service, params, [0])
+
+        blocks = result["blocks"]
+        assert [(b["from"], b["to"], b["direction"]) for b in blocks] == [
+            ("A", "B", "outbound"), ("B", "C", "outbound"),
+            ("C", "B", "return"), ("B", "A", "return"),
+        ]
+        assert all(b["max_trains"] == 1 for b in blocks)
+
+    def test_event_counts_match_dense_sampling(self):
+        grid = np.arange(0.0, 100.0, 0.5)
+        starts = np.array([0.0, 10.0, 10.0, 55.5])
+        ends = np.array([20.0, 30.0, 10.0, 99.0])
+        dense = ((grid[None, :] >= starts[:, None]) & (grid[None, :] < ends[:, None])).sum(axis=0)
+        assert count_active(grid, starts, ends).tolist() == dense.tolist()
+
+        schedule = [{"arrival_time": 10.0, "departure_time": 15.0}, {"arrival_time": 30.0, "departure_time": 35.0},
+                    {"arrival_time": 150.0, "departure_time": 155.0}, {"arrival_time": 170.0, "departure_time": 175.0}]
+        arrivals, departures = stop_times(schedule, terminal_layover=100.0)
+        assert arrivals.tolist() == [0.0, 10.0, 30.0, 150.0, 170.0]
+        assert departures.tolist() == [0.0, 15.0, 135.0, 155.0, 175.0]
+
+    def test_block_occupancy_matches_conflicts(self):
+        # Layover maior que o headway: os trens esperam na plataforma do terminal, não no bloco C -> B
+        params = SimulationParamsDto(**{**BASE, "stations": [{"name": "A", "km": 0}, {"name": "B", "km": 2},
+                                                             {"name": "C", "km": 4}], "terminal_layover": 600.0})
+        service = SimulationService()
+        result = simulate_fleet(service, params, [0.0, 300.0], sample_interval=1.0)
+        conflicts = detect_conflicts(timetable_runs(service, params, [0.0, 300.0]))
+
+        overlapping = {(location["from"], location["to"]) for location in
+                       (conflict["location"] for conflict in conflicts["conflicts"]) if location["kind"] == "block"}
+        for block in result["blocks"]:
+            assert (block["max_trains"] > 1) == ((block["from"], block["to"]) in overlapping)
+        assert [block["max_trains"] for block in result["blocks"]] == [1, 1, 1, 1]
+        assert conflicts["conflict_counts"]["overlap"] > 0
+
+    def test_full_day_fleet_stays_small(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        service.run_simulation(params)
+        departures = departure_offsets(0, 17.28, count=5000)  # um dia inteiro
+
+        tracemalloc.start()
+        try:
+            result = simulate_fleet(service, params, departures)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert result["summary"]["trains"] == 5000
+        # Sem a matriz trens x amostras (5000 x ~8800 floats = ~350 MB)
+        assert peak < 50 * 2**20
+
+    def test_fleet_memory_admission(self):
+        params = SimulationParamsDto(**BASE)
+        departures = departure_offsets(0, 60, count=100)
+        with pytest.raises(MemoryLimitError):
+            admit_fleet(SimulationService(), params, [], None, departures, 0.01, 64 * 2**20)
+
+        # Grade cabe; as simulações são decimadas na sobra do limite
+        base, _, estimate = admit_fleet(SimulationService(), SimulationParamsDto(**{**BASE, "dt": 0.001}),
+                                        [], None, departures, 10.0, 2 * 2**20)
+        assert base.max_points is not None
+        assert estimate["bytes"] <= 2 * 2**20
+
+    def test_invalid_variant_index(self):
+        service = SimulationService()
+        with pytest.raises(ValueError):
+            simulate_fleet(service, SimulationParamsDto(**BASE), [0, 60], train_variants=[0, 0])
+
+
+class TestFleetEndpoint:
+
+    def test_headway_request(self):
+        client = TestClient(app)
+        response = client.post("/fleet", json={
+            "base": BASE, "headway": 300, "last_departure": 3600,
+            "variants": [{"max_speed": 15.0}], "train_variants": [-1] * 12 + [0],
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["summary"]["trains"] == 13
+        assert data["summary"]["distinct_runs"] == 2
+        assert data["blocks"][0]["from"] == "A"
+        assert len(data["occupancy"]["time"]) == len(data["occupancy"]["trains_in_service"])
+
+    def test_endpoint_is_bulk_and_admitted(self, monkeypatch):
+        priorities = []
+        run = api.simulation_scheduler.run
+
+        async def recording_run(fn, *args, priority, **kwargs):
+            priorities.append(priority)
+            return await run(fn, *args, priority=priority, **kwargs)
+
+        monkeypatch.setattr(api.simulation_scheduler, "run", recording_run)
+        client = TestClient(app)
+        assert client.post("/fleet", json={"base": BASE, "headway": 300, "count": 3}).status_code == 200
+        assert priorities == ["bulk"]
+
+        monkeypatch.setattr(api, "MAX_REQUEST_BYTES", 2**20)
+        response = client.post("/fleet", json={"base": BASE, "headway": 60, "count": 100, "sample_interval": 0.01})
+        assert response.status_code == 413
+
+    def test_missing_departures(self):
+        client = TestClient(app)
+        response = client.post("/fleet", json={"base": BASE})
+        assert response.status_code == 400
@@ -0,0 +1,53 @@
+"""
+Testes do harness de carga (benchmarks.load)
+"""
+
+import random
+
+import pytest
+
+from benchmarks.load import (SCENARIOS, build_workload, parse_config, percentiles, run,
+                             scenario_payload)
+from engine.schemas import SimulationParamsDto
+
+
+class TestWorkload:
+
+    @pytest.mark.parametrize("scenario", SCENARIOS)
+    def test_scenarios_are_valid_params(self, scenario):
+        payload = scenario_payload(scenario, random.Random(1))
+        params = SimulationParamsDto(**payload)
+        assert (params.acceleration_curve_config is not None) == (scenario == "curve")
+
+    def test_mix_weights_and_distinct_variants(self):
+        workload = build_workload({"urban": 3, "regional": 1}, distinct=2, seed=0)
+        scenarios = [scenario for scenario, _ in workload]
+        assert scenarios.count("urban") == 6 and scenarios.count("regional") == 2
+        assert len({str(payload) for scenario, payload in workload if scenario == "urban"}) == 2
+        assert workload == build_workload({"urban": 3, "regional": 1}, distinct=2, seed=0)
+
+    def test_parse_config(self):
+        assert parse_config("SIM_WORKERS=4,SIM_PROCESS_WORKERS=2") == {
+            "SIM_WORKERS": "4", "SIM_PROCESS_WORKERS": "2"}
+        assert parse_config("") == {}
+        with pytest.raises(ValueError):
+            parse_config("SIM_WORKERS")
+
+    def test_percentiles(self):
+        stats = percentiles([0.001 * i for i in range(1, 101)])
+        assert stats["p50"] == pytest.approx(50.5)
+        assert stats["max"] == pytest.approx(100.0)
+
+
+class TestRun:
+
+    def test_in_process_sweep(self):
+        rows = run([1, 3], requests=9, mix={"urban": 1, "curve": 1}, distinct=1,
+                   in_process=True, warmup=2)
+        assert [row["concurrency"] for row in rows] == [1, 3]
+        for row in rows:
+            assert row["requests"] == 9
+            assert row["error_rate"] == 0.0
+            assert row["rps"] > 0
+            assert 0 < row["latency_ms"]["p50"] <= row["latency_ms"]["p99"]
+            assert set(row["scenarios"]) == {"urban", "curve"}
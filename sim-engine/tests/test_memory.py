@@ -0,0 +1,118 @@
+"""
+Testes da estimativa de memória, do limite de admissão e do pico medido
+"""
+
+import tracemalloc
+
+import pytest
+from fastapi.testclient import TestClient
+
+import engine.api as api
+from conftest import line_params
+from engine.memory import BYTES_PER_POINT, MemoryLimitError, admit_simulation, estimate_simulation
+from engine.schemas import SimulationParamsDto
+from engine.service import SimulationService
+from main import app
+
+BASE = line_params(dt=0.05)
+
+
+def params(**overrides):
+    return SimulationParamsDto(**{**BASE, **overrides})
+
+
+class TestEstimate:
+
+    @pytest.mark.parametrize("overrides", [{}, {"dt": 0.2}, {"terminal_layover": 900.0},
+                                           {"output_interval": 1.0}])
+    def test_estimate_close_to_actual_points(self, overrides):
+        service = SimulationService()
+        estimate = estimate_simulation(service, params(**overrides))
+        actual = len(service.run_simulation(params(**overrides))["time"])
+        assert 0.9 * actual <= estimate["points"] <= 1.3 * actual
+        assert estimate["bytes"] == estimate["points"] * BYTES_PER_POINT
+
+    def test_max_points_bounds_estimate(self):
+        estimate = estimate_simulation(SimulationService(), params(max_points=500))
+        assert estimate["points"] == 500
+
+
+class TestAdmission:
+
+    def test_within_limit_unchanged(self):
+        original = params()
+        admitted, estimate = admit_simulation(SimulationService(), original, 1 << 30)
+        assert admitted is original
+        assert not estimate["decimated"]
+
+    def test_decimate_forces_max_points(self):
+        service = SimulationService()
+        limit = 2000 * BYTES_PER_POINT
+        admitted, estimate = admit_simulation(service, params(), limit, policy="decimate")
+        assert estimate["decimated"]
+        assert admitted.max_points == 2000
+        assert len(service.run_simulation(admitted)["time"]) <= 2000
+
+    def test_precision_mode_admitted_at_finest_dt(self):
+        service = SimulationService()
+        short = {"stations": [{"name": "A", "km": 0}, {"name": "B", "km": 1}], "terminal_layover": 0.0}
+        coarse = params(**short, dt=0.5)
+        precise = params(**short, dt=0.5, arrival_tolerance=1e-4)
+        assert estimate_simulation(service, precise)["points"] > 50 * estimate_simulation(service, coarse)["points"]
+
+        limit = 2000 * BYTES_PER_POINT
+        admitted, estimate = admit_simulation(service, precise, limit, policy="decimate")
+        assert estimate["decimated"]
+        assert len(service.run_simulation(admitted)["time"]) <= 2000
+        with pytest.raises(MemoryLimitError):
+            admit_simulation(service, precise, limit, policy="reject")
+
+    def test_reject_policy(self):
+        with pytest.raises(MemoryLimitError):
+            admit_simulation(SimulationService(), params(), 1000 * BYTES_PER_POINT, policy="reject")
+
+    def test_limit_below_fixed_points_rejected_even_when_decimating(self):
+        with pytest.raises(MemoryLimitError):
+            admit_simulation(SimulationService(), params(), 10 * BYTES_PER_POINT, policy="decimate")
+
+
+class TestEndpoint:
+
+    def test_oversized_request_is_decimated(self, monkeypatch):
+        monkeypatch.setattr(api, "MAX_REQUEST_BYTES", 1500 * BYTES_PER_POINT)
+        monkeypatch.setattr(api, "MEMORY_POLICY", "decimate")
+        response = TestClient(app).post("/simulate", json=BASE)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["memory_estimate"]["decimated"]
+        assert len(data["time"]) <= data["memory_estimate"]["max_points"] == 1500
+
+    def test_oversized_request_rejected_with_413(self, monkeypatch):
+        monkeypatch.setattr(api, "MAX_REQUEST_BYTES", 1500 * BYTES_PER_POINT)
+        monkeypatch.setattr(api, "MEMORY_POLICY", "reject")
+        response = TestClient(app).post("/simulate", json=BASE)
+        assert response.status_code == 413
+        assert "max_points" in response.json()["detail"]
+
+    def test_batch_reports_rejection_per_item(self, monkeypatch):
+        monkeypatch.setattr(api, "MAX_REQUEST_BYTES", 1500 * BYTES_PER_POINT)
+        monkeypatch.setattr(api, "MEMORY_POLICY", "reject")
+        small = {**BASE, "stations": [{"name": "A", "km": 0}, {"name": "B", "km": 0.5}], "dt": 0.5,
+                 "terminal_layover": 0.0}
+        response = TestClient(app).post("/simulate/batch", json={"items": [small, BASE]})
+        assert response.status_code == 200
+        statuses = [item["status"] for item in response.json()["results"]]
+        assert statuses == ["ok", "error"]
+
+    def test_peak_memory_header_with_tracemalloc(self):
+        client = TestClient(app)
+        assert "x-peak-memory-bytes" not in client.post("/simulate", json=BASE).headers
+
+        tracemalloc.start()
+        try:
+            response = client.post("/simulate", json={**BASE, "dt": 0.03})
+        finally:
+            tracemalloc.stop()
+        assert response.status_code == 200
+        # Pelo menos o corpo da resposta passou pela memória rastreada
+        assert int(response.headers["x-peak-memory-bytes"]) >= len(response.content)
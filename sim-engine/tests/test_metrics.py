@@ -0,0 +1,107 @@
+"""
+Testes das métricas em formato Prometheus (/metrics)
+"""
+
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine.metrics import MetricsRegistry, registry
+from main import app
+
+PARAMS = line_params(
+    stations=[{"name": "A", "km": 0}, {"name": "B", "km": 2}],
+    terminal_layover=60.0,
+    dt=0.07,
+)
+
+
+def sample(text, name, **labels):
+    """Valor de uma amostra da exposição (labels parciais)"""
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = re.match(r"^(\w+)(?:\{(.*)\})? (\S+)$", line)
+        if match is None or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2) or ""))
+        if all(found.get(key) == str(value) for key, value in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+class TestRegistry:
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics = MetricsRegistry()
+        histogram = metrics.histogram("latency_seconds", "Latência", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, stage="a")
+
+        text = metrics.render()
+        assert "# TYPE latency_seconds histogram" in text
+        assert sample(text, "latency_seconds_bucket", stage="a", le="0.1") == 1
+        assert sample(text, "latency_seconds_bucket", stage="a", le=1) == 3
+        assert sample(text, "latency_seconds_bucket", stage="a", le="+Inf") == 4
+        assert sample(text, "latency_seconds_count", stage="a") == 4
+        assert sample(text, "latency_seconds_sum", stage="a") == pytest.approx(4.05)
+
+    def test_counter_gauge_and_callback_values(self):
+        metrics = MetricsRegistry()
+        metrics.counter("jobs", "Jobs").inc(3)
+        metrics.gauge("depth", "Fila", ("queue",), function=lambda: {("bulk",): 7}).set(2, queue="interactive")
+
+        text = metrics.render()
+        assert sample(text, "jobs_total") == 3
+        assert sample(text, "depth", queue="bulk") == 7
+        assert sample(text, "depth", queue="interactive") == 2
+
+    def test_label_values_are_escaped(self):
+        metrics = MetricsRegistry()
+        metrics.counter("errors", "Erros", ("message",)).inc(message='a "b"\n')
+        assert 'errors_total{message="a \\"b\\"\\n"} 1' in metrics.render()
+
+    def test_wrong_labels_rejected(self):
+        metrics = MetricsRegistry()
+        counter = metrics.counter("jobs", "Jobs", ("kind",))
+        with pytest.raises(ValueError):
+            counter.inc()
+
+
+class TestEndpoint:
+
+    def test_simulation_populates_stage_and_request_metrics(self):
+        client = TestClient(app)
+        registry.clear()
+
+        assert client.post("/simulate", json=PARAMS).status_code == 200
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+
+        for stage in ("queue", "handler", "serialization", "simulation", "direction",
+                      "integration", "assembly", "validation"):
+            assert sample(text, "sim_stage_duration_seconds_count", stage=stage) >= 1, stage
+        assert sample(text, "sim_request_duration_seconds_count",
+                      method="POST", route="/simulate", status=200) == 1
+        segments = sum(sample(text, "sim_segment_duration_seconds_count", source=source) or 0
+                       for source in ("memory", "store", "integrated"))
+        assert segments == 2
+        assert sample(text, "sim_steps_integrated_total") > 0
+        assert sample(text, "sim_points_returned_total") > 0
+        assert sample(text, "sim_cache_hits_total", cache="segment") is not None
+        assert sample(text, "sim_queue_depth", priority="bulk") == 0
+        # A própria requisição /metrics está em andamento durante a exposição
+        assert sample(text, "sim_requests_in_flight") == 1
+
+    def test_route_template_used_as_label(self):
+        client = TestClient(app)
+        registry.clear()
+
+        client.get("/timetable/unknown/trajectory/0")
+        text = client.get("/metrics").text
+        assert sample(text, "sim_request_duration_seconds_count",
+                      route="/timetable/{timetable_id}/trajectory/{index}", status=404) == 1
@@ -0,0 +1,70 @@
+"""
+Testes do solver de projeto inverso (bisseção sobre run_schedule)
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine.optimize import find_minimum_parameter
+from engine.service import SimulationService
+from engine.sweep import apply_point
+from main import app
+
+BASE = line_params()
+
+
+class TestFindMinimumParameter:
+
+    def test_bisection_meets_target_with_minimum_value(self):
+        service = SimulationService()
+        reference = service.run_schedule(apply_point(BASE, {"max_speed": 25.0}))["total_time"]
+
+        result = find_minimum_parameter(service, BASE, "max_speed", reference,
+                                        lower=10.0, upper=40.0, tolerance=0.05)
+
+        assert result["feasible"] and result["converged"]
+        assert result["total_time"] <= reference
+        assert result["value"] <= 25.0 + 0.05
+        assert result["iterations"] == len(result["history"]) <= 40
+        assert result["compute_time_s"] > 0
+
+        # Um pouco abaixo do valor encontrado o alvo não é atingido
+        slower = service.run_schedule(apply_point(BASE, {"max_speed": result["value"] - 0.1}))
+        assert slower["total_time"] > reference
+
+    def test_infeasible_target_reported(self):
+        result = find_minimum_parameter(SimulationService(), BASE, "initial_accel", 60.0,
+                                        lower=0.5, upper=2.0)
+        assert not result["feasible"]
+        assert result["value"] is None
+        assert result["iterations"] == 1
+
+    def test_max_speed_lower_bound_clamped_to_threshold(self):
+        service = SimulationService()
+        # Padrão seria 0.25 x 20 = 5 m/s, abaixo do threshold_speed (8 m/s)
+        reference = service.run_schedule(apply_point(BASE, {"max_speed": 12.0}))["total_time"]
+        result = find_minimum_parameter(service, BASE, "max_speed", reference + 1000.0, tolerance=0.05)
+
+        assert result["feasible"]
+        assert all(point["value"] > BASE["threshold_speed"] for point in result["history"])
+        assert result["value"] == pytest.approx(BASE["threshold_speed"] + 0.05)
+
+        with pytest.raises(ValueError):
+            find_minimum_parameter(service, BASE, "max_speed", 1000.0, lower=2.0, upper=8.0)
+
+    def test_invalid_bounds_rejected(self):
+        with pytest.raises(ValueError):
+            find_minimum_parameter(SimulationService(), BASE, "max_speed", 1000.0, lower=30.0, upper=10.0)
+
+
+def test_optimize_endpoint():
+    client = TestClient(app)
+    response = client.post("/optimize", json={
+        "base": BASE, "parameter": "max_speed", "target_total_time": 1200.0, "tolerance": 0.1,
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["feasible"]
+    assert body["total_time"] <= 1200.0
+    assert body["iterations"] == len(body["history"])
@@ -0,0 +1,105 @@
+"""
+Testes da amostragem de saída independente do passo de integração
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine.rk4 import RK4Solver, TrainPhysics
+from engine.schemas import SimulationParamsDto
+from engine.service import SimulationService
+from main import app
+
+BASE = line_params(dt=0.02)
+
+
+class TestSolverRecordEvery:
+
+    def solve(self, record_every):
+        physics = TrainPhysics(1.0, 8.0, 20.0)
+        return RK4Solver(dt=0.05).solve(0.0, 0.0, (0.0, 300.0), physics.acceleration_function,
+                                        target_position=2000.0, use_braking=True,
+                                        record_every=record_every)
+
+    def test_subsamples_full_trajectory(self):
+        t_full, pos_full, vel_full = self.solve(1)
+        t, pos, vel = self.solve(10)
+
+        assert len(t) < len(t_full) / 9
+        # Pontos registrados são estados exatos da integração completa
+        indices = np.searchsorted(t_full, t)
+        assert t_full[indices] == pytest.approx(t)
+        assert pos_full[indices] == pytest.approx(pos)
+        # Primeiro e último pontos sempre mantidos
+        assert (t[0], pos[-1], vel[-1]) == (t_full[0], pos_full[-1], vel_full[-1])
+
+    def test_arrival_anchor_kept(self):
+        t_full, pos_full, _ = self.solve(1)
+        t, pos, _ = self.solve(37)
+        first_full = np.flatnonzero(pos_full >= 2000.0)[0]
+        first = np.flatnonzero(pos >= 2000.0)[0]
+        assert t[first] == t_full[first_full]
+
+    def test_invalid_record_every(self):
+        with pytest.raises(ValueError):
+            self.solve(0)
+
+
+class TestServiceOutputSampling:
+
+    def test_output_interval_keeps_schedule(self):
+        service = SimulationService()
+        full = service.run_simulation(SimulationParamsDto(**BASE))
+        sampled = service.run_simulation(SimulationParamsDto(**BASE, output_interval=1.0))
+
+        assert len(sampled["time"]) < len(full["time"]) / 40
+        assert sampled["schedule"] == full["schedule"]
+        assert np.all(np.diff(sampled["time"]) >= 0)
+        assert max(np.diff(sampled["time"])) <= 120.0 + 1e-9  # maior intervalo: o dwell/layover
+
+    def test_max_points_caps_output(self):
+        service = SimulationService()
+        for max_points in (100, 500, 3000):
+            result = service.run_simulation(SimulationParamsDto(**BASE, max_points=max_points))
+            assert len(result["time"]) <= max_points
+            assert len(result["time"]) > max_points / 3
+
+    def test_max_points_stride_without_schedule_pass(self, monkeypatch):
+        service = SimulationService()
+
+        def no_schedule(*args, **kwargs):
+            raise AssertionError("output_stride não deve integrar o cronograma")
+
+        monkeypatch.setattr(service, "run_schedule", no_schedule)
+        assert service.output_stride(SimulationParamsDto(**BASE, max_points=500)) > 1
+
+    def test_max_points_caps_output_with_acceleration_curve(self):
+        service = SimulationService()
+        curved = {**BASE, "max_speed": 40.0, "threshold_speed": 5.0,
+                  "acceleration_curve_config": {"loss_factor": 0.5}}
+        for max_points in (100, 1000):
+            result = service.run_simulation(SimulationParamsDto(**curved, max_points=max_points))
+            assert max_points / 3 < len(result["time"]) <= max_points
+
+    def test_max_points_too_small(self):
+        with pytest.raises(ValueError):
+            SimulationService().run_simulation(SimulationParamsDto(**BASE, max_points=10))
+
+    def test_sampled_segments_cached_separately(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        sampled = SimulationParamsDto(**BASE, output_interval=2.0)
+        assert set(service.segment_keys(params)).isdisjoint(service.segment_keys(sampled))
+
+
+class TestEndpoint:
+
+    def test_simulate_with_output_interval(self):
+        client = TestClient(app)
+        response = client.post("/simulate", json={**BASE, "output_interval": 5.0})
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["time"]) < 400
+        assert len(data["schedule"]) == 4
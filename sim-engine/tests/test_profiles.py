@@ -0,0 +1,113 @@
+"""
+Testes do registro de perfis de material rodante
+"""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from engine import api
+from engine.profiles import ProfileRegistry, profile_schedule
+from engine.schemas import ProfileScheduleRequestDto, RollingStockProfileDto, SimulationParamsDto
+from engine.service import SimulationService
+from main import app
+
+PROFILES = {
+    "profiles": [
+        {"name": "metro", "initial_accel": 1.0, "threshold_speed": 8.0, "max_speed": 20.0,
+         "max_distance_km": 20},
+        {"name": "regional", "initial_accel": 0.8, "threshold_speed": 10.0, "max_speed": 30.0,
+         "acceleration_curve_config": {"loss_factor": 60}, "max_distance_km": 20},
+    ]
+}
+STATIONS = [{"name": "A", "km": 0}, {"name": "B", "km": 3}, {"name": "C", "km": 8}]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps(PROFILES))
+    registry = ProfileRegistry()
+    registry.load(str(path), service=SimulationService())
+    return registry
+
+
+class TestRegistry:
+
+    def test_warmup_report(self, registry):
+        report = registry.warmup_report()
+        assert [entry["name"] for entry in report] == ["metro", "regional"]
+        for entry in report:
+            assert entry["build_time_s"] > 0
+            assert entry["memory_bytes"] > 0
+            assert entry["table_points"] == 2001
+            # Tabela contra integração: diferença de poucos passos de integração
+            assert entry["validation_max_error_s"] < 1.5
+
+    def test_unknown_profile(self, registry):
+        with pytest.raises(KeyError):
+            registry.get("missing")
+
+    def test_segment_too_long(self, registry):
+        with pytest.raises(ValueError):
+            registry.get("metro").segment_times([25000.0])
+
+    def test_table_is_monotonic(self, registry):
+        profile = registry.get("regional")
+        assert np.all(np.diff(profile.table_time) > 0)
+        assert profile.table_max_speed.max() == pytest.approx(30.0, abs=0.1)
+        assert len(profile.curve_velocity) == len(profile.curve_acceleration) > 0
+
+
+class TestProfileSchedule:
+
+    def test_matches_integrated_schedule(self, registry):
+        service = SimulationService()
+        request = ProfileScheduleRequestDto(stations=STATIONS, dwell_time=30, terminal_layover=120)
+        table = profile_schedule(service, registry.get("metro"), request)
+
+        integrated = service.run_schedule(SimulationParamsDto(
+            initial_accel=1.0, threshold_speed=8.0, max_speed=20.0, stations=STATIONS,
+            dwell_time=30, terminal_layover=120, dt=0.1,
+        ))
+        assert [e["station"] for e in table["schedule"]] == [e["station"] for e in integrated["schedule"]]
+        assert table["segment_times"] == pytest.approx(integrated["segment_times"], abs=1.5)
+        assert table["total_time"] == pytest.approx(integrated["total_time"], abs=4 * 1.5)
+        assert table["schedule"][-1]["departure_time"] == table["total_time"]
+
+    def test_yaml_requires_pyyaml_or_loads(self, tmp_path):
+        path = tmp_path / "profiles.yaml"
+        path.write_text("profiles:\n  - {name: metro, initial_accel: 1.0, threshold_speed: 8.0, "
+                        "max_speed: 20.0, max_distance_km: 5}\n")
+        registry = ProfileRegistry()
+        try:
+            import yaml  # noqa: F401
+        except ImportError:
+            with pytest.raises(ValueError):
+                registry.load(str(path))
+        else:
+            registry.load(str(path))
+            assert registry.names() == ["metro"]
+
+
+class TestProfileEndpoints:
+
+    def test_schedule_endpoint(self, registry, monkeypatch):
+        monkeypatch.setattr(api, "profile_registry", registry)
+        client = TestClient(app)
+
+        profiles = client.get("/profiles").json()
+        assert [p["name"] for p in profiles] == ["metro", "regional"]
+
+        response = client.post("/profiles/regional/schedule", json={
+            "stations": STATIONS, "dwell_time": 20, "terminal_layover": 60,
+        })
+        assert response.status_code == 200
+        assert response.json()["profile"] == "regional"
+        assert len(response.json()["schedule"]) == 4
+
+        assert client.post("/profiles/missing/schedule", json={
+            "stations": STATIONS, "dwell_time": 20, "terminal_layover": 60,
+        }).status_code == 404
@@ -0,0 +1,109 @@
+"""
+Testes do perfil sob demanda (header X-Profile)
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import engine.api as api
+from conftest import line_params
+from engine.profiling import RequestProfiler
+from main import app
+
+PARAMS = line_params(stations=[{"name": "A", "km": 0}, {"name": "B", "km": 2}], terminal_layover=60.0, dt=0.1)
+
+
+def busy(n):
+    total = 0
+    for i in range(n):
+        total += inner(i)
+    return total
+
+
+def inner(i):
+    return sum(range(i % 50))
+
+
+class TestRequestProfiler:
+
+    def test_cprofile_ranks_functions_by_self_time(self):
+        profiler = RequestProfiler("cprofile", top=5)
+        assert profiler.run(busy, 2000) == busy(2000)
+
+        report = profiler.report
+        assert report["mode"] == "cprofile"
+        assert len(report["functions"]) <= 5
+        names = {f["function"] for f in report["functions"]}
+        assert "inner" in names
+        inner_stats = next(f for f in report["functions"] if f["function"] == "inner")
+        assert inner_stats["calls"] == 2000
+        self_times = [f["self_time_s"] for f in report["functions"]]
+        assert self_times == sorted(self_times, reverse=True)
+
+    def test_sampling_collects_collapsed_stacks(self):
+        profiler = RequestProfiler("sampling", interval=0.0005)
+        profiler.run(busy, 200000)
+
+        report = profiler.report
+        assert report["samples"] > 0
+        lines = report["collapsed"].strip().splitlines()
+        # Pilhas começam na função perfilada: "busy (...);inner (...) N"
+        assert all(line.startswith("busy (test_profiling.py:") for line in lines)
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == report["samples"]
+        assert report["functions"][0]["cumulative_time_s"] <= report["wall_time_s"] + 1e-9
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError):
+            RequestProfiler("perf")
+
+
+class TestEndpoint:
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.setattr(api, "PROFILING_ENABLED", False)
+        client = TestClient(app)
+        response = client.post("/simulate", json=PARAMS, headers={"X-Profile": "true"})
+        assert response.status_code == 403
+
+        # Sem o header a simulação não é afetada
+        response = client.post("/simulate", json=PARAMS)
+        assert response.status_code == 200
+        assert response.json()["profiling"] is None
+
+    def test_simulate_returns_breakdown(self, monkeypatch):
+        monkeypatch.setattr(api, "PROFILING_ENABLED", True)
+        monkeypatch.setattr(api, "PROFILING_TOKEN", None)
+        client = TestClient(app)
+        response = client.post("/simulate", json={**PARAMS, "dt": 0.09}, headers={"X-Profile": "true"})
+        assert response.status_code == 200
+
+        report = response.json()["profiling"]
+        assert report["mode"] == "cprofile"
+        assert {"_step", "solve"} & {f["function"] for f in report["functions"]}
+
+    def test_schedule_sampling_mode(self, monkeypatch):
+        monkeypatch.setattr(api, "PROFILING_ENABLED", True)
+        monkeypatch.setattr(api, "PROFILING_TOKEN", None)
+        client = TestClient(app)
+        response = client.post("/schedule", json={**PARAMS, "dt": 0.011}, headers={"X-Profile": "sampling"})
+        assert response.status_code == 200
+        report = response.json()["profiling"]
+        assert report["mode"] == "sampling"
+        assert report["collapsed"] is not None
+
+    def test_token_required_when_configured(self, monkeypatch):
+        monkeypatch.setattr(api, "PROFILING_ENABLED", True)
+        monkeypatch.setattr(api, "PROFILING_TOKEN", "secret")
+        client = TestClient(app)
+
+        response = client.post("/schedule", json=PARAMS, headers={"X-Profile": "true"})
+        assert response.status_code == 403
+        response = client.post("/schedule", json=PARAMS,
+                               headers={"X-Profile": "true", "X-Profile-Token": "secret"})
+        assert response.status_code == 200
+
+    def test_invalid_mode(self, monkeypatch):
+        monkeypatch.setattr(api, "PROFILING_ENABLED", True)
+        monkeypatch.setattr(api, "PROFILING_TOKEN", None)
+        response = TestClient(app).post("/schedule", json=PARAMS, headers={"X-Profile": "perf"})
+        assert response.status_code == 400
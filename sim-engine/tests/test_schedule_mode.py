@@ -0,0 +1,79 @@
+"""
+Testes do modo só-cronograma (RK4Solver.solve_final e SimulationService.run_schedule)
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine.rk4 import RK4Solver, TrainPhysics
+from engine.service import SimulationService
+from main import app
+
+
+def make_params(dt=0.1, curve=None):
+    return SimpleNamespace(
+        stations=[SimpleNamespace(name="A", km=0), SimpleNamespace(name="B", km=1.2),
+                  SimpleNamespace(name="C", km=4.7), SimpleNamespace(name="D", km=9)],
+        initial_accel=1.1, threshold_speed=12.0, max_speed=25.0,
+        dwell_time=30.0, terminal_layover=120.0, dt=dt,
+        acceleration_curve_config=curve
+    )
+
+
+class TestSolveFinal:
+
+    @pytest.mark.parametrize("dt", [0.05, 0.1, 0.37])
+    @pytest.mark.parametrize("distance", [150.0, 2000.0])
+    def test_matches_materialized_solve(self, dt, distance):
+        physics = TrainPhysics(initial_accel=1.0, threshold_speed=10.0, max_speed=22.0)
+        solver = RK4Solver(dt=dt)
+        kwargs = dict(initial_position=0.0, initial_velocity=0.0, time_span=(0.0, 400.0),
+                      acceleration_func=physics.acceleration_function,
+                      target_position=distance, use_braking=True)
+
+        t, pos, vel = solver.solve(**kwargs)
+        final = solver.solve_final(**kwargs)
+        arrival_idx = SimulationService()._find_arrival_index(pos, distance)
+
+        assert final["final_time"] == t[-1]
+        assert final["final_position"] == pos[-1]
+        assert final["arrival_time"] == t[arrival_idx]
+        assert final["steps"] == len(t) - 1
+        assert final["max_velocity"] == vel[:arrival_idx].max()
+
+    def test_solve_truncates_at_target(self):
+        """Arrays terminam na chegada, sem cauda não integrada"""
+        physics = TrainPhysics(initial_accel=1.0, threshold_speed=10.0, max_speed=22.0)
+        t, pos, vel = RK4Solver(dt=0.1).solve(0.0, 0.0, (0.0, 400.0), physics.acceleration_function,
+                                             target_position=1000.0, use_braking=True)
+        assert pos[-1] == 1000.0
+        assert vel[-1] == 0.0
+        assert t[-1] < 400.0
+
+
+class TestRunSchedule:
+
+    @pytest.mark.parametrize("curve", [None, {"loss_factor": 30}])
+    def test_schedule_identical_to_full_simulation(self, curve):
+        params = make_params(curve=curve)
+        full = SimulationService().run_simulation(params)
+        fast = SimulationService().run_schedule(params)
+
+        assert fast["schedule"] == full["schedule"]
+        assert fast["max_speed_reached"] == max(full["velocity"])
+        assert fast["total_time"] == full["schedule"][-1]["departure_time"]
+
+    def test_schedule_endpoint(self):
+        client = TestClient(app)
+        response = client.post("/schedule", json=line_params(
+            initial_accel=1.1, threshold_speed=12.0, max_speed=25.0,
+            stations=[{"name": "A", "km": 0}, {"name": "B", "km": 3}], dt=0.1,
+        ))
+        assert response.status_code == 200
+        body = response.json()
+        assert [entry["station"] for entry in body["schedule"]] == ["B", "A"]
+        assert "time" not in body
+        assert len(body["segment_times"]) == 2
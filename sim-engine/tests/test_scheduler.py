@@ -0,0 +1,88 @@
+"""
+Testes do scheduler por prioridade: despacho ponderado, preempção e percentis
+"""
+
+import threading
+import pytest
+from engine.scheduler import SimulationScheduler, PRIORITY_INTERACTIVE, PRIORITY_BULK
+
+
+class TestWeightedDispatch:
+
+    def test_interactive_dispatched_ahead_of_bulk_backlog(self):
+        """Com um worker, a fila interativa recebe a maior parte dos despachos"""
+        scheduler = SimulationScheduler(workers=1, weights={PRIORITY_INTERACTIVE: 3, PRIORITY_BULK: 1})
+        gate = threading.Event()
+        order = []
+
+        # Bloquear o único worker enquanto as filas são preenchidas
+        blocker = scheduler.submit(gate.wait)
+        futures = [scheduler.submit(order.append, f"b{i}", priority=PRIORITY_BULK) for i in range(4)]
+        futures += [scheduler.submit(order.append, f"i{i}") for i in range(6)]
+        gate.set()
+        for f in [blocker] + futures:
+            f.result(timeout=5)
+        scheduler.shutdown()
+
+        # Nas primeiras 4 escolhas, no máximo 1 é bulk (pesos 3:1)
+        assert sum(1 for item in order[:4] if item.startswith("b")) == 1
+        assert order.index("i5") < order.index("b3")
+
+    def test_unknown_priority_rejected(self):
+        scheduler = SimulationScheduler(workers=1)
+        with pytest.raises(ValueError):
+            scheduler.submit(lambda: None, priority="urgent")
+        scheduler.shutdown()
+
+
+class TestPreemption:
+
+    def test_bulk_job_runs_pending_interactive_at_checkpoint(self):
+        """Trabalho interativo enfileirado roda dentro do checkpoint do job bulk"""
+        scheduler = SimulationScheduler(workers=1)
+        started = threading.Event()
+        release = threading.Event()
+        events = []
+
+        def bulk_job():
+            started.set()
+            release.wait()
+            events.append("bulk-segment-1")
+            scheduler.checkpoint()
+            events.append("bulk-segment-2")
+
+        bulk = scheduler.submit(bulk_job, priority=PRIORITY_BULK)
+        started.wait(timeout=5)
+        interactive = scheduler.submit(events.append, "interactive")
+        release.set()
+
+        bulk.result(timeout=5)
+        interactive.result(timeout=5)
+        scheduler.shutdown()
+
+        assert events == ["bulk-segment-1", "interactive", "bulk-segment-2"]
+        assert scheduler.stats()["preemptions"] == 1
+
+    def test_exceptions_propagate_to_future(self):
+        scheduler = SimulationScheduler(workers=1)
+        future = scheduler.submit(lambda: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            future.result(timeout=5)
+        scheduler.shutdown()
+
+
+class TestStats:
+
+    def test_wait_percentiles_per_class(self):
+        scheduler = SimulationScheduler(workers=2)
+        for _ in range(10):
+            scheduler.submit(lambda: None).result(timeout=5)
+        scheduler.submit(lambda: None, priority=PRIORITY_BULK).result(timeout=5)
+        stats = scheduler.stats()
+        scheduler.shutdown()
+
+        interactive = stats["classes"][PRIORITY_INTERACTIVE]
+        assert interactive["completed"] == 10
+        assert interactive["wait_samples"] == 10
+        assert 0 <= interactive["wait_p50_ms"] <= interactive["wait_p95_ms"] <= interactive["wait_p99_ms"]
+        assert stats["classes"][PRIORITY_BULK]["completed"] == 1
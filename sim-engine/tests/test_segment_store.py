@@ -0,0 +1,97 @@
+"""
+Testes do armazenamento persistente de segmentos (SQLite + .npy mapeado)
+"""
+
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from conftest import line_params
+from engine.schemas import SimulationParamsDto
+from engine.segment_store import SegmentStore
+from engine.service import SimulationService
+
+PARAMS = line_params()
+
+
+def trajectory(n: int, scale: float = 1.0):
+    t = np.arange(n, dtype=float)
+    return t, t * scale, np.ones(n)
+
+
+def _write_in_child(directory: str) -> None:
+    SegmentStore(directory).put(("child", 1), trajectory(10, 3.0))
+
+
+class TestSegmentStore:
+
+    def test_roundtrip_is_read_only_mmap(self, tmp_path):
+        store = SegmentStore(str(tmp_path))
+        store.put(("a", 1.0), trajectory(100, 2.0))
+
+        t, pos, vel = store.get(("a", 1.0))
+        assert isinstance(t, np.memmap)
+        assert not t.flags.writeable
+        assert pos.tolist() == (np.arange(100) * 2.0).tolist()
+        assert store.get(("missing",)) is None
+        assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
+
+    def test_atomic_write_leaves_no_temp_files(self, tmp_path):
+        store = SegmentStore(str(tmp_path))
+        store.put(("a",), trajectory(10))
+        store.put(("a",), trajectory(10, 5.0))  # regravação da mesma chave
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+        assert store.stats()["size"] == 1
+        assert store.get(("a",))[1][-1] == 45.0
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        segment_bytes = 3 * 1000 * 8
+        store = SegmentStore(str(tmp_path), max_bytes=int(2.5 * segment_bytes))
+        store.put(("old",), trajectory(1000))
+        store.put(("recent",), trajectory(1000))
+        store.put(("new",), trajectory(1000))
+
+        stats = store.stats()
+        assert stats["size"] == 2
+        assert stats["bytes"] <= store.max_bytes
+        assert stats["evictions"] == 1
+        assert store.get(("old",)) is None
+        assert store.get(("new",)) is not None
+        assert len([name for name in os.listdir(tmp_path) if name.endswith(".npy")]) == 2
+
+    def test_shared_between_processes(self, tmp_path):
+        process = multiprocessing.get_context("spawn").Process(target=_write_in_child, args=(str(tmp_path),))
+        process.start()
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+        t, pos, vel = SegmentStore(str(tmp_path)).get(("child", 1))
+        assert pos[-1] == 27.0
+
+
+class TestServiceWithStore:
+
+    def test_new_worker_starts_warm(self, tmp_path):
+        params = SimulationParamsDto(**PARAMS)
+        first = SimulationService(segment_store=SegmentStore(str(tmp_path)))
+        cold = first.run_simulation(params)
+        assert first.segment_store.stats()["writes"] == 2
+
+        # Novo processo/worker: cache em memória vazio, store no mesmo diretório
+        second = SimulationService(segment_store=SegmentStore(str(tmp_path)))
+        warm = second.run_simulation(params)
+        assert second.segment_store.stats()["hits"] == 2
+        assert second.segment_store.stats()["writes"] == 0
+        assert warm["time"] == cold["time"]
+        assert warm["position"] == cold["position"]
+
+    def test_schedule_mode_reads_store(self, tmp_path):
+        params = SimulationParamsDto(**PARAMS)
+        SimulationService(segment_store=SegmentStore(str(tmp_path))).run_simulation(params)
+
+        service = SimulationService(segment_store=SegmentStore(str(tmp_path)))
+        schedule = service.run_schedule(params)
+        assert service.segment_store.stats()["hits"] == 2
+        assert schedule["total_time"] == pytest.approx(SimulationService().run_schedule(params)["total_time"])
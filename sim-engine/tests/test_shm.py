@@ -0,0 +1,130 @@
+"""
+Testes da entrega de resultados por memória compartilhada
+"""
+
+import json
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine import api
+from engine.encoding import result_json
+from engine.process_pool import SimulationProcessPool
+from engine.schemas import SimulationParamsDto
+from engine.service import SimulationService
+from engine.shm import SharedResult, _tracker_name
+from main import app
+
+PARAMS = line_params(stations=[{"name": "A", "km": 0}, {"name": "B", "km": 3}])
+
+
+def block_exists(name: str) -> bool:
+    try:
+        shared_memory.SharedMemory(name=name).close()
+        return True
+    except FileNotFoundError:
+        return False
+
+
+class TestSharedResult:
+
+    def test_export_attach_release(self):
+        result = {"time": [0.0, 1.0, 2.0], "position": [0.0, 5.0, 9.0], "velocity": [0.0, 4.0, 3.0],
+                  "schedule": [{"station": "B", "arrival_time": 2.0, "departure_time": 3.0}]}
+        shared = SharedResult.export(result)
+
+        # Descritor pequeno: só nome, layout e metadados atravessam o pickle
+        received = pickle.loads(pickle.dumps(shared))
+        assert len(pickle.dumps(shared)) < 500
+
+        views = received.arrays()
+        assert views["position"].tolist() == [0.0, 5.0, 9.0]
+        assert not views["position"].flags.writeable
+        del views
+
+        assert received.to_result() == result
+        assert not block_exists(shared.name)
+        received.release()  # idempotente
+
+    def test_context_manager_releases(self):
+        shared = SharedResult.export({"time": np.arange(10.0), "position": np.zeros(10),
+                                      "velocity": np.ones(10)})
+        with shared:
+            assert shared.arrays()["time"][-1] == 9.0
+        assert not block_exists(shared.name)
+        with pytest.raises(ValueError):
+            shared.arrays()
+
+
+    def test_render_serializes_from_views(self):
+        result = {"time": np.arange(5.0), "position": np.linspace(0, 1, 5), "velocity": np.ones(5),
+                  "schedule": []}
+        shared = SharedResult.export(result)
+        seen = {}
+
+        def render(columns):
+            seen["types"] = {name: type(columns[name]) for name in ("time", "position", "velocity")}
+            return result_json(columns)
+
+        body = shared.render(render)
+        assert set(seen["types"].values()) == {np.ndarray}
+        assert json.loads(body)["position"] == result["position"].tolist()
+        assert not block_exists(shared.name)
+
+    def test_render_releases_on_error(self):
+        shared = SharedResult.export({"time": np.arange(3.0), "position": np.zeros(3), "velocity": np.zeros(3)})
+
+        def failing(columns):
+            raise RuntimeError("serialization failed")
+
+        with pytest.raises(RuntimeError):
+            shared.render(failing)
+        assert not block_exists(shared.name)
+
+    def test_tracker_name_uses_public_name(self):
+        shm = shared_memory.SharedMemory(create=True, size=8)
+        try:
+            assert _tracker_name(shm.name) == "/" + shm.name.lstrip("/")
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+class TestProcessPool:
+
+    def test_matches_in_process_simulation(self):
+        params = SimulationParamsDto(**PARAMS)
+        pool = SimulationProcessPool(workers=1)
+        try:
+            future = pool.submit(params)
+            shared = future.result(timeout=120)
+            name = shared.name
+            result = shared.to_result()
+            assert not block_exists(name)
+
+            expected = SimulationService().run_simulation(params)
+            assert result["time"] == expected["time"]
+            assert result["position"] == expected["position"]
+            assert result["schedule"] == expected["schedule"]
+            assert pool.run_simulation(params)["velocity"] == expected["velocity"]
+        finally:
+            pool.shutdown()
+
+    def test_pooled_endpoint_matches_in_process(self):
+        client = TestClient(app)
+        expected = client.post("/simulate", json=PARAMS).json()
+        api.configure(process_workers=1)
+        try:
+            response = client.post("/simulate", json=PARAMS)
+        finally:
+            api.configure(process_workers=0)
+        assert response.status_code == 200
+        body = response.json()
+        assert body.keys() == expected.keys()
+        assert body["result_id"] != expected["result_id"]
+        for key in ("time", "position", "velocity", "schedule", "memory_estimate", "profiling"):
+            assert body[key] == expected[key]
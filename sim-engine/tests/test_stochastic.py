@@ -0,0 +1,137 @@
+"""
+Testes do modo Monte Carlo (variabilidade de dwell e desempenho)
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine import api
+from engine.schemas import SimulationParamsDto
+from engine.service import SimulationService
+from engine.stochastic import quantize, sample_distribution, summarize
+from main import app
+
+BASE = line_params()
+
+
+class TestDistributions:
+
+    def test_sampling_and_truncation(self):
+        rng = np.random.default_rng(0)
+        values = sample_distribution({"distribution": "normal", "mean": 30, "std": 50, "low": 0}, 5000, rng)
+        assert values.min() >= 0
+        assert sample_distribution(None, 3, rng, default=7.0).tolist() == [7.0, 7.0, 7.0]
+
+        lognormal = sample_distribution({"distribution": "lognormal", "mean": 30, "std": 6}, 20000, rng)
+        assert lognormal.mean() == pytest.approx(30, rel=0.02)
+        assert lognormal.std() == pytest.approx(6, rel=0.05)
+
+    def test_uniform_requires_bounds(self):
+        with pytest.raises(ValueError):
+            sample_distribution({"distribution": "uniform"}, 10, np.random.default_rng(0))
+
+    def test_quantize_and_summarize(self):
+        assert quantize(np.array([0.94, 1.06]), 0.1) == pytest.approx([0.9, 1.1])
+        stats = summarize(np.arange(101.0), [50, 90])
+        assert stats["percentiles"] == {"p50": 50.0, "p90": 90.0}
+        assert stats["min"] == 0.0 and stats["max"] == 100.0
+
+
+class TestRunStochastic:
+
+    def test_fixed_inputs_reproduce_schedule(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        result = service.run_stochastic(params, samples=50, seed=1)
+        expected = service.run_schedule(params)
+
+        assert result["distinct_physics"] == 1
+        assert result["round_trip_time"]["std"] == pytest.approx(0.0, abs=1e-9)
+        assert result["round_trip_time"]["mean"] == pytest.approx(expected["total_time"])
+        arrivals = [stop["arrival"]["mean"] for stop in result["stops"]]
+        assert arrivals == pytest.approx([entry["arrival_time"] for entry in expected["schedule"]])
+
+    def test_dwell_variation_reuses_one_physics(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        result = service.run_stochastic(
+            params, samples=10000, seed=3,
+            dwell_time={"distribution": "uniform", "low": 20, "high": 40},
+            station_dwell={"C": {"distribution": "fixed", "mean": 60}},
+        )
+        assert result["distinct_physics"] == 1
+        base_total = service.run_schedule(params)["total_time"]
+        # 4 paradas: B, C (60s fixo), B, A; média dos uniformes = 30s
+        assert result["round_trip_time"]["mean"] == pytest.approx(base_total + 30.0, abs=1.0)
+        percentiles = result["round_trip_time"]["percentiles"]
+        assert percentiles["p5"] < percentiles["p50"] < percentiles["p95"] <= percentiles["p99"]
+
+    def test_physics_samples_are_quantized(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        result = service.run_stochastic(
+            params, samples=2000, seed=5,
+            max_speed={"distribution": "normal", "std": 1.0, "low": 15, "high": 25, "resolution": 0.5},
+        )
+        # Faixa de 15 a 25 com resolução 0.5: no máximo 21 integrações
+        assert result["distinct_physics"] <= 21
+        assert result["round_trip_time"]["std"] > 0
+
+    def test_distinct_physics_limit(self):
+        service = SimulationService()
+        spec = {"distribution": "uniform", "low": 15, "high": 25, "resolution": 0.1}
+        with pytest.raises(ValueError):
+            service.run_stochastic(SimulationParamsDto(**BASE), samples=500, seed=3,
+                                   max_speed=spec, max_physics=10)
+        assert service.physics_cache.stats()["size"] == 0
+
+    def test_seed_is_reproducible(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        options = dict(samples=200, seed=9, dwell_time={"distribution": "normal", "std": 5, "low": 0})
+        first = service.run_stochastic(params, **options)
+        second = service.run_stochastic(params, **options)
+        assert first["round_trip_time"] == second["round_trip_time"]
+
+
+class TestStochasticEndpoint:
+
+    def test_endpoint(self):
+        client = TestClient(app)
+        response = client.post("/simulate/stochastic", json={
+            "base": BASE, "samples": 1000, "seed": 1,
+            "dwell_time": {"distribution": "triangular", "low": 20, "high": 60, "mode": 30},
+            "initial_accel": {"distribution": "normal", "std": 0.05, "low": 0.5},
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["samples"] == 1000
+        assert len(data["stops"]) == 4
+        assert set(data["round_trip_time"]["percentiles"]) == {"p5", "p50", "p95", "p99"}
+
+    def test_endpoint_is_bulk_and_capped(self, monkeypatch):
+        priorities = []
+        run = api.simulation_scheduler.run
+
+        async def recording_run(fn, *args, priority, **kwargs):
+            priorities.append(priority)
+            return await run(fn, *args, priority=priority, **kwargs)
+
+        monkeypatch.setattr(api.simulation_scheduler, "run", recording_run)
+        client = TestClient(app)
+        assert client.post("/simulate/stochastic", json={"base": BASE, "samples": 10}).status_code == 200
+        assert priorities == ["bulk"]
+
+        monkeypatch.setattr(api, "STOCHASTIC_MAX_PHYSICS", 5)
+        response = client.post("/simulate/stochastic", json={
+            "base": BASE, "samples": 1000, "seed": 1,
+            "max_speed": {"distribution": "uniform", "low": 15, "high": 25},
+        })
+        assert response.status_code == 400
+
+    def test_invalid_percentile(self):
+        client = TestClient(app)
+        response = client.post("/simulate/stochastic", json={"base": BASE, "percentiles": [150]})
+        assert response.status_code == 400
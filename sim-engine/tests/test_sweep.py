@@ -0,0 +1,168 @@
+"""
+Testes do motor de sweep: expansão preguiçosa, métricas resumidas e retomada
+"""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine.service import SimulationService
+from engine.sweep import SweepLockedError, expand_points, open_checkpoint, run_sweep
+from main import app
+
+BASE = line_params(
+    initial_accel=1.2,
+    threshold_speed=10.0,
+    max_speed=18.0,
+    stations=[{"name": "A", "km": 0}, {"name": "B", "km": 1.5}, {"name": "C", "km": 3}],
+    dwell_time=20.0,
+    terminal_layover=60.0,
+)
+
+
+class TestExpansion:
+
+    def test_grid_is_cartesian_product(self):
+        points = list(expand_points({
+            "max_speed": {"min": 15, "max": 25, "steps": 3},
+            "dwell_time": {"values": [10, 20]},
+        }))
+        assert len(points) == 6
+        assert {p["max_speed"] for p in points} == {15.0, 20.0, 25.0}
+
+    def test_lhs_hits_every_stratum_once(self):
+        samples = 20
+        points = list(expand_points({"initial_accel": {"min": 0.0, "max": 1.0}},
+                                    strategy="lhs", samples=samples, seed=7))
+        strata = sorted(int(p["initial_accel"] * samples) for p in points)
+        assert strata == list(range(samples))
+
+    def test_seeded_sampling_is_reproducible(self):
+        spec = {"max_speed": {"min": 15, "max": 25}}
+        first = list(expand_points(spec, strategy="random", samples=5, seed=3))
+        second = list(expand_points(spec, strategy="random", samples=5, seed=3))
+        assert first == second
+
+    def test_unknown_parameter_rejected(self):
+        with pytest.raises(ValueError):
+            list(expand_points({"stations": {"min": 0, "max": 1}}))
+
+
+class TestRunSweep:
+
+    def test_summary_metrics_per_point(self):
+        result = run_sweep(BASE, {"max_speed": {"values": [15.0, 20.0]}})
+        assert result["total_points"] == 2
+
+        slow, fast = (p["metrics"] for p in result["points"])
+        assert len(slow["segment_times"]) == 4  # 2 segmentos ida + 2 volta
+        assert fast["total_time"] < slow["total_time"]
+        assert slow["max_speed_reached"] <= 15.0 + 1e-6
+        # Tempo total = viagens + dwells + layover
+        expected = sum(slow["segment_times"]) + 4 * BASE["dwell_time"] + BASE["terminal_layover"]
+        assert slow["total_time"] == pytest.approx(expected)
+
+    def test_resume_from_checkpoint(self, tmp_path):
+        checkpoint = tmp_path / "sweep.jsonl"
+        parameters = {"dwell_time": {"min": 10, "max": 30, "steps": 3}}
+
+        first = run_sweep(BASE, parameters, checkpoint_path=str(checkpoint))
+        assert first["resumed_points"] == 0
+
+        # Simular interrupção: remover o último ponto e truncar a linha anterior
+        lines = checkpoint.read_text().splitlines()
+        checkpoint.write_text("\n".join(lines[:-1]) + "\n" + lines[-1][:10])
+
+        service = SimulationService()
+        second = run_sweep(BASE, parameters, checkpoint_path=str(checkpoint), service=service)
+        assert second["resumed_points"] == 2
+        assert second["total_points"] == 3
+        assert [p["metrics"] for p in second["points"]] == [p["metrics"] for p in first["points"]]
+
+    def test_checkpoint_of_other_study_rejected(self, tmp_path):
+        checkpoint = tmp_path / "sweep.jsonl"
+        run_sweep(BASE, {"dwell_time": {"values": [10.0]}}, checkpoint_path=str(checkpoint))
+        with pytest.raises(ValueError):
+            run_sweep(BASE, {"dwell_time": {"values": [20.0]}}, checkpoint_path=str(checkpoint))
+
+
+    def test_unseeded_lhs_resumes_same_design(self, tmp_path):
+        checkpoint = tmp_path / "sweep.jsonl"
+        parameters = {"max_speed": {"min": 14, "max": 20}}
+
+        first = run_sweep(BASE, parameters, strategy="lhs", samples=4, checkpoint_path=str(checkpoint))
+        assert first["seed"] is not None
+        assert json.loads(checkpoint.read_text().splitlines()[0])["seed"] == first["seed"]
+
+        # Interromper após dois pontos: a retomada completa o mesmo hipercubo
+        lines = checkpoint.read_text().splitlines()
+        checkpoint.write_text("\n".join(lines[:3]) + "\n")
+        second = run_sweep(BASE, parameters, strategy="lhs", samples=4, checkpoint_path=str(checkpoint))
+        assert second["seed"] == first["seed"] and second["resumed_points"] == 2
+        assert [p["values"] for p in second["points"]] == [p["values"] for p in first["points"]]
+
+        with pytest.raises(ValueError):
+            run_sweep(BASE, parameters, strategy="lhs", samples=4, seed=first["seed"] + 1,
+                      checkpoint_path=str(checkpoint))
+
+    def test_include_trajectories_is_part_of_the_study(self, tmp_path):
+        checkpoint = tmp_path / "sweep.jsonl"
+        run_sweep(BASE, {"dwell_time": {"values": [10.0]}}, checkpoint_path=str(checkpoint))
+        with pytest.raises(ValueError):
+            run_sweep(BASE, {"dwell_time": {"values": [10.0]}}, checkpoint_path=str(checkpoint),
+                      include_trajectories=True)
+
+    def test_concurrent_run_on_same_checkpoint_rejected(self, tmp_path):
+        checkpoint = tmp_path / "sweep.jsonl"
+        running = open_checkpoint(str(checkpoint))
+        try:
+            with pytest.raises(SweepLockedError):
+                run_sweep(BASE, {"dwell_time": {"values": [10.0]}}, checkpoint_path=str(checkpoint))
+        finally:
+            running.close()
+        assert run_sweep(BASE, {"dwell_time": {"values": [10.0]}},
+                         checkpoint_path=str(checkpoint))["total_points"] == 1
+
+
+class TestSweepEndpoint:
+
+    def test_sweep_endpoint_runs_on_worker_pool(self, tmp_path, monkeypatch):
+        from engine import api
+        monkeypatch.setattr(api, "SWEEP_CHECKPOINT_DIR", str(tmp_path))
+        client = TestClient(app)
+
+        response = client.post("/sweep", json={
+            "base": BASE,
+            "parameters": {"max_speed": {"min": 14, "max": 20}, "loss_factor": {"min": 30, "max": 60}},
+            "strategy": "lhs",
+            "samples": 4,
+            "seed": 1,
+            "sweep_id": "study-1",
+        })
+        assert response.status_code == 200
+
+        body = response.json()
+        assert body["sweep_id"] == "study-1"
+        assert body["total_points"] == 4
+        assert all(p["metrics"]["total_time"] > 0 for p in body["points"])
+        assert (tmp_path / "study-1.jsonl").exists()
+
+    def test_running_sweep_id_is_conflict(self, tmp_path, monkeypatch):
+        from engine import api
+        monkeypatch.setattr(api, "SWEEP_CHECKPOINT_DIR", str(tmp_path))
+        running = open_checkpoint(str(tmp_path / "study-2.jsonl"))
+        try:
+            response = TestClient(app).post("/sweep", json={
+                "base": BASE, "parameters": {"dwell_time": {"values": [10.0]}}, "sweep_id": "study-2",
+            })
+        finally:
+            running.close()
+        assert response.status_code == 409
+
+    def test_sweep_without_bounds_is_bad_request(self):
+        client = TestClient(app)
+        response = client.post("/sweep", json={"base": BASE, "parameters": {"max_speed": {"steps": 3}}})
+        assert response.status_code == 400
@@ -0,0 +1,82 @@
+"""
+Testes do gerador de quadro de horários
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import line_params
+from engine.schemas import SimulationParamsDto
+from engine.service import SimulationService
+from engine.timetable import build_timetable, departure_trajectory, iter_trajectories
+from main import app
+
+BASE = line_params()
+
+
+class TestBuildTimetable:
+
+    def test_outer_sum_matches_single_schedule(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        departures = [0.0, 600.0, 1200.0]
+        timetable = build_timetable(service, params, departures)
+
+        schedule = service.run_schedule(params)
+        stations = [stop["station"] for stop in timetable["stops"]]
+        assert stations == ["A", "B", "C", "B", "A"]
+        assert [stop["direction"] for stop in timetable["stops"]] == \
+            ["outbound", "outbound", "outbound", "return", "return"]
+
+        arrivals = np.array(timetable["arrival_times"])
+        assert arrivals.shape == (3, 5)
+        expected = [0.0] + [entry["arrival_time"] for entry in schedule["schedule"]]
+        for row, departure in zip(arrivals, departures):
+            assert row == pytest.approx(np.array(expected) + departure)
+        assert timetable["round_trip_time"] == schedule["total_time"]
+
+    def test_terminal_departure_includes_layover(self):
+        service = SimulationService()
+        timetable = build_timetable(service, SimulationParamsDto(**BASE), [0.0])
+        terminal = timetable["stops"][2]
+        assert terminal["departure_offset"] == pytest.approx(terminal["arrival_offset"] + 30.0 + 120.0)
+
+    def test_lazy_trajectory_is_shifted_cached_run(self):
+        service = SimulationService()
+        params = SimulationParamsDto(**BASE)
+        reference = service.run_simulation(params)
+
+        trajectory = departure_trajectory(service, params, 900.0)
+        assert trajectory["time"][0] == pytest.approx(reference["time"][0] + 900.0)
+        assert trajectory["position"] == reference["position"]
+        assert trajectory["schedule"][0]["arrival_time"] == \
+            pytest.approx(reference["schedule"][0]["arrival_time"] + 900.0)
+
+        iterator = iter_trajectories(service, params, [0.0, 300.0])
+        assert next(iterator)["time"][-1] + 300.0 == pytest.approx(next(iterator)["time"][-1])
+
+
+class TestTimetableEndpoint:
+
+    def test_full_day_by_headway(self):
+        client = TestClient(app)
+        response = client.post("/timetable", json={
+            "base": BASE, "first_departure": 5 * 3600, "headway": 600, "last_departure": 23 * 3600,
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["departures"]) == 18 * 6 + 1
+        assert len(data["arrival_times"]) == len(data["departures"])
+        assert len(data["arrival_times"][0]) == len(data["stops"])
+
+        trajectory = client.get(f"/timetable/{data['timetable_id']}/trajectory/1")
+        assert trajectory.status_code == 200
+        assert trajectory.json()["time"][0] == pytest.approx(5 * 3600 + 600)
+
+    def test_unknown_timetable_and_index(self):
+        client = TestClient(app)
+        assert client.get("/timetable/missing/trajectory/0").status_code == 404
+
+        data = client.post("/timetable", json={"base": BASE, "departures": [0, 60]}).json()
+        assert client.get(f"/timetable/{data['timetable_id']}/trajectory/2").status_code == 404
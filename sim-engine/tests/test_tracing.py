@@ -0,0 +1,99 @@
+"""
+Testes dos traces por requisição (formato Chrome trace event)
+"""
+
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import engine.api as api
+from conftest import line_params
+from engine.schemas import SimulationParamsDto
+from engine.tracing import NULL_SPAN, Trace, TraceWriter, read_trace, start_span
+from main import app
+
+PARAMS = line_params(
+    stations=[{"name": "A", "km": 0}, {"name": "B", "km": 2}, {"name": "C", "km": 3}],
+    terminal_layover=60.0,
+    dt=0.13,
+)
+
+
+def traced_app(monkeypatch, tmp_path, sample_rate=1.0):
+    """App com instrument_app e gravação de traces em tmp_path"""
+    monkeypatch.setattr(api, "trace_writer", TraceWriter(str(tmp_path / "trace.json")))
+    monkeypatch.setattr(api, "TRACE_SAMPLE_RATE", sample_rate)
+    traced = FastAPI()
+    api.instrument_app(traced)
+
+    @traced.post("/run")
+    async def run(params: SimulationParamsDto):
+        return await api.simulation_scheduler.run(api.simulation_service.run_simulation, params)
+
+    return TestClient(traced), str(tmp_path / "trace.json")
+
+
+class TestTraceWriter:
+
+    def test_file_is_valid_trace_and_rotates(self, tmp_path):
+        path = str(tmp_path / "t.json")
+        writer = TraceWriter(path, max_bytes=600, backups=2)
+        trace = Trace("abc")
+        trace.add("x", 1.0, 1.5, {"k": 1})
+
+        for _ in range(10):
+            writer.write(trace.events)
+
+        events = read_trace(path)
+        assert events[0]["ph"] == "X"
+        assert events[0]["dur"] == pytest.approx(0.5e6)
+        assert events[0]["args"] == {"request_id": "abc", "k": 1}
+        assert os.path.exists(path + ".1") and os.path.exists(path + ".2")
+        assert not os.path.exists(path + ".3")
+        assert read_trace(path + ".2")
+
+    def test_span_without_trace_is_noop(self):
+        assert start_span("anything") is NULL_SPAN
+
+
+class TestRequestTracing:
+
+    def test_spans_for_simulation_request(self, monkeypatch, tmp_path):
+        client, path = traced_app(monkeypatch, tmp_path)
+        response = client.post("/run", json=PARAMS, headers={"X-Request-ID": "req-42"})
+        assert response.status_code == 200
+        assert response.headers["x-request-id"] == "req-42"
+
+        events = read_trace(path)
+        assert all(event["args"]["request_id"] == "req-42" for event in events)
+        names = [event["name"] for event in events]
+        for name in ("request", "parse_validate", "handler", "serialize", "physics",
+                     "simulation", "assembly", "validation"):
+            assert name in names, name
+        assert names.count("direction") == 2
+        assert names.count("segment") == 4
+
+        segment = next(event for event in events if event["name"] == "segment")
+        assert segment["args"]["source"] == "integrated"
+        assert segment["args"]["steps"] > 0
+        assert segment["args"]["extensions"] >= 0
+
+        # Spans aninhados: a simulação (thread do worker) dentro da requisição
+        request = next(event for event in events if event["name"] == "request")
+        simulation = next(event for event in events if event["name"] == "simulation")
+        assert request["ts"] <= simulation["ts"]
+        assert simulation["ts"] + simulation["dur"] <= request["ts"] + request["dur"]
+        assert simulation["tid"] != request["tid"]
+
+    def test_unsampled_requests_get_id_but_no_trace(self, monkeypatch, tmp_path):
+        client, path = traced_app(monkeypatch, tmp_path, sample_rate=0.0)
+        response = client.post("/run", json=PARAMS)
+        assert response.status_code == 200
+        assert len(response.headers["x-request-id"]) == 32
+        assert not os.path.exists(path)
+
+    def test_main_app_echoes_request_id(self):
+        response = TestClient(app).get("/health", headers={"X-Request-ID": "from-mean-api"})
+        assert response.headers["x-request-id"] == "from-mean-api"